@@ -0,0 +1,45 @@
+"""http cache
+
+Revision ID: 0003_http_cache
+Revises: 0002_audit_events
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0003_http_cache"
+down_revision = "0002_audit_events"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "http_cache_entries",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column(
+            "connection_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("provider_connections.id"),
+            nullable=False,
+        ),
+        sa.Column("url_hash", sa.String(length=64), nullable=False),
+        sa.Column("url", sa.Text(), nullable=False),
+        sa.Column("etag", sa.String(length=512), nullable=True),
+        sa.Column("last_modified", sa.String(length=64), nullable=True),
+        sa.Column("next_url", sa.Text(), nullable=True),
+        sa.Column("body", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint("connection_id", "url_hash", name="uq_http_cache_entries_connection_url"),
+    )
+    op.create_index("ix_http_cache_entries_connection_id", "http_cache_entries", ["connection_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_http_cache_entries_connection_id", table_name="http_cache_entries")
+    op.drop_table("http_cache_entries")
@@ -0,0 +1,48 @@
+"""collect jobs
+
+Revision ID: 0004_collect_jobs
+Revises: 0003_http_cache
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0004_collect_jobs"
+down_revision = "0003_http_cache"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "collect_jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("run_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("evidence_runs.id"), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column(
+            "progress",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+            server_default=sa.text("'{}'::jsonb"),
+        ),
+        sa.Column("error_summary", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_collect_jobs_user_id", "collect_jobs", ["user_id"], unique=False)
+    op.create_index("ix_collect_jobs_run_id", "collect_jobs", ["run_id"], unique=False)
+    op.create_index("ix_collect_jobs_status", "collect_jobs", ["status"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_collect_jobs_status", table_name="collect_jobs")
+    op.drop_index("ix_collect_jobs_run_id", table_name="collect_jobs")
+    op.drop_index("ix_collect_jobs_user_id", table_name="collect_jobs")
+    op.drop_table("collect_jobs")
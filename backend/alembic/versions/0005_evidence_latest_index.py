@@ -0,0 +1,30 @@
+"""evidence latest-per-control index
+
+Revision ID: 0005_evidence_latest_index
+Revises: 0004_collect_jobs
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0005_evidence_latest_index"
+down_revision = "0004_collect_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_control_evidence_user_control_collected",
+        "control_evidence",
+        ["user_id", "control_key", sa.text("collected_at DESC")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_control_evidence_user_control_collected", table_name="control_evidence")
@@ -0,0 +1,55 @@
+"""current control evidence
+
+Revision ID: 0006_current_control_evidence
+Revises: 0005_evidence_latest_index
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0006_current_control_evidence"
+down_revision = "0005_evidence_latest_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "current_control_evidence",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("control_key", sa.String(length=128), nullable=False),
+        sa.Column("evidence_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("run_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("provider", sa.String(length=32), nullable=True),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column(
+            "artifacts",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+            server_default=sa.text("'{}'::jsonb"),
+        ),
+        sa.Column("notes", sa.String(), nullable=False, server_default=""),
+        sa.Column("collected_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "control_key", name="pk_current_control_evidence"),
+    )
+
+    # Backfill from history: newest row per (user, control).
+    op.execute(
+        """
+        INSERT INTO current_control_evidence
+            (user_id, control_key, evidence_id, run_id, provider, status, artifacts, notes, collected_at)
+        SELECT DISTINCT ON (user_id, control_key)
+            user_id, control_key, id, run_id, provider, status, artifacts, notes, collected_at
+        FROM control_evidence
+        ORDER BY user_id, control_key, collected_at DESC, id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("current_control_evidence")
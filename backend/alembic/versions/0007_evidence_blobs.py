@@ -0,0 +1,34 @@
+"""evidence blobs
+
+Revision ID: 0007_evidence_blobs
+Revises: 0006_current_control_evidence
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0007_evidence_blobs"
+down_revision = "0006_current_control_evidence"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "evidence_blobs",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("body", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "sha256", name="pk_evidence_blobs"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("evidence_blobs")
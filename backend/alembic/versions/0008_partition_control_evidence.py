@@ -0,0 +1,120 @@
+"""partition control_evidence by month
+
+Revision ID: 0008_partition_control_evidence
+Revises: 0007_evidence_blobs
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0008_partition_control_evidence"
+down_revision = "0007_evidence_blobs"
+branch_labels = None
+depends_on = None
+
+_COLUMNS = "id, user_id, run_id, control_key, provider, status, artifacts, notes, collected_at"
+_INDEXES = (
+    ("ix_control_evidence_user_id", ["user_id"]),
+    ("ix_control_evidence_run_id", ["run_id"]),
+    ("ix_control_evidence_control_key", ["control_key"]),
+    ("ix_control_evidence_user_control_collected", ["user_id", "control_key", sa.text("collected_at DESC")]),
+)
+
+
+def _month_start(value: datetime) -> date:
+    return value.astimezone(timezone.utc).date().replace(day=1)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+
+
+def _create_partition(month: date) -> None:
+    # Same naming and UTC bounds as app.repos.evidence_partitions.create_partition_sql.
+    op.execute(
+        f"CREATE TABLE IF NOT EXISTS control_evidence_y{month.year:04d}m{month.month:02d} "
+        f"PARTITION OF control_evidence FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+        f"TO ('{_next_month(month).isoformat()} 00:00:00+00')"
+    )
+
+
+def _drop_indexes() -> None:
+    for name, _ in _INDEXES:
+        op.drop_index(name, table_name="control_evidence")
+
+
+def _create_indexes() -> None:
+    # Indexes on the parent cascade to every current and future partition.
+    for name, columns in _INDEXES:
+        op.create_index(name, "control_evidence", columns, unique=False)
+
+
+def _months_to_cover() -> list[date]:
+    # Every month holding existing evidence, through two months ahead of today.
+    oldest = op.get_bind().execute(sa.text("SELECT min(collected_at) FROM control_evidence_legacy")).scalar()
+    today = _month_start(datetime.now(timezone.utc))
+    month = _month_start(oldest) if oldest is not None else today
+    last = _next_month(_next_month(today))
+    months = []
+    while month <= last:
+        months.append(month)
+        month = _next_month(month)
+    return months
+
+
+def upgrade() -> None:
+    _drop_indexes()
+    op.execute("ALTER TABLE control_evidence RENAME CONSTRAINT control_evidence_pkey TO control_evidence_legacy_pkey")
+    op.rename_table("control_evidence", "control_evidence_legacy")
+
+    op.create_table(
+        "control_evidence",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("run_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("evidence_runs.id"), nullable=False),
+        sa.Column("control_key", sa.String(length=128), nullable=False),
+        sa.Column("provider", sa.String(length=32), nullable=True),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("artifacts", postgresql.JSONB(astext_type=sa.Text()), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("notes", sa.Text(), nullable=False, server_default=""),
+        sa.Column("collected_at", sa.DateTime(timezone=True), nullable=False),
+        # The partition key must be part of every unique constraint on a partitioned table.
+        sa.PrimaryKeyConstraint("id", "collected_at", name="control_evidence_pkey"),
+        postgresql_partition_by="RANGE (collected_at)",
+    )
+    for month in _months_to_cover():
+        _create_partition(month)
+
+    op.execute(f"INSERT INTO control_evidence ({_COLUMNS}) SELECT {_COLUMNS} FROM control_evidence_legacy")
+    op.drop_table("control_evidence_legacy")
+    _create_indexes()
+
+
+def downgrade() -> None:
+    _drop_indexes()
+    op.execute("ALTER TABLE control_evidence RENAME CONSTRAINT control_evidence_pkey TO control_evidence_partitioned_pkey")
+    op.rename_table("control_evidence", "control_evidence_partitioned")
+
+    op.create_table(
+        "control_evidence",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("run_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("evidence_runs.id"), nullable=False),
+        sa.Column("control_key", sa.String(length=128), nullable=False),
+        sa.Column("provider", sa.String(length=32), nullable=True),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("artifacts", postgresql.JSONB(astext_type=sa.Text()), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("notes", sa.Text(), nullable=False, server_default=""),
+        sa.Column("collected_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.execute(f"INSERT INTO control_evidence ({_COLUMNS}) SELECT {_COLUMNS} FROM control_evidence_partitioned")
+    # Dropping the partitioned parent drops all of its partitions.
+    op.drop_table("control_evidence_partitioned")
+    _create_indexes()
@@ -0,0 +1,42 @@
+"""one active collect job per user
+
+Revision ID: 0009_collect_jobs_active_unique
+Revises: 0008_partition_control_evidence
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0009_collect_jobs_active_unique"
+down_revision = "0008_partition_control_evidence"
+branch_labels = None
+depends_on = None
+
+_ACTIVE = "status IN ('queued', 'running')"
+
+
+def upgrade() -> None:
+    # Jobs left active by earlier races or restarts would violate the index; keep the newest per user.
+    op.execute(
+        f"""
+        UPDATE collect_jobs SET status = 'failed', error_summary = 'collect: job interrupted', finished_at = now()
+        WHERE {_ACTIVE} AND id NOT IN (
+            SELECT DISTINCT ON (user_id) id FROM collect_jobs WHERE {_ACTIVE} ORDER BY user_id, created_at DESC
+        )
+        """
+    )
+    op.create_index(
+        "uq_collect_jobs_user_active",
+        "collect_jobs",
+        ["user_id"],
+        unique=True,
+        postgresql_where=sa.text(_ACTIVE),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_collect_jobs_user_active", table_name="collect_jobs")
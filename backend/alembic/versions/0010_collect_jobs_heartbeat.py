@@ -0,0 +1,27 @@
+"""collect job heartbeat
+
+Revision ID: 0010_collect_jobs_heartbeat
+Revises: 0009_collect_jobs_active_unique
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0010_collect_jobs_heartbeat"
+down_revision = "0009_collect_jobs_active_unique"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("collect_jobs", sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE collect_jobs SET updated_at = COALESCE(finished_at, started_at, created_at)")
+    op.alter_column("collect_jobs", "updated_at", nullable=False)
+
+
+def downgrade() -> None:
+    op.drop_column("collect_jobs", "updated_at")
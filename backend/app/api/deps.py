@@ -3,25 +3,23 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime, timezone
 
-from fastapi import Depends, HTTPException, Request, status
+from fastapi import BackgroundTasks, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
+from app.core.auth_cache import AuthSession, AuthUser, CachedAuth, auth_cache
 from app.core.cookies import CSRF_COOKIE_NAME, SESSION_COOKIE_NAME
 from app.core.security import token_hash
 from app.core.settings import get_settings, parse_allowed_origins
 from app.db.session import get_db
-from app.models.session import Session as DbSession
-from app.models.user import User
-from app.repos.sessions import get_session_by_token_hash, touch_session
-from app.repos.users import get_user_by_id
+from app.repos.sessions import get_session_with_user
+from app.services.session_activity import session_activity
 
 
 @dataclass(frozen=True)
 class AuthContext:
-    user: User
-    session: DbSession
-
-
+    # Immutable snapshots, possibly served from the in-process auth cache.
+    user: AuthUser
+    session: AuthSession
 
 
 def _as_aware_utc(dt: datetime) -> datetime:
@@ -35,25 +33,41 @@ def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def get_auth_ctx(request: Request, db: Session = Depends(get_db)) -> AuthContext:
+def get_auth_ctx(request: Request, background_tasks: BackgroundTasks, db: Session = Depends(get_db)) -> AuthContext:
     raw = request.cookies.get(SESSION_COOKIE_NAME)
     if not raw:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
-    sess = get_session_by_token_hash(db, token_hash(raw))
-    if sess is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid session")
-    if sess.revoked_at is not None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Session revoked")
-    if _as_aware_utc(sess.expires_at) < _utcnow():
+    hashed = token_hash(raw)
+    cache = auth_cache()
+    activity = session_activity()
+    cached = cache.get(hashed)
+    if cached is None:
+        # Cache miss: one joined session+user query; revoked sessions are never cached.
+        found = get_session_with_user(db, hashed)
+        if found is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid session")
+        sess, user = found
+        if sess.revoked_at is not None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Session revoked")
+        cached = CachedAuth(
+            user=AuthUser(id=user.id, email=user.email, created_at=user.created_at),
+            session=AuthSession(
+                id=sess.id,
+                user_id=sess.user_id,
+                csrf_token=sess.csrf_token,
+                expires_at=_as_aware_utc(sess.expires_at),
+            ),
+        )
+        activity.seen(sess.id, _as_aware_utc(sess.last_seen_at))
+        cache.put(hashed, cached)
+
+    if cached.session.expires_at < _utcnow():
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Session expired")
-
-    user = get_user_by_id(db, sess.user_id)
-    if user is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid session user")
-
-    touch_session(db, sess.id)
-    return AuthContext(user=user, session=sess)
+    # Coalesced last_seen_at: queued at most once per granularity, written after the response.
+    if activity.record(cached.session.id):
+        background_tasks.add_task(activity.flush, db.get_bind())
+    return AuthContext(user=cached.user, session=cached.session)
 
 
 def require_csrf(request: Request, auth: AuthContext = Depends(get_auth_ctx)) -> None:
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+from collections.abc import Callable
 from datetime import datetime
+from typing import TypeVar
 
 from app.core.time import utcnow
 
@@ -19,9 +21,11 @@ from app.core.security import (
     hash_password,
     new_csrf_token,
     new_session_token,
+    password_pool,
     token_hash,
     verify_password,
 )
+from app.core.workers import WorkerPoolSaturated
 from app.db.session import get_db
 from app.repos.sessions import create_session, revoke_session
 from app.repos.users import create_user, get_user_by_email
@@ -29,6 +33,8 @@ from app.api.deps import AuthContext, get_auth_ctx, require_csrf
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+R = TypeVar("R")
+
 
 class AuthRequest(BaseModel):
     email: EmailStr
@@ -48,6 +54,17 @@ def _session_expiry_and_max_age() -> tuple[datetime, int]:
     return expires_at, max_age
 
 
+def _password_job(fn: Callable[..., R], *args) -> R:
+    try:
+        return password_pool().call(fn, *args)
+    except WorkerPoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in attempts in progress; try again shortly",
+            headers={"Retry-After": "1"},
+        ) from None
+
+
 def _set_login_cookies(resp: Response, *, session_token: str, csrf_token: str, max_age: int) -> None:
     # Align cookie expiry with server-side session expiry.
     set_session_cookie(resp, session_token, max_age=max_age)
@@ -60,7 +77,7 @@ def register(payload: AuthRequest, response: Response, db: Session = Depends(get
     if existing is not None:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already registered")
 
-    user = create_user(db, email=payload.email, password_hash=hash_password(payload.password))
+    user = create_user(db, email=payload.email, password_hash=_password_job(hash_password, payload.password))
 
     session_token = new_session_token()
     csrf_token = new_csrf_token()
@@ -79,7 +96,7 @@ def register(payload: AuthRequest, response: Response, db: Session = Depends(get
 @router.post("/login", response_model=MeResponse)
 def login(payload: AuthRequest, response: Response, db: Session = Depends(get_db)) -> MeResponse:
     user = get_user_by_email(db, payload.email)
-    if user is None or not verify_password(payload.password, user.password_hash):
+    if user is None or not _password_job(verify_password, payload.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     session_token = new_session_token()
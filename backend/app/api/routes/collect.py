@@ -1,35 +1,134 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+import json
+import uuid
+from collections.abc import AsyncIterator
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.api.deps import AuthContext, get_auth_ctx, require_csrf
 from app.db.session import get_db
-from app.services.collect import collect_now
-from app.repos.audit_events import add_audit_event
+from app.models.collect_job import CollectJob
+from app.repos.collect_jobs import ACTIVE_STATUSES, get_job_for_user
+from app.services.collect_events import collect_events
+from app.services.collect_jobs import start_collect_job
 
 router = APIRouter(tags=["collect"])
 
+# Idle streams send a keepalive (and re-check the job row) this often.
+_SSE_HEARTBEAT_SECONDS = 15.0
+
 
-class CollectResponse(BaseModel):
+class CollectJobResponse(BaseModel):
+    job_id: str
     run_id: str
-    status: str
+    status: str  # queued|running|success|partial|failed
+    progress: dict[str, str]
     errors: list[str]
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+def _job_response(job: CollectJob) -> CollectJobResponse:
+    return CollectJobResponse(
+        job_id=str(job.id),
+        run_id=str(job.run_id),
+        status=job.status,
+        progress=job.progress or {},
+        errors=job.error_summary.split("; ") if job.error_summary else [],
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
 
 
-@router.post("/collect", response_model=CollectResponse)
+@router.post("/collect", response_model=CollectJobResponse, status_code=status.HTTP_202_ACCEPTED)
 def collect(
     db: Session = Depends(get_db),
     auth: AuthContext = Depends(get_auth_ctx),
     _: None = Depends(require_csrf),
-) -> CollectResponse:
-    res = collect_now(db, user_id=auth.user.id)
-    add_audit_event(
-        db,
-        user_id=auth.user.id,
-        action="collect",
-        metadata={"run_id": res.get("run_id"), "status": res.get("status"), "errors": res.get("errors")},
-    )
-    return CollectResponse(**res)
+) -> CollectJobResponse:
+    job = start_collect_job(db, user_id=auth.user.id)
+    return _job_response(job)
+
+
+@router.get("/jobs/{job_id}", response_model=CollectJobResponse)
+def get_job(
+    job_id: uuid.UUID,
+    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_ctx),
+) -> CollectJobResponse:
+    job = get_job_for_user(db, user_id=auth.user.id, job_id=job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return _job_response(job)
+
 
+def _sse(event_type: str, data: dict, *, event_id: int | None = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event_type}\ndata: {json.dumps(data, sort_keys=True, default=str)}\n\n"
+
+
+@router.get("/jobs/{job_id}/events")
+def stream_job_events(
+    job_id: uuid.UUID,
+    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_ctx),
+    last_event_id: int | None = Header(default=None),
+) -> StreamingResponse:
+    """Server-Sent Events: a job snapshot, then live progress until the run finishes.
+
+    A stream also ends (with a final job snapshot) once the job row reaches a terminal
+    status, even if no worker ever closes the run's event channel.
+
+    Event types: job, repos_listed, repo_fetched, control_set_fetched, control_written,
+    provider_finished, run_finished. Reconnects resume after Last-Event-ID.
+    """
+
+    job = get_job_for_user(db, user_id=auth.user.id, job_id=job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    snapshot = _job_response(job).model_dump(mode="json")
+    run_id = job.run_id
+    live = job.status in ACTIVE_STATUSES or collect_events.has_run(run_id)
+    bind = db.get_bind()
+    user_id = auth.user.id
+
+    def finished_snapshot() -> dict | None:
+        # Own short session: the request's session is not used once streaming starts.
+        with Session(bind=bind, autoflush=False) as check:
+            current = get_job_for_user(check, user_id=user_id, job_id=job_id)
+            if current is None or current.status in ACTIVE_STATUSES:
+                return None
+            return _job_response(current).model_dump(mode="json")
+
+    async def events() -> AsyncIterator[str]:
+        # Async so an open stream waits on the event loop instead of holding a threadpool worker.
+        yield _sse("job", snapshot)
+        if not live:
+            return
+        async for event in collect_events.subscribe_async(
+            run_id, after_seq=last_event_id or 0, heartbeat_seconds=_SSE_HEARTBEAT_SECONDS
+        ):
+            if event is not None:
+                yield _sse(event["type"], event, event_id=event["seq"])
+                continue
+            # Idle: end the stream if the job finished without closing its channel
+            # (e.g. it was failed as stale or never reached a worker).
+            final = await run_in_threadpool(finished_snapshot)
+            if final is not None:
+                yield _sse("job", final)
+                return
+            yield ": keepalive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
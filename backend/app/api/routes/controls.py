@@ -8,7 +8,8 @@ from sqlalchemy.orm import Session
 
 from app.api.deps import AuthContext, get_auth_ctx
 from app.db.session import get_db
-from app.repos.evidence import latest_evidence_all_controls, latest_evidence_for_control
+from app.repos.evidence import current_evidence_all_controls, current_evidence_for_control
+from app.repos.evidence_blobs import resolve_artifacts
 from app.services.control_defs import CONTROL_BY_KEY, CONTROLS
 
 router = APIRouter(tags=["controls"])
@@ -36,7 +37,7 @@ class ControlDetail(BaseModel):
 
 @router.get("/dashboard", response_model=list[ControlSummary])
 def dashboard(db: Session = Depends(get_db), auth: AuthContext = Depends(get_auth_ctx)) -> list[ControlSummary]:
-    latest = {r.control_key: r for r in latest_evidence_all_controls(db, user_id=auth.user.id)}
+    latest = {r.control_key: r for r in current_evidence_all_controls(db, user_id=auth.user.id)}
 
     out: list[ControlSummary] = []
     for c in CONTROLS:
@@ -65,7 +66,7 @@ def control_detail(control_key: str, db: Session = Depends(get_db), auth: AuthCo
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown control")
 
     c = CONTROL_BY_KEY[control_key]
-    row = latest_evidence_for_control(db, user_id=auth.user.id, control_key=control_key)
+    row = current_evidence_for_control(db, user_id=auth.user.id, control_key=control_key)
     if row is None:
         return ControlDetail(
             key=c.key,
@@ -85,7 +86,7 @@ def control_detail(control_key: str, db: Session = Depends(get_db), auth: AuthCo
         title_en=c.title_en,
         status=row.status,
         collected_at=row.collected_at,
-        artifacts=row.artifacts,
+        artifacts=resolve_artifacts(db, user_id=auth.user.id, artifacts=row.artifacts),
         notes=row.notes,
     )
 
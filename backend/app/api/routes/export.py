@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import Response
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 
 from app.api.deps import AuthContext, get_auth_ctx, require_csrf
@@ -17,16 +17,22 @@ def export(
     db: Session = Depends(get_db),
     auth: AuthContext = Depends(get_auth_ctx),
     _: None = Depends(require_csrf),
-) -> Response:
+) -> FileResponse:
     try:
-        payload = export_pack(db, user_id=auth.user.id)
-        add_audit_event(db, user_id=auth.user.id, action="export", metadata={"bytes": len(payload)})
+        stored = export_pack(db, user_id=auth.user.id)
+        add_audit_event(
+            db,
+            user_id=auth.user.id,
+            action="export",
+            metadata={"bytes": stored.size_bytes, "sha256": stored.sha256},
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
-    return Response(
-        content=payload,
+    # Streamed from the stored pack on disk rather than held in memory.
+    return FileResponse(
+        stored.path,
         media_type="application/zip",
-        headers={"Content-Disposition": 'attachment; filename="dk-security-pack.zip"'},
+        filename="dk-security-pack.zip",
     )
 
@@ -3,7 +3,6 @@ from __future__ import annotations
 import base64
 import hashlib
 import json
-from io import BytesIO
 from zipfile import ZipFile
 
 from fastapi import APIRouter, Depends
@@ -11,7 +10,7 @@ from sqlalchemy.orm import Session
 
 from app.api.deps import AuthContext, get_auth_ctx
 from app.db.session import get_db
-from app.services.export_store import load_export_pack
+from app.services.export_store import stored_export_path
 from app.services.pack_signing import canonical_manifest_bytes, ensure_signing_material
 
 router = APIRouter(prefix="/exports", tags=["exports"])
@@ -24,14 +23,14 @@ def verify_export(
     auth: AuthContext = Depends(get_auth_ctx),
 ) -> dict:
     # Export packs are stored per-user on this instance.
-    pack_bytes = load_export_pack(user_id=str(auth.user.id), export_id=export_id)
-    if pack_bytes is None:
+    pack_path = stored_export_path(user_id=str(auth.user.id), export_id=export_id)
+    if pack_path is None:
         return {"verified": False, "mode": "unknown", "details": {"error": "not_found"}}
 
     details: dict = {"export_id": export_id}
 
     try:
-        with ZipFile(BytesIO(pack_bytes), "r") as outer:
+        with ZipFile(pack_path, "r") as outer:
             pack_manifest_bytes = outer.read("pack_manifest.json")
             sig_text = outer.read("pack_manifest.sig").decode("utf-8").strip()
             sig_bytes = base64.b64decode(sig_text.encode("ascii"))
@@ -43,11 +42,10 @@ def verify_export(
             mismatches = []
             for fn, expected in sorted(hashes.items()):
                 try:
-                    data = outer.read(fn)
+                    got = _entry_sha256(outer, fn)
                 except KeyError:
                     missing.append(fn)
                     continue
-                got = hashlib.sha256(data).hexdigest()
                 if got != expected:
                     mismatches.append({"filename": fn, "expected": expected, "got": got})
 
@@ -67,3 +65,12 @@ def verify_export(
             return {"verified": verified, "mode": signing.mode, "details": details}
     except Exception as e:
         return {"verified": False, "mode": "unknown", "details": {"error": "verify_failed", "error_type": type(e).__name__}}
+
+
+def _entry_sha256(z: ZipFile, name: str) -> str:
+    # Hash in chunks so large entries (evidence-pack.zip) are never fully in memory.
+    h = hashlib.sha256()
+    with z.open(name) as f:
+        while chunk := f.read(1024 * 1024):
+            h.update(chunk)
+    return h.hexdigest()
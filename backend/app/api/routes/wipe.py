@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from app.api.deps import AuthContext, get_auth_ctx, require_csrf
 from app.core.cookies import clear_csrf_cookie, clear_session_cookie
 from app.db.session import get_db
+from app.repos.collect_jobs import delete_all_for_user as delete_all_collect_jobs
 from app.repos.connections import delete_connection
 from app.repos.evidence import delete_all_user_data
 from app.repos.oauth_states import delete_all_for_user
@@ -23,6 +24,7 @@ def wipe(
     auth: AuthContext = Depends(get_auth_ctx),
     _: None = Depends(require_csrf),
 ) -> dict:
+    delete_all_collect_jobs(db, user_id=auth.user.id)
     delete_all_user_data(db, user_id=auth.user.id)
     delete_all_for_user(db, user_id=auth.user.id)
     delete_connection(db, user_id=auth.user.id, provider="github")
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.core.settings import get_settings
+
+
+@dataclass(frozen=True)
+class AuthUser:
+    id: uuid.UUID
+    email: str
+    created_at: datetime
+
+
+@dataclass(frozen=True)
+class AuthSession:
+    id: uuid.UUID
+    user_id: uuid.UUID
+    csrf_token: str
+    expires_at: datetime
+
+
+@dataclass(frozen=True)
+class CachedAuth:
+    user: AuthUser
+    session: AuthSession
+
+
+class AuthCache:
+    """Thread-safe TTL + LRU map from session token hash to an authenticated snapshot.
+
+    Holds immutable copies (not ORM objects) so entries can be shared across requests
+    and threads. Revocation paths in app.repos.sessions invalidate entries in this
+    process; other processes stop honouring a revoked session within ttl_seconds.
+    """
+
+    def __init__(self, *, ttl_seconds: float, max_entries: int, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, CachedAuth]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, token_hash: str) -> CachedAuth | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            item = self._entries.get(token_hash)
+            if item is None:
+                return None
+            stored_at, value = item
+            if self._clock() - stored_at >= self.ttl_seconds:
+                del self._entries[token_hash]
+                return None
+            self._entries.move_to_end(token_hash)
+            return value
+
+    def put(self, token_hash: str, value: CachedAuth) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[token_hash] = (self._clock(), value)
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_session(self, session_id: uuid.UUID) -> None:
+        self._invalidate(lambda v: v.session.id == session_id)
+
+    def invalidate_user(self, user_id: uuid.UUID) -> None:
+        self._invalidate(lambda v: v.user.id == user_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _invalidate(self, match: Callable[[CachedAuth], bool]) -> None:
+        with self._lock:
+            for key in [k for k, (_, v) in self._entries.items() if match(v)]:
+                del self._entries[key]
+
+
+_cache: AuthCache | None = None
+_cache_lock = threading.Lock()
+
+
+def auth_cache() -> AuthCache:
+    """Return the process-wide auth cache, sized from settings on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            settings = get_settings()
+            _cache = AuthCache(
+                ttl_seconds=settings.auth_cache_ttl_seconds,
+                max_entries=settings.auth_cache_max_entries,
+            )
+        return _cache
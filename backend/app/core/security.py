@@ -8,6 +8,9 @@ from app.core.time import utcnow
 
 import bcrypt
 
+from app.core.settings import get_settings
+from app.core.workers import BoundedProcessPool, process_pool
+
 
 def hash_password(password: str) -> str:
     pw = password.encode("utf-8")
@@ -22,6 +25,16 @@ def verify_password(password: str, password_hash: str) -> bool:
         return False
 
 
+def password_pool() -> BoundedProcessPool:
+    # bcrypt (12 rounds, ~250ms CPU) runs here so login bursts cannot starve other requests.
+    settings = get_settings()
+    return process_pool(
+        "password",
+        max_workers=settings.password_hash_workers,
+        max_queued=settings.password_hash_queue_depth,
+    )
+
+
 def new_session_token() -> str:
     # URL-safe; stored only in cookie (raw).
     return secrets.token_urlsafe(32)
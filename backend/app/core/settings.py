@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from functools import lru_cache
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -12,17 +13,71 @@ class Settings(BaseSettings):
     app_base_url: str = "http://localhost:8000"
     web_base_url: str = "http://localhost:5173"
     exports_dir: str = "exports"
+    # Worker processes rendering report.pdf during exports (0 = render on a thread in-process).
+    export_pdf_workers: int = 2
+    # Byte budget for rendered report/evidence payloads reused while evidence is unchanged
+    # (LRU across users under exports_dir/users/<id>/cache; 0 disables).
+    export_cache_max_bytes: int = 256 * 1024 * 1024
     allowed_origins: str = ""
     allowed_hosts: str = ""
 
     cookie_secure: bool = False
+    # In-process cache of authenticated sessions (seconds; 0 disables). Logout and wipe evict
+    # entries in this process immediately; other workers honour a revocation within the TTL.
+    auth_cache_ttl_seconds: float = 30.0
+    auth_cache_max_entries: int = 10000
+    # Sessions' last_seen_at is written at most once per this many seconds (batched, after the response).
+    session_touch_granularity_seconds: float = 60.0
+    # Worker processes for bcrypt (0 = hash inline) and how many more logins may wait before
+    # /auth/login and /auth/register answer 503.
+    password_hash_workers: int = 2
+    password_hash_queue_depth: int = 16
 
     database_url: str
     fernet_key: str
+    # Comma-separated retired Fernet keys still accepted for decryption during a rotation
+    # (see app.scripts.rotate_fernet_key); new ciphertext always uses fernet_key.
+    fernet_previous_keys: str = ""
 
     github_client_id: str = ""
     github_client_secret: str = ""
     github_oauth_redirect_uri: str = ""
+    # In-process workers running queued "Collect now" jobs.
+    collect_job_workers: int = 2
+    # Each API process touches collect_jobs.updated_at of the jobs it holds this often.
+    collect_job_heartbeat_seconds: float = 60.0
+    # Queued/running jobs without a heartbeat for this long are treated as orphaned (the
+    # process that owned them went away) and failed so a new collection can start (0 = never).
+    collect_job_stale_after_seconds: int = 600
+    # Max concurrent per-repo GitHub API calls during collection (1 = sequential).
+    github_max_concurrency: int = 8
+    # Number of repositories sampled per collection (0 = all repositories).
+    github_repo_sample_size: int = 10
+    # Optional organization login; when set, repositories are enumerated via /orgs/{org}/repos.
+    github_org: str = ""
+    # rest: list repos + one protection call per repo; graphql: batched repo + protection-rule queries.
+    github_collection_backend: Literal["rest", "graphql"] = "rest"
+
+    # Persist ETag/Last-Modified validators per connection and send conditional requests.
+    provider_http_cache: bool = True
+    # Per-connection request budget and retry policy for GitHub/Graph calls.
+    provider_rate_per_second: float = 10.0
+    provider_rate_burst: int = 20
+    provider_max_retries: int = 3
+    provider_max_wait_seconds: float = 60.0
+
+    # Evidence retention (0 = keep everything). Always keeps the newest N runs and the
+    # runs behind current evidence; older runs thin out to one per week, then per month.
+    evidence_retention_keep_runs: int = 0
+    evidence_retention_weekly_after_days: int = 30
+    evidence_retention_monthly_after_days: int = 180
+    # Delete unprotected runs older than this many days (0 = no age limit). On a partitioned
+    # Postgres control_evidence table whole expired months are dropped as partitions.
+    evidence_retention_max_age_days: int = 0
+    # Rows deleted per statement/commit so pruning never holds long locks.
+    evidence_retention_batch_size: int = 500
+    # Run retention in the API process every N hours (0 = only via app.scripts.prune_evidence).
+    evidence_retention_interval_hours: float = 0.0
 
     ms_client_id: str = ""
     ms_client_secret: str = ""
@@ -46,6 +101,12 @@ def parse_allowed_origins(settings: Settings) -> list[str]:
     return list({settings.web_base_url, "http://localhost:5173", "http://127.0.0.1:5173"})
 
 
+def parse_fernet_keys(settings: Settings) -> list[str]:
+    # Primary key first: it encrypts; every key decrypts.
+    previous = [k.strip() for k in settings.fernet_previous_keys.split(",") if k.strip()]
+    return [settings.fernet_key.strip()] + [k for k in previous if k != settings.fernet_key.strip()]
+
+
 def parse_allowed_hosts(settings: Settings) -> list[str]:
     if settings.allowed_hosts.strip():
         return [h.strip() for h in settings.allowed_hosts.split(",") if h.strip()]
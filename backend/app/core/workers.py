@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import threading
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import TypeVar
+
+
+R = TypeVar("R")
+
+
+class WorkerPoolSaturated(RuntimeError):
+    """Raised when a bounded pool already has its maximum number of jobs in flight."""
+
+
+class BoundedProcessPool:
+    """Process pool for CPU-bound work with a hard cap on queued + running jobs.
+
+    call() blocks the calling thread (never the event loop: routes are sync and run in
+    the threadpool) until the job finishes, but fails fast with WorkerPoolSaturated once
+    max_workers + max_queued jobs are in flight, so a burst degrades into quick 503s
+    instead of an ever-growing backlog. Workers use the spawn start method so they never
+    inherit the parent's threads, locks or DB connections. max_workers=0 runs jobs inline
+    in the calling thread (same admission limit), which tests and tiny deployments use.
+    """
+
+    def __init__(self, *, name: str, max_workers: int, max_queued: int):
+        self.name = name
+        self.max_workers = max(0, max_workers)
+        self.capacity = max(1, self.max_workers + max(0, max_queued))
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+
+    def call(self, fn: Callable[..., R], *args, **kwargs) -> R:
+        if not self._slots.acquire(blocking=False):
+            raise WorkerPoolSaturated(f"{self.name} pool is saturated")
+        try:
+            if self.max_workers == 0:
+                return fn(*args, **kwargs)
+            return self._get_executor().submit(fn, *args, **kwargs).result()
+        finally:
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+
+_pools: dict[str, BoundedProcessPool] = {}
+_pools_lock = threading.Lock()
+
+
+def process_pool(name: str, *, max_workers: int, max_queued: int) -> BoundedProcessPool:
+    """Return the process-wide pool registered under name, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = BoundedProcessPool(name=name, max_workers=max_workers, max_queued=max_queued)
+            _pools[name] = pool
+        return pool
+
+
+@atexit.register
+def _shutdown_pools() -> None:
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown()
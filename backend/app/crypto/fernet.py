@@ -1,13 +1,21 @@
 from __future__ import annotations
 
-from cryptography.fernet import Fernet, InvalidToken
+from functools import lru_cache
 
-from app.core.settings import get_settings
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 
+from app.core.settings import get_settings, parse_fernet_keys
 
-def _fernet() -> Fernet:
-    settings = get_settings()
-    return Fernet(settings.fernet_key.encode("utf-8"))
+
+@lru_cache(maxsize=8)
+def _keyring(keys: tuple[str, ...]) -> MultiFernet:
+    # Encrypts with keys[0]; decrypts with any key in the ring (newest first).
+    return MultiFernet([Fernet(k.encode("utf-8")) for k in keys])
+
+
+def _fernet() -> MultiFernet:
+    # Built once per distinct key list; get_settings() is itself cached.
+    return _keyring(tuple(parse_fernet_keys(get_settings())))
 
 
 def encrypt_str(value: str) -> str:
@@ -20,3 +28,11 @@ def decrypt_str(value: str) -> str:
     except InvalidToken as e:
         raise ValueError("Invalid encrypted token") from e
 
+
+def rotate_str(value: str) -> str:
+    """Re-encrypt a token under the primary key (FERNET_KEY), keeping its original timestamp."""
+
+    try:
+        return _fernet().rotate(value.encode("utf-8")).decode("utf-8")
+    except InvalidToken as e:
+        raise ValueError("Invalid encrypted token") from e
@@ -15,6 +15,11 @@ def get_engine() -> Engine:
     return create_engine(settings.database_url, pool_pre_ping=True)
 
 
+def supports_concurrent_sessions(bind) -> bool:
+    # SQLite connections (and StaticPool test engines) must not be used from several threads at once.
+    return bind.dialect.name != "sqlite"
+
+
 @lru_cache
 def _sessionmaker():
     return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
@@ -4,47 +4,95 @@ import hashlib
 import json
 from datetime import datetime
 from io import BytesIO
-from zipfile import ZIP_DEFLATED, ZipFile
+from typing import BinaryIO
 
+from app.export.zip_writer import DeterministicZip
 
-def build_evidence_zip(*, generated_at: datetime, app_version: str, user_id: str, evidence_by_key: dict[str, dict]) -> tuple[bytes, dict]:
+
+def build_evidence_zip(
+    *,
+    generated_at: datetime,
+    app_version: str,
+    user_id: str,
+    evidence_by_key: dict[str, dict],
+    blobs: dict[str, bytes] | None = None,
+) -> tuple[bytes, dict]:
     """
-    Returns (zip_bytes, manifest_dict).
+    Returns (zip_bytes, manifest_dict). In-memory wrapper around write_evidence_zip.
+    """
+    buf = BytesIO()
+    manifest = write_evidence_zip(
+        buf,
+        generated_at=generated_at,
+        app_version=app_version,
+        user_id=user_id,
+        evidence_by_key=evidence_by_key,
+        blobs=blobs,
+    )
+    return buf.getvalue(), manifest
+
+
+def write_evidence_zip(
+    fileobj: BinaryIO,
+    *,
+    generated_at: datetime,
+    app_version: str,
+    user_id: str,
+    evidence_by_key: dict[str, dict],
+    blobs: dict[str, bytes] | None = None,
+) -> dict:
+    """
+    Streams the evidence zip into fileobj and returns manifest_dict.
+
+    Each artifact is written as soon as it is rendered (so at most one payload is held
+    at a time). Entries go in sorted name order (artifacts/, blobs/, manifest.json) with
+    fixed headers, so identical inputs produce a byte-identical zip.
+
+    Artifacts may reference shared payloads as {"$blob": "<sha256>"}; each referenced
+    blob (canonical JSON bytes keyed by that hash) is written once as blobs/<sha256>.json.
     """
     files: list[dict] = []
-    artifact_payloads: dict[str, bytes] = {}
+    blob_files: list[dict] = []
 
+    entries: dict[str, tuple[str, dict]] = {}
     for key, ev in evidence_by_key.items():
         # Defensive: ensure filenames cannot be influenced into path traversal (zip slip).
         safe_key = key.replace("\\", "_").replace("/", "_")
         safe_key = safe_key.replace("..", "_")
-        payload = json.dumps(
-            {
-                "control_key": key,
-                "status": ev.get("status"),
-                "collected_at": ev.get("collected_at"),
-                "notes": ev.get("notes"),
-                "artifacts": ev.get("artifacts") or {},
-            },
-            indent=2,
-            sort_keys=True,
-        ).encode("utf-8")
-        sha = hashlib.sha256(payload).hexdigest()
-        filename = f"artifacts/{safe_key}.json"
-        artifact_payloads[filename] = payload
-        files.append({"control_key": key, "filename": filename, "sha256": sha})
-
-    manifest = {
-        "generated_at_utc": generated_at.isoformat() + "Z",
-        "app_version": app_version,
-        "user_id": user_id,
-        "files": files,
-    }
+        entries[f"artifacts/{safe_key}.json"] = (key, ev)
 
-    buf = BytesIO()
-    with ZipFile(buf, "w", compression=ZIP_DEFLATED) as z:
+    with DeterministicZip(fileobj) as z:
+        for filename, (key, ev) in sorted(entries.items()):
+            payload = json.dumps(
+                {
+                    "control_key": key,
+                    "status": ev.get("status"),
+                    "collected_at": ev.get("collected_at"),
+                    "notes": ev.get("notes"),
+                    "artifacts": ev.get("artifacts") or {},
+                },
+                indent=2,
+                sort_keys=True,
+            ).encode("utf-8")
+            z.writestr(filename, payload)
+            files.append({"control_key": key, "filename": filename, "sha256": hashlib.sha256(payload).hexdigest()})
+
+        for ref in sorted(blobs or {}):
+            # Hashes come from our own sha256 hex digests; still refuse anything path-like.
+            if not ref.isalnum():
+                continue
+            filename = f"blobs/{ref}.json"
+            z.writestr(filename, blobs[ref])
+            blob_files.append({"blob": ref, "filename": filename, "sha256": hashlib.sha256(blobs[ref]).hexdigest()})
+
+        manifest = {
+            "generated_at_utc": generated_at.isoformat() + "Z",
+            "app_version": app_version,
+            "user_id": user_id,
+            "files": files,
+        }
+        if blob_files:
+            manifest["blobs"] = blob_files
         z.writestr("manifest.json", json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
-        for fn, payload in artifact_payloads.items():
-            z.writestr(fn, payload)
 
-    return buf.getvalue(), manifest
+    return manifest
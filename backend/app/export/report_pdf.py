@@ -21,6 +21,8 @@ def render_report_pdf(*, generated_at: datetime, app_version: str, evidence_by_k
         topMargin=18 * mm,
         bottomMargin=18 * mm,
         title="DK Procurement Security Pack",
+        # Fixed creation date and document ID: identical content renders to identical bytes.
+        invariant=1,
     )
 
     title = ParagraphStyle("title", fontName="Helvetica-Bold", fontSize=16, leading=20, spaceAfter=10)
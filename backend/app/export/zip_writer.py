@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import IO, BinaryIO
+from zipfile import ZIP64_LIMIT, ZIP_DEFLATED, ZipFile, ZipInfo
+
+
+# Every entry gets the same header fields, so identical content always yields identical bytes.
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)  # earliest timestamp the zip format can represent
+FILE_MODE = 0o644
+# zlib's default level; also what ZipFile.open(..., "w") uses for streamed entries.
+COMPRESS_LEVEL = 6
+_UNIX = 3
+
+
+class DeterministicZip:
+    """Write-only zip archive whose bytes depend only on entry names and contents.
+
+    Entry headers use a fixed timestamp, permissions, creator system and compression
+    level, and entries must be added in ascending name order (enforced), so two archives
+    with the same files are byte-for-byte identical and can be compared by hash.
+    """
+
+    def __init__(self, fileobj: BinaryIO):
+        self._zip = ZipFile(fileobj, "w", compression=ZIP_DEFLATED, compresslevel=COMPRESS_LEVEL)
+        self._last_name: str | None = None
+
+    def writestr(self, name: str, data: bytes) -> None:
+        self._zip.writestr(self._entry(name), data, compress_type=ZIP_DEFLATED, compresslevel=COMPRESS_LEVEL)
+
+    def open(self, name: str, *, file_size: int) -> IO[bytes]:
+        """Open an entry for streamed writing; file_size lets large entries use zip64 up front."""
+        info = self._entry(name)
+        info.file_size = file_size
+        return self._zip.open(info, "w", force_zip64=file_size > ZIP64_LIMIT)
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def __enter__(self) -> DeterministicZip:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _entry(self, name: str) -> ZipInfo:
+        if self._last_name is not None and name <= self._last_name:
+            raise ValueError(f"zip entries must be added in sorted order: {name!r} after {self._last_name!r}")
+        self._last_name = name
+        info = ZipInfo(name, date_time=FIXED_DATE_TIME)
+        info.compress_type = ZIP_DEFLATED
+        info.create_system = _UNIX
+        info.external_attr = (0o100000 | FILE_MODE) << 16  # regular file, rw-r--r--
+        return info
@@ -7,6 +7,8 @@ from starlette.requests import Request
 from starlette.responses import Response
 
 from app.api.router import router as api_router
+from app.db.session import get_engine
+from app.services.retention import RetentionPolicy, start_retention_task
 from app.services.pack_signing import ensure_signing_material
 from app.core.settings import get_settings, parse_allowed_hosts, parse_allowed_origins
 
@@ -45,6 +47,20 @@ def create_app() -> FastAPI:
         # Creates signing material on disk if missing (no external calls).
         ensure_signing_material()
 
+    @app.on_event("startup")
+    async def _start_evidence_retention() -> None:
+        # Optional periodic pruning; the CLI (app.scripts.prune_evidence) works either way.
+        if RetentionPolicy.from_settings().enabled and settings.evidence_retention_interval_hours > 0:
+            app.state.retention_stop = start_retention_task(
+                get_engine(), interval_seconds=settings.evidence_retention_interval_hours * 3600
+            )
+
+    @app.on_event("shutdown")
+    async def _stop_evidence_retention() -> None:
+        stop = getattr(app.state, "retention_stop", None)
+        if stop is not None:
+            stop.set()
+
     app.include_router(api_router, prefix="/api")
     return app
 
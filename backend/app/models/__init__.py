@@ -1,4 +1,7 @@
-from app.models.evidence import ControlEvidence, EvidenceRun
+from app.models.collect_job import CollectJob
+from app.models.evidence import ControlEvidence, CurrentControlEvidence, EvidenceRun
+from app.models.evidence_blob import EvidenceBlob
+from app.models.http_cache_entry import HttpCacheEntry
 from app.models.oauth_state import OAuthState
 from app.models.audit_event import AuditEvent
 from app.models.provider_connection import ProviderConnection
@@ -13,4 +16,8 @@ __all__ = [
     "OAuthState",
     "EvidenceRun",
     "ControlEvidence",
+    "CurrentControlEvidence",
+    "EvidenceBlob",
+    "HttpCacheEntry",
+    "CollectJob",
 ]
@@ -5,7 +5,7 @@ from datetime import datetime
 
 from app.core.time import utcnow
 
-from sqlalchemy import DateTime, ForeignKey, JSON, String, Uuid
+from sqlalchemy import DateTime, ForeignKey, Index, JSON, String, Uuid, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -21,12 +21,16 @@ class EvidenceRun(Base):
     started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, nullable=False)
     finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
-    status: Mapped[str] = mapped_column(String(16), nullable=False, default="success")  # success|partial|failed
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="success")  # running|success|partial|failed
     error_summary: Mapped[str | None] = mapped_column(String, nullable=True)
 
 
 class ControlEvidence(Base):
     __tablename__ = "control_evidence"
+    __table_args__ = (
+        # Latest-evidence-per-control lookups (dashboard, control detail, export).
+        Index("ix_control_evidence_user_control_collected", "user_id", "control_key", text("collected_at DESC")),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), ForeignKey("users.id"), index=True, nullable=False)
@@ -38,4 +42,29 @@ class ControlEvidence(Base):
 
     artifacts: Mapped[dict] = mapped_column(JSON().with_variant(JSONB, "postgresql"), nullable=False, default=dict)
     notes: Mapped[str] = mapped_column(String, nullable=False, default="")
+    # On Postgres alembic 0008 partitions the table by month on collected_at and widens the
+    # database primary key to (id, collected_at); ids stay unique, so the ORM identity is id alone.
     collected_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, nullable=False)
+
+
+class CurrentControlEvidence(Base):
+    """Newest evidence row per user and control, maintained on every evidence write.
+
+    A denormalized copy of the matching control_evidence row so dashboard, control
+    detail and export reads are primary-key lookups regardless of history length.
+    """
+
+    __tablename__ = "current_control_evidence"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    control_key: Mapped[str] = mapped_column(String(128), primary_key=True)
+
+    # Source control_evidence row (no FK so history can be pruned independently).
+    evidence_id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), nullable=False)
+    run_id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), nullable=False)
+    provider: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    status: Mapped[str] = mapped_column(String(16), nullable=False)
+
+    artifacts: Mapped[dict] = mapped_column(JSON().with_variant(JSONB, "postgresql"), nullable=False, default=dict)
+    notes: Mapped[str] = mapped_column(String, nullable=False, default="")
+    collected_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from app.core.time import utcnow
+
+from sqlalchemy import DateTime, ForeignKey, Integer, JSON, String, Uuid
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class EvidenceBlob(Base):
+    """Large artifact payloads shared by several evidence rows, addressed by content.
+
+    Artifacts reference a blob as {"$blob": "<sha256>"}; sha256 is taken over the
+    canonical JSON encoding of body. Blobs are scoped per user (never shared across tenants).
+    """
+
+    __tablename__ = "evidence_blobs"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+
+    body: Mapped[dict | list] = mapped_column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, nullable=False)
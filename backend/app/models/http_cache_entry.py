@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from app.core.time import utcnow
+
+from sqlalchemy import DateTime, ForeignKey, JSON, String, UniqueConstraint, Uuid
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class HttpCacheEntry(Base):
+    __tablename__ = "http_cache_entries"
+    __table_args__ = (UniqueConstraint("connection_id", "url_hash", name="uq_http_cache_entries_connection_url"),)
+
+    id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    connection_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid(as_uuid=True), ForeignKey("provider_connections.id"), index=True, nullable=False
+    )
+
+    # sha256(url) keeps the unique index small; the URL itself is kept for debugging.
+    url_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    url: Mapped[str] = mapped_column(String, nullable=False)
+
+    etag: Mapped[str | None] = mapped_column(String(512), nullable=True)
+    last_modified: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    next_url: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Provider response body (API metadata only; never tokens).
+    body: Mapped[dict | list] = mapped_column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, nullable=False)
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+from collections.abc import Iterator
 from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from itertools import islice
 
 import requests
 
+from app.providers.http_cache import ResponseCache, cache_entry_from_headers
+from app.providers.rate_limit import RateGovernor
+
 
 class GitHubApiError(RuntimeError):
     pass
@@ -17,8 +23,61 @@ class RepoSummary:
     private: bool
 
 
+@dataclass(frozen=True)
+class RepoProtection:
+    repo: RepoSummary
+    # REST-shaped protection dict for the default branch; None when unprotected or unreadable.
+    branch_protection: dict | None
+    error: str | None = None
+
+
+_GRAPHQL_URL = "https://api.github.com/graphql"
+
+_REPO_FIELDS = """
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        nameWithOwner
+        visibility
+        isPrivate
+        defaultBranchRef { name }
+        branchProtectionRules(first: 100) {
+          nodes { pattern requiresApprovingReviews requiredApprovingReviewCount allowsForcePushes isAdminEnforced }
+        }
+      }
+"""
+
+_VIEWER_REPOS_QUERY = (
+    """
+query($first: Int!, $after: String) {
+  viewer {
+    repositories(first: $first, after: $after, orderBy: {field: UPDATED_AT, direction: DESC},
+                 affiliations: [OWNER, COLLABORATOR, ORGANIZATION_MEMBER]) {"""
+    + _REPO_FIELDS
+    + """    }
+  }
+}
+"""
+)
+
+_ORG_REPOS_QUERY = (
+    """
+query($org: String!, $first: Int!, $after: String) {
+  organization(login: $org) {
+    repositories(first: $first, after: $after, orderBy: {field: UPDATED_AT, direction: DESC}) {"""
+    + _REPO_FIELDS
+    + """    }
+  }
+}
+"""
+)
+
+
 class GitHubApi:
-    def __init__(self, *, access_token: str):
+    def __init__(self, *, access_token: str, cache: ResponseCache | None = None, governor: RateGovernor | None = None):
+        # Optional conditional-request cache; 304 responses do not count against the rate limit.
+        self._cache = cache
+        # Pass a shared governor to keep all clients of one connection within one budget.
+        self._governor = governor or RateGovernor()
         self._session = requests.Session()
         self._session.headers.update(
             {
@@ -31,35 +90,166 @@ class GitHubApi:
     def get_viewer(self) -> dict:
         return self._get_json("https://api.github.com/user")
 
-    def list_repos(self, *, per_page: int = 100) -> list[RepoSummary]:
-        data = self._get_json(f"https://api.github.com/user/repos?per_page={per_page}&sort=updated")
-        out: list[RepoSummary] = []
-        for r in data:
-            out.append(
-                RepoSummary(
+    def list_repos(self, *, per_page: int = 100, limit: int | None = None, org: str | None = None) -> list[RepoSummary]:
+        # Only fetches as many pages as needed to satisfy limit (None = all repos).
+        return list(islice(self.iter_repos(per_page=per_page, org=org), limit))
+
+    def iter_repos(self, *, per_page: int = 100, org: str | None = None) -> Iterator[RepoSummary]:
+        """Yield repositories lazily, one page at a time, following Link rel="next".
+
+        With org set, enumerates the organization's repositories instead of the
+        repositories visible to the authenticated user.
+        """
+        if org:
+            url: str | None = f"https://api.github.com/orgs/{org}/repos?per_page={per_page}&sort=updated&type=all"
+        else:
+            url = f"https://api.github.com/user/repos?per_page={per_page}&sort=updated"
+        while url:
+            data, url = self._get_page(url)
+            for r in data:
+                yield RepoSummary(
                     full_name=r["full_name"],
                     default_branch=r.get("default_branch") or "main",
                     visibility=r.get("visibility") or ("private" if r.get("private") else "public"),
                     private=bool(r.get("private")),
                 )
-            )
-        return out
+
+    def list_repos_with_protection(self, *, limit: int | None = None, org: str | None = None) -> list[RepoProtection]:
+        return list(islice(self.iter_repos_with_protection(org=org, page_size=min(limit or 100, 100)), limit))
+
+    def iter_repos_with_protection(self, *, org: str | None = None, page_size: int = 100) -> Iterator[RepoProtection]:
+        """Yield repositories with default-branch protection via paginated GraphQL queries.
+
+        Each request covers up to 100 repositories, replacing 1 + N REST calls. Protection
+        is mapped onto the REST response shape so callers can treat both backends alike.
+        Per-repository GraphQL errors (e.g. missing admin rights) are reported in .error.
+        """
+        query = _ORG_REPOS_QUERY if org else _VIEWER_REPOS_QUERY
+        after: str | None = None
+        while True:
+            variables: dict = {"first": page_size, "after": after}
+            if org:
+                variables["org"] = org
+            payload = self._graphql(query, variables)
+            data = payload.get("data") or {}
+            owner = data.get("organization" if org else "viewer")
+            if owner is None:
+                raise GitHubApiError(f"GraphQL query failed: {_graphql_error_text(payload.get('errors'))}")
+            conn = owner["repositories"]
+            node_errors = _graphql_node_errors(payload.get("errors"))
+
+            for idx, node in enumerate(conn.get("nodes") or []):
+                if node is None:
+                    continue
+                private = bool(node.get("isPrivate"))
+                repo = RepoSummary(
+                    full_name=node["nameWithOwner"],
+                    default_branch=(node.get("defaultBranchRef") or {}).get("name") or "main",
+                    visibility=(node.get("visibility") or ("private" if private else "public")).lower(),
+                    private=private,
+                )
+                error = node_errors.get(idx)
+                if error is not None:
+                    yield RepoProtection(repo=repo, branch_protection=None, error=error)
+                    continue
+                rules = ((node.get("branchProtectionRules") or {}).get("nodes")) or []
+                rule = _matching_rule(rules, repo.default_branch)
+                yield RepoProtection(repo=repo, branch_protection=_rest_protection(rule) if rule else None)
+
+            page_info = conn.get("pageInfo") or {}
+            if not page_info.get("hasNextPage"):
+                return
+            after = page_info.get("endCursor")
 
     def get_branch_protection(self, *, full_name: str, branch: str) -> dict | None:
         # Returns None when branch protection is not enabled.
         url = f"https://api.github.com/repos/{full_name}/branches/{branch}/protection"
-        resp = self._session.get(url, timeout=20)
-        if resp.status_code == 404:
-            return None
+        data, _next = self._get_page(url, not_found_ok=True)
+        return data
+
+    def _graphql(self, query: str, variables: dict) -> dict:
+        resp = self._governor.request(
+            lambda: self._session.post(_GRAPHQL_URL, json={"query": query, "variables": variables}, timeout=30)
+        )
         if resp.status_code == 403:
             raise GitHubApiError(f"Forbidden: {resp.text}")
         resp.raise_for_status()
         return resp.json()
 
     def _get_json(self, url: str) -> dict | list:
-        resp = self._session.get(url, timeout=20)
+        data, _next = self._get_page(url)
+        return data
+
+    def _get_page(self, url: str, *, not_found_ok: bool = False) -> tuple[dict | list | None, str | None]:
+        """GET url, returning (json_body, next_page_url).
+
+        Sends If-None-Match/If-Modified-Since when a cached copy exists and reuses the
+        cached body on 304 Not Modified. A 304 with no cached body left to reuse is
+        retried once without validators.
+        """
+        headers = self._cache.conditional_headers(url) if self._cache is not None else {}
+        resp = self._governor.request(lambda: self._session.get(url, headers=headers, timeout=20))
+        if resp.status_code == 304:
+            cached = self._cache.get(url) if self._cache is not None else None
+            if cached is not None:
+                return cached.body, cached.next_url
+            if headers:
+                resp = self._governor.request(lambda: self._session.get(url, headers={}, timeout=20))
+            if resp.status_code == 304:
+                raise GitHubApiError(f"Not Modified without a cached body: {url}")
+        if resp.status_code == 404 and not_found_ok:
+            return None, None
         if resp.status_code == 403:
             raise GitHubApiError(f"Forbidden: {resp.text}")
         resp.raise_for_status()
-        return resp.json()
+        data = resp.json()
+        next_url = resp.links.get("next", {}).get("url")
+        if self._cache is not None:
+            entry = cache_entry_from_headers(resp.headers, body=data, next_url=next_url)
+            if entry is not None:
+                self._cache.put(url, entry)
+        return data, next_url
+
+
+def _graphql_error_text(errors: list | None) -> str:
+    return "; ".join(str(e.get("message")) for e in (errors or []) if isinstance(e, dict)) or "no data"
+
+
+def _graphql_node_errors(errors: list | None) -> dict[int, str]:
+    # Map errors with a path like ["viewer", "repositories", "nodes", 3, ...] to node index 3.
+    out: dict[int, str] = {}
+    for e in errors or []:
+        path = e.get("path") if isinstance(e, dict) else None
+        if not path or "nodes" not in path:
+            continue
+        i = path.index("nodes")
+        if i + 1 < len(path) and isinstance(path[i + 1], int):
+            prefix = "Forbidden: " if e.get("type") == "FORBIDDEN" else ""
+            out.setdefault(path[i + 1], f"{prefix}{e.get('message')}")
+    return out
+
+
+def _matching_rule(rules: list[dict], branch: str) -> dict | None:
+    # Exact patterns take precedence over wildcards, mirroring GitHub's rule resolution.
+    for rule in rules:
+        if rule and rule.get("pattern") == branch:
+            return rule
+    for rule in rules:
+        if rule and fnmatchcase(branch, rule.get("pattern") or ""):
+            return rule
+    return None
+
 
+def _rest_protection(rule: dict) -> dict:
+    protection: dict = {
+        "enforce_admins": {"enabled": bool(rule.get("isAdminEnforced"))},
+        "allow_force_pushes": {"enabled": bool(rule.get("allowsForcePushes"))},
+    }
+    # requiresApprovingReviews is the "Require a pull request before merging" toggle and stays
+    # true with 0 required approvals, which is exactly when REST reports required_pull_request_reviews
+    # (then with required_approving_review_count 0). Key off the toggle, never the count.
+    if rule.get("requiresApprovingReviews"):
+        protection["required_pull_request_reviews"] = {
+            "required_approving_review_count": int(rule.get("requiredApprovingReviewCount") or 0)
+        }
+    return protection
@@ -1,9 +1,30 @@
 from __future__ import annotations
 
+import base64
+from collections.abc import Iterator
 from dataclasses import dataclass
+from typing import Any
 
 import requests
 
+from app.providers.http_cache import ResponseCache, cache_entry_from_headers
+from app.providers.rate_limit import RETRYABLE_STATUSES, RateGovernor
+
+
+GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
+# Graph JSON batching accepts at most 20 sub-requests per $batch call.
+MAX_BATCH_REQUESTS = 20
+
+_ORG_PATH = "/organization?$select=id,displayName"
+_SECURITY_DEFAULTS_PATH = "/policies/identitySecurityDefaultsEnforcementPolicy"
+_CONDITIONAL_ACCESS_PATH = "/identity/conditionalAccess/policies"
+_DIRECTORY_ROLES_PATH = "/directoryRoles"
+# First page used when counting by paging (ids only).
+_ID_PAGE_QUERY = "?$top=100&$select=id"
+# Statuses meaning "this collection does not support /$count"; fall back to paging.
+_COUNT_UNSUPPORTED = (400, 404, 405, 501)
+_COUNT_HEADERS = {"ConsistencyLevel": "eventual"}
+
 
 class GraphApiError(RuntimeError):
     def __init__(self, message: str, *, status_code: int | None = None):
@@ -17,34 +38,238 @@ class GraphOrgInfo:
     display_name: str | None
 
 
+@dataclass(frozen=True)
+class GraphBatchRequest:
+    id: str
+    path: str  # relative to GRAPH_BASE_URL, e.g. "/organization?$select=id"
+    headers: dict[str, str] | None = None
+
+
+@dataclass(frozen=True)
+class GraphControlSet:
+    """Results for the Microsoft control set; each field holds a value or the GraphApiError for it."""
+
+    org: GraphOrgInfo | GraphApiError
+    security_defaults: dict | GraphApiError
+    conditional_access_policy_count: int | GraphApiError
+    directory_roles_count: int | GraphApiError
+
+
 class GraphApi:
-    def __init__(self, *, access_token: str):
+    def __init__(self, *, access_token: str, cache: ResponseCache | None = None, governor: RateGovernor | None = None):
+        self._cache = cache
+        self._governor = governor or RateGovernor()
         self._session = requests.Session()
         self._session.headers.update({"Authorization": f"Bearer {access_token}"})
 
     def get_org(self) -> GraphOrgInfo:
-        data = self._get_json("https://graph.microsoft.com/v1.0/organization?$select=id,displayName")
-        items = data.get("value") or []
-        first = items[0] if items else {}
-        return GraphOrgInfo(tenant_id=first.get("id"), display_name=first.get("displayName"))
+        return _parse_org(self._get_json(GRAPH_BASE_URL + _ORG_PATH))
 
     def get_security_defaults(self) -> dict:
-        return self._get_json("https://graph.microsoft.com/v1.0/policies/identitySecurityDefaultsEnforcementPolicy")
+        return self._get_json(GRAPH_BASE_URL + _SECURITY_DEFAULTS_PATH)
 
     def count_conditional_access_policies(self) -> int:
-        data = self._get_json("https://graph.microsoft.com/v1.0/identity/conditionalAccess/policies?$top=100&$select=id")
-        items = data.get("value") or []
-        return len(items)
+        return self.count(_CONDITIONAL_ACCESS_PATH)
 
     def count_directory_roles(self) -> int:
-        data = self._get_json("https://graph.microsoft.com/v1.0/directoryRoles?$top=100&$select=id")
-        items = data.get("value") or []
-        return len(items)
+        return self.count(_DIRECTORY_ROLES_PATH)
+
+    def iter_items(self, path: str) -> Iterator[dict]:
+        """Yield every item of a collection, following @odata.nextLink page by page."""
+        url: str | None = GRAPH_BASE_URL + path
+        while url:
+            data = self._get_json(url)
+            yield from data.get("value") or []
+            url = data.get("@odata.nextLink")
+
+    def count(self, path: str) -> int:
+        """Count a collection server-side via /$count, falling back to paging ids.
+
+        The fast path transfers only the number; collections that do not support
+        $count are counted across all pages instead of stopping at the first.
+        """
+        try:
+            return self._get_count(f"{GRAPH_BASE_URL}{path}/$count")
+        except GraphApiError as e:
+            if e.status_code not in _COUNT_UNSUPPORTED:
+                raise
+        return self._count_by_paging(path)
+
+    def _count_by_paging(self, path: str) -> int:
+        return sum(1 for _ in self.iter_items(path + _ID_PAGE_QUERY))
+
+    def get_control_set(self) -> GraphControlSet:
+        """Fetch everything the Microsoft controls need in a single $batch round-trip."""
+        results = self.batch(
+            [
+                GraphBatchRequest(id="org", path=_ORG_PATH),
+                GraphBatchRequest(id="security_defaults", path=_SECURITY_DEFAULTS_PATH),
+                GraphBatchRequest(id="conditional_access", path=f"{_CONDITIONAL_ACCESS_PATH}/$count", headers=_COUNT_HEADERS),
+                GraphBatchRequest(id="directory_roles", path=f"{_DIRECTORY_ROLES_PATH}/$count", headers=_COUNT_HEADERS),
+            ]
+        )
+        return GraphControlSet(
+            org=_map_ok(results["org"], _parse_org),
+            security_defaults=results["security_defaults"],
+            conditional_access_policy_count=self._batched_count(results["conditional_access"], _CONDITIONAL_ACCESS_PATH),
+            directory_roles_count=self._batched_count(results["directory_roles"], _DIRECTORY_ROLES_PATH),
+        )
+
+    def _batched_count(self, result: Any, path: str) -> int | GraphApiError:
+        if isinstance(result, GraphApiError):
+            if result.status_code not in _COUNT_UNSUPPORTED:
+                return result
+            try:
+                return self._count_by_paging(path)
+            except GraphApiError as e:
+                return e
+        try:
+            return _parse_count(result)
+        except ValueError:
+            return GraphApiError("Unexpected $count response from Graph")
+
+    def batch(self, requests_: list[GraphBatchRequest]) -> dict[str, Any]:
+        """Run GET sub-requests through JSON batching (chunks of MAX_BATCH_REQUESTS).
+
+        Returns {request_id: body} where a failed sub-request maps to a GraphApiError
+        instead of raising, so one denied permission does not sink the whole batch.
+        """
+        out: dict[str, Any] = {}
+        for i in range(0, len(requests_), MAX_BATCH_REQUESTS):
+            pending = requests_[i : i + MAX_BATCH_REQUESTS]
+            attempt = 0
+            while pending:
+                responses = self._post_batch(pending)
+                # Sub-requests are throttled individually; resend only the throttled ones.
+                throttled = [r for r in pending if _sub_status(responses.get(r.id)) in RETRYABLE_STATUSES]
+                if attempt >= self._governor.max_retries:
+                    throttled = []
+                for r in pending:
+                    if r not in throttled:
+                        out[r.id] = self._batch_result(r, responses.get(r.id))
+                if throttled:
+                    hints = [_sub_retry_after(responses.get(r.id)) for r in throttled]
+                    retry_after = max((h for h in hints if h is not None), default=None)
+                    self._governor.block_for(self._governor.retry_delay(attempt, retry_after))
+                pending = throttled
+                attempt += 1
+        return out
+
+    def _post_batch(self, chunk: list[GraphBatchRequest]) -> dict[str, dict]:
+        payload = {"requests": [self._batch_sub_request(r) for r in chunk]}
+        resp = self._governor.request(lambda: self._session.post(f"{GRAPH_BASE_URL}/$batch", json=payload, timeout=25))
+        if resp.status_code in (401, 403):
+            raise GraphApiError("Forbidden", status_code=resp.status_code)
+        if resp.status_code >= 400:
+            # The whole batch failed (e.g. 5xx after retries): report it like any Graph error.
+            raise GraphApiError(f"$batch failed with HTTP {resp.status_code}", status_code=resp.status_code)
+        return {str(r.get("id")): r for r in (resp.json().get("responses") or [])}
+
+    def _batch_sub_request(self, r: GraphBatchRequest) -> dict:
+        headers = dict(r.headers or {})
+        if self._cache is not None:
+            headers.update(self._cache.conditional_headers(GRAPH_BASE_URL + r.path))
+        sub: dict = {"id": r.id, "method": "GET", "url": r.path}
+        if headers:
+            sub["headers"] = headers
+        return sub
+
+    def _batch_result(self, r: GraphBatchRequest, sub: dict | None) -> Any:
+        if sub is None:
+            return GraphApiError("Missing response in Graph batch")
+        status = int(sub.get("status") or 0)
+        body = sub.get("body")
+        url = GRAPH_BASE_URL + r.path
+        if status == 304 and self._cache is not None:
+            cached = self._cache.get(url)
+            if cached is not None:
+                return cached.body
+        if status in (401, 403):
+            return GraphApiError("Forbidden", status_code=status)
+        if not 200 <= status < 300:
+            return GraphApiError(_error_message(body, status), status_code=status)
+        if self._cache is not None:
+            entry = cache_entry_from_headers(sub.get("headers") or {}, body=body)
+            if entry is not None:
+                self._cache.put(url, entry)
+        return body
+
+    def _get_count(self, url: str) -> int:
+        resp = self._governor.request(
+            lambda: self._session.get(url, headers={**_COUNT_HEADERS, "Accept": "text/plain"}, timeout=25)
+        )
+        if resp.status_code in (401, 403):
+            raise GraphApiError("Forbidden", status_code=resp.status_code)
+        if resp.status_code >= 400:
+            raise GraphApiError(f"Graph $count failed ({resp.status_code})", status_code=resp.status_code)
+        try:
+            return _parse_count(resp.text)
+        except ValueError as e:
+            raise GraphApiError("Unexpected $count response from Graph") from e
 
     def _get_json(self, url: str) -> dict:
-        resp = self._session.get(url, timeout=25)
+        headers = self._cache.conditional_headers(url) if self._cache is not None else {}
+        resp = self._governor.request(lambda: self._session.get(url, headers=headers, timeout=25))
+        if resp.status_code == 304:
+            cached = self._cache.get(url) if self._cache is not None else None
+            if cached is not None:
+                return cached.body
+            # The entry behind our validators is gone; fetch the full body once.
+            if headers:
+                resp = self._governor.request(lambda: self._session.get(url, headers={}, timeout=25))
+            if resp.status_code == 304:
+                raise GraphApiError("Not Modified without a cached body", status_code=304)
         if resp.status_code in (401, 403):
             raise GraphApiError("Forbidden", status_code=resp.status_code)
         resp.raise_for_status()
-        return resp.json()
+        data = resp.json()
+        if self._cache is not None:
+            entry = cache_entry_from_headers(resp.headers, body=data)
+            if entry is not None:
+                self._cache.put(url, entry)
+        return data
+
+
+def _parse_org(data: dict) -> GraphOrgInfo:
+    items = data.get("value") or []
+    first = items[0] if items else {}
+    return GraphOrgInfo(tenant_id=first.get("id"), display_name=first.get("displayName"))
+
+
+def _parse_count(body: Any) -> int:
+    # /$count returns text/plain; inside $batch the body may come back raw or base64-encoded.
+    if isinstance(body, bool):
+        raise ValueError("invalid count")
+    if isinstance(body, int):
+        return body
+    if isinstance(body, str):
+        text = body.strip().lstrip("\ufeff")
+        if text.isdigit():
+            return int(text)
+        decoded = base64.b64decode(text, validate=True).decode("utf-8").strip().lstrip("\ufeff")
+        if decoded.isdigit():
+            return int(decoded)
+    raise ValueError("invalid count")
+
+
+def _sub_status(sub: dict | None) -> int:
+    return int((sub or {}).get("status") or 0)
+
+
+def _sub_retry_after(sub: dict | None) -> float | None:
+    headers = {k.lower(): v for k, v in ((sub or {}).get("headers") or {}).items()}
+    try:
+        return float(headers["retry-after"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _map_ok(value: Any, fn):
+    return value if isinstance(value, GraphApiError) else fn(value)
+
 
+def _error_message(body: Any, status: int) -> str:
+    err = body.get("error") if isinstance(body, dict) else None
+    if isinstance(err, dict) and err.get("message"):
+        return f"Graph request failed ({status}): {err.get('code') or 'error'}: {err['message']}"
+    return f"Graph request failed ({status})"
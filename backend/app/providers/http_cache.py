@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    etag: str | None
+    last_modified: str | None
+    body: Any
+    # Pagination hint captured from the original response (GitHub Link rel="next").
+    next_url: str | None = None
+
+
+class ResponseCache:
+    """In-memory, thread-safe view of cached GET responses for one provider connection.
+
+    Keyed by absolute URL. Loaded from / persisted to the database by app.repos.http_cache;
+    provider clients only see this object so they stay free of DB concerns.
+
+    Persisted entries can be held as validators only (URL -> ETag/Last-Modified) with a
+    load_body callback: bodies are then read one URL at a time when a 304 comes back,
+    so memory does not grow with the number of cached pages.
+    """
+
+    def __init__(
+        self,
+        entries: dict[str, CachedResponse] | None = None,
+        *,
+        validators: dict[str, tuple[str | None, str | None]] | None = None,
+        load_body: Callable[[str], CachedResponse | None] | None = None,
+    ):
+        self._entries: dict[str, CachedResponse] = dict(entries or {})
+        self._validators: dict[str, tuple[str | None, str | None]] = dict(validators or {})
+        self._load_body = load_body
+        self._dirty: set[str] = set()
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(url)
+            lazy = entry is None and url in self._validators and self._load_body is not None
+        if not lazy:
+            return entry
+        # Not kept in memory: the caller uses the body once per collection.
+        return self._load_body(url)
+
+    def put(self, url: str, entry: CachedResponse) -> None:
+        with self._lock:
+            if self._entries.get(url) == entry:
+                return
+            self._validators.pop(url, None)
+            self._entries[url] = entry
+            self._dirty.add(url)
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                etag, last_modified = entry.etag, entry.last_modified
+            elif url in self._validators:
+                etag, last_modified = self._validators[url]
+            else:
+                return {}
+        headers: dict[str, str] = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def dirty_entries(self) -> dict[str, CachedResponse]:
+        with self._lock:
+            return {u: self._entries[u] for u in self._dirty}
+
+    def mark_clean(self) -> None:
+        with self._lock:
+            self._dirty.clear()
+
+
+def cache_entry_from_headers(headers: Mapping[str, str], *, body: Any, next_url: str | None = None) -> CachedResponse | None:
+    # Only responses carrying a validator can be revalidated later.
+    lowered = {k.lower(): v for k, v in headers.items()}
+    etag = lowered.get("etag")
+    last_modified = lowered.get("last-modified")
+    if not etag and not last_modified:
+        return None
+    return CachedResponse(etag=etag, last_modified=last_modified, body=body, next_url=next_url)
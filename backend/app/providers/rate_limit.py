@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections.abc import Callable
+
+import requests
+
+
+# Transient statuses worth retrying (GitHub secondary limits and Graph throttling use 429/403 + Retry-After).
+RETRYABLE_STATUSES = (429, 502, 503, 504)
+
+
+class RateGovernor:
+    """Token bucket plus adaptive backoff shared by provider API clients.
+
+    One governor is meant to be shared by every client (and thread) working on behalf of
+    the same provider connection, so concurrent collection stays within one budget:
+
+    - requests are paced by a token bucket (rate_per_second, burst);
+    - GitHub X-RateLimit-Remaining/X-RateLimit-Reset pause the bucket until reset when
+      the budget is exhausted;
+    - 429/502/503/504 (and rate-limited 403s) are retried with Retry-After or
+      exponential backoff with full jitter.
+
+    Waits are capped at max_wait_seconds so a long reset window degrades into an error
+    for that call rather than a hung collection.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate_per_second: float = 10.0,
+        burst: int = 20,
+        max_retries: int = 3,
+        max_wait_seconds: float = 60.0,
+        base_backoff_seconds: float = 0.5,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate_per_second = rate_per_second
+        self.burst = max(1, burst)
+        self.max_retries = max(0, max_retries)
+        self.max_wait_seconds = max_wait_seconds
+        self.base_backoff_seconds = base_backoff_seconds
+        self._sleep = sleep
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._blocked_until = 0.0
+
+    def request(self, send: Callable[[], requests.Response]) -> requests.Response:
+        attempt = 0
+        while True:
+            self.acquire()
+            resp = send()
+            self.observe(resp)
+            if attempt >= self.max_retries or not _is_retryable(resp):
+                return resp
+            # Back off the whole budget, not just this call, so sibling threads slow down too.
+            self.block_for(self.retry_delay(attempt, resp.headers.get("Retry-After")))
+            attempt += 1
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = self._clock()
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                else:
+                    if self.rate_per_second > 0:
+                        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_second)
+                    else:
+                        self._tokens = float(self.burst)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate_per_second
+            self._sleep(min(wait, self.max_wait_seconds))
+
+    def observe(self, resp: requests.Response) -> None:
+        remaining = resp.headers.get("X-RateLimit-Remaining")
+        reset = resp.headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining_n = int(remaining)
+            reset_in = float(reset) - time.time()
+        except ValueError:
+            return
+        if remaining_n <= 0 and reset_in > 0:
+            self.block_for(reset_in)
+
+    def block_for(self, seconds: float) -> None:
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self._clock() + min(seconds, self.max_wait_seconds))
+
+    def retry_delay(self, attempt: int, retry_after: str | float | None) -> float:
+        if retry_after is not None and retry_after != "":
+            try:
+                return min(max(0.0, float(retry_after)), self.max_wait_seconds)
+            except ValueError:
+                pass
+        ceiling = min(self.max_wait_seconds, self.base_backoff_seconds * (2**attempt))
+        return random.uniform(0, ceiling)
+
+
+def _is_retryable(resp: requests.Response) -> bool:
+    if resp.status_code in RETRYABLE_STATUSES:
+        return True
+    # GitHub reports exhausted primary and secondary rate limits as 403.
+    if resp.status_code == 403:
+        return resp.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in resp.headers
+    return False
+
+
+_governors: dict[str, RateGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def governor_for(key: str, **kwargs) -> RateGovernor:
+    """Return the process-wide governor for a budget key (e.g. "github:<connection id>")."""
+    with _governors_lock:
+        gov = _governors.get(key)
+        if gov is None:
+            gov = RateGovernor(**kwargs)
+            _governors[key] = gov
+        return gov
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from app.core.time import utcnow
+
+from sqlalchemy import delete, desc, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.collect_job import CollectJob
+from app.models.evidence import EvidenceRun
+
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def create_job_with_run(db: Session, *, user_id: uuid.UUID, progress: dict) -> CollectJob | None:
+    """Insert a running evidence run and its queued job in one transaction.
+
+    Returns None when the user already has an active job (the partial unique index
+    uq_collect_jobs_user_active rejected the insert); nothing is written in that case.
+    """
+
+    now = utcnow()
+    run = EvidenceRun(id=uuid.uuid4(), user_id=user_id, started_at=now, status="running")
+    job = CollectJob(
+        user_id=user_id, run_id=run.id, status="queued", progress=dict(progress), created_at=now, updated_at=now
+    )
+    db.add(run)
+    db.flush()
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
+    db.refresh(job)
+    return job
+
+
+def fail_stale_jobs(
+    db: Session, *, user_id: uuid.UUID, cutoff: datetime, exclude: set[uuid.UUID] | frozenset = frozenset()
+) -> int:
+    """Fail the user's active jobs (and their runs) whose heartbeat is older than cutoff.
+
+    Jobs live on an in-process worker pool whose owner touches updated_at while it holds
+    them, so a row that stopped beating belongs to a process that went away; leaving it
+    would block the user. Jobs in exclude (held by this process) are never failed.
+    """
+
+    stmt = select(CollectJob.id, CollectJob.run_id).where(
+        CollectJob.user_id == user_id,
+        CollectJob.status.in_(ACTIVE_STATUSES),
+        CollectJob.updated_at < cutoff,
+    )
+    if exclude:
+        stmt = stmt.where(CollectJob.id.not_in(list(exclude)))
+    stale = db.execute(stmt).all()
+    if not stale:
+        return 0
+    now = utcnow()
+    error = "collect: job interrupted"
+    db.execute(
+        update(CollectJob)
+        .where(CollectJob.id.in_([job_id for job_id, _ in stale]))
+        .values(status="failed", error_summary=error, finished_at=now, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(EvidenceRun)
+        .where(EvidenceRun.id.in_([run_id for _, run_id in stale]), EvidenceRun.status == "running")
+        .values(status="failed", error_summary=error, finished_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return len(stale)
+
+
+def get_job_for_user(db: Session, *, user_id: uuid.UUID, job_id: uuid.UUID) -> CollectJob | None:
+    stmt = select(CollectJob).where(CollectJob.id == job_id, CollectJob.user_id == user_id)
+    return db.execute(stmt).scalars().first()
+
+
+def active_job_for_user(db: Session, *, user_id: uuid.UUID) -> CollectJob | None:
+    stmt = (
+        select(CollectJob)
+        .where(CollectJob.user_id == user_id, CollectJob.status.in_(ACTIVE_STATUSES))
+        .order_by(desc(CollectJob.created_at))
+        .limit(1)
+    )
+    return db.execute(stmt).scalars().first()
+
+
+def mark_job_running(db: Session, *, job_id: uuid.UUID) -> bool:
+    # Only a still-queued job starts; one failed as stale in the meantime stays failed.
+    job = db.get(CollectJob, job_id)
+    if job is None or job.status != "queued":
+        return False
+    job.status = "running"
+    job.started_at = job.updated_at = utcnow()
+    db.add(job)
+    db.commit()
+    return True
+
+
+def touch_jobs(db: Session, *, job_ids: list[uuid.UUID]) -> None:
+    """Heartbeat: mark the given active jobs as still owned by a live process."""
+
+    if not job_ids:
+        return
+    db.execute(
+        update(CollectJob)
+        .where(CollectJob.id.in_(job_ids), CollectJob.status.in_(ACTIVE_STATUSES))
+        .values(updated_at=utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def set_job_progress(db: Session, *, job_id: uuid.UUID, progress: dict) -> None:
+    job = db.get(CollectJob, job_id)
+    if job is None:
+        return
+    # Assign a new dict so the JSON column is flagged dirty.
+    job.progress = dict(progress)
+    job.updated_at = utcnow()
+    db.add(job)
+    db.commit()
+
+
+def finish_job(db: Session, *, job_id: uuid.UUID, status: str, error_summary: str | None) -> None:
+    job = db.get(CollectJob, job_id)
+    if job is None:
+        return
+    job.status = status
+    job.error_summary = error_summary
+    job.finished_at = job.updated_at = utcnow()
+    db.add(job)
+    db.commit()
+
+
+def delete_all_for_user(db: Session, *, user_id: uuid.UUID) -> None:
+    db.execute(delete(CollectJob).where(CollectJob.user_id == user_id))
+    db.commit()
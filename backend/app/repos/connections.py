@@ -8,6 +8,7 @@ from app.core.time import utcnow
 from sqlalchemy import delete, select, update
 from sqlalchemy.orm import Session
 
+from app.models.http_cache_entry import HttpCacheEntry
 from app.models.provider_connection import ProviderConnection
 
 
@@ -24,6 +25,21 @@ def list_connections(db: Session, *, user_id: uuid.UUID) -> list[ProviderConnect
     return list(db.execute(stmt).scalars().all())
 
 
+def iter_connection_batches(db: Session, *, batch_size: int = 100):
+    """Yield every provider connection in id order, batch_size rows per query (keyset pagination)."""
+
+    last_id: uuid.UUID | None = None
+    while True:
+        stmt = select(ProviderConnection).order_by(ProviderConnection.id).limit(batch_size)
+        if last_id is not None:
+            stmt = stmt.where(ProviderConnection.id > last_id)
+        rows = list(db.execute(stmt).scalars().all())
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
 def upsert_connection(
     db: Session,
     *,
@@ -76,6 +92,13 @@ def upsert_connection(
 
 
 def delete_connection(db: Session, *, user_id: uuid.UUID, provider: str) -> None:
+    # Cached provider responses belong to the connection; remove them first (FK).
+    conn_ids = select(ProviderConnection.id).where(
+        ProviderConnection.user_id == user_id,
+        ProviderConnection.provider == provider,
+    )
+    db.execute(delete(HttpCacheEntry).where(HttpCacheEntry.connection_id.in_(conn_ids)))
+
     stmt = delete(ProviderConnection).where(
         ProviderConnection.user_id == user_id,
         ProviderConnection.provider == provider,
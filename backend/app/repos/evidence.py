@@ -2,17 +2,25 @@ from __future__ import annotations
 
 import uuid
 from datetime import datetime
+from typing import Any
 
 from app.core.time import utcnow
 
-from sqlalchemy import delete, desc, select
+from sqlalchemy import delete, desc, func, insert, select
 from sqlalchemy.orm import Session
 
-from app.models.evidence import ControlEvidence, EvidenceRun
+from app.models.evidence import ControlEvidence, CurrentControlEvidence, EvidenceRun
+from app.models.evidence_blob import EvidenceBlob
+from app.models.collect_job import CollectJob
+from app.repos.evidence_blobs import blob_ref, blob_shas, delete_unreferenced_blobs, encode_blob, insert_blobs
+from app.repos.evidence_partitions import ensure_evidence_partitions
 
 
-def create_run(db: Session, *, user_id: uuid.UUID) -> EvidenceRun:
-    run = EvidenceRun(user_id=user_id, started_at=utcnow(), status="success")
+_CURRENT_COLUMNS = ("evidence_id", "run_id", "provider", "status", "artifacts", "notes", "collected_at")
+
+
+def create_run(db: Session, *, user_id: uuid.UUID, status: str = "success") -> EvidenceRun:
+    run = EvidenceRun(user_id=user_id, started_at=utcnow(), status=status)
     db.add(run)
     db.commit()
     db.refresh(run)
@@ -24,10 +32,20 @@ def latest_run(db: Session, *, user_id: uuid.UUID) -> EvidenceRun | None:
     return db.execute(stmt).scalars().first()
 
 
-def finish_run(db: Session, *, run_id: uuid.UUID, status: str, error_summary: str | None) -> None:
+def finish_run(
+    db: Session,
+    *,
+    run_id: uuid.UUID,
+    status: str,
+    error_summary: str | None,
+    evidence: EvidenceBatch | None = None,
+) -> None:
+    # Buffered evidence and the final status commit together, so a run is all-or-nothing.
     run = db.get(EvidenceRun, run_id)
     if run is None:
         return
+    if evidence is not None:
+        _insert_batch(db, evidence)
     run.finished_at = utcnow()
     run.status = status
     run.error_summary = error_summary
@@ -48,6 +66,7 @@ def add_control_evidence(
     collected_at: datetime | None = None,
 ) -> ControlEvidence:
     row = ControlEvidence(
+        id=uuid.uuid4(),
         user_id=user_id,
         run_id=run_id,
         control_key=control_key,
@@ -57,12 +76,160 @@ def add_control_evidence(
         notes=notes,
         collected_at=collected_at or utcnow(),
     )
+    ensure_evidence_partitions(db.get_bind(), [row.collected_at])
     db.add(row)
+    _upsert_current_rows(
+        db,
+        [
+            {
+                "id": row.id,
+                "user_id": user_id,
+                "run_id": run_id,
+                "control_key": control_key,
+                "provider": provider,
+                "status": status,
+                "artifacts": artifacts,
+                "notes": notes,
+                "collected_at": row.collected_at,
+            }
+        ],
+    )
     db.commit()
     db.refresh(row)
     return row
 
 
+class EvidenceBatch:
+    """Control evidence rows for one run, buffered in memory and inserted together.
+
+    Collectors add rows here instead of committing one row at a time; the batch is
+    written with a single multi-row INSERT by add_control_evidence_many or finish_run.
+    Payloads shared by several rows go through add_blob and are stored once.
+    """
+
+    def __init__(self, *, user_id: uuid.UUID, run_id: uuid.UUID):
+        self.user_id = user_id
+        self.run_id = run_id
+        self.rows: list[dict] = []
+        self.blobs: dict[str, Any] = {}
+
+    def add(
+        self,
+        *,
+        control_key: str,
+        provider: str | None,
+        status: str,
+        artifacts: dict,
+        notes: str,
+        collected_at: datetime | None = None,
+    ) -> dict:
+        row = {
+            "id": uuid.uuid4(),
+            "user_id": self.user_id,
+            "run_id": self.run_id,
+            "control_key": control_key,
+            "provider": provider,
+            "status": status,
+            "artifacts": artifacts,
+            "notes": notes,
+            "collected_at": collected_at or utcnow(),
+        }
+        self.rows.append(row)
+        return row
+
+    def add_blob(self, value: Any) -> dict:
+        """Buffer a shared payload and return the {"$blob": sha256} reference to store instead."""
+
+        sha, _ = encode_blob(value)
+        self.blobs[sha] = value
+        return blob_ref(sha)
+
+    def empty_copy(self) -> EvidenceBatch:
+        return EvidenceBatch(user_id=self.user_id, run_id=self.run_id)
+
+    def extend(self, other: EvidenceBatch) -> None:
+        self.rows.extend(other.rows)
+        self.blobs.update(other.blobs)
+
+    def control_keys(self) -> set[str]:
+        return {r["control_key"] for r in self.rows}
+
+
+def add_control_evidence_many(db: Session, *, batch: EvidenceBatch) -> None:
+    _insert_batch(db, batch)
+    db.commit()
+
+
+def _insert_batch(db: Session, batch: EvidenceBatch) -> None:
+    insert_blobs(db, user_id=batch.user_id, blobs=batch.blobs)
+    _insert_evidence_rows(db, batch.rows)
+
+
+def _insert_evidence_rows(db: Session, rows: list[dict]) -> None:
+    if rows:
+        ensure_evidence_partitions(db.get_bind(), [r["collected_at"] for r in rows])
+        # executemany with a list of dicts becomes batched multi-row INSERT ... VALUES statements.
+        db.execute(insert(ControlEvidence), rows)
+        _upsert_current_rows(db, rows)
+
+
+def _upsert_current_rows(db: Session, rows: list[dict]) -> None:
+    # Keep current_control_evidence pointing at the newest row per (user, control).
+    newest: dict[tuple, dict] = {}
+    for r in rows:
+        key = (r["user_id"], r["control_key"])
+        if key not in newest or r["collected_at"] >= newest[key]["collected_at"]:
+            newest[key] = r
+    if not newest:
+        return
+
+    values = [
+        {
+            "user_id": r["user_id"],
+            "control_key": r["control_key"],
+            "evidence_id": r["id"],
+            "run_id": r["run_id"],
+            "provider": r["provider"],
+            "status": r["status"],
+            "artifacts": r["artifacts"],
+            "notes": r["notes"],
+            "collected_at": r["collected_at"],
+        }
+        for r in newest.values()
+    ]
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        for v in values:
+            db.merge(CurrentControlEvidence(**v))
+        return
+
+    stmt = dialect_insert(CurrentControlEvidence).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CurrentControlEvidence.user_id, CurrentControlEvidence.control_key],
+        set_={c: stmt.excluded[c] for c in _CURRENT_COLUMNS},
+        # Never let an older write (e.g. a slow run finishing late) replace newer evidence.
+        where=CurrentControlEvidence.collected_at <= stmt.excluded.collected_at,
+    )
+    db.execute(stmt)
+
+
+def current_evidence_all_controls(db: Session, *, user_id: uuid.UUID) -> list[CurrentControlEvidence]:
+    stmt = (
+        select(CurrentControlEvidence)
+        .where(CurrentControlEvidence.user_id == user_id)
+        .order_by(desc(CurrentControlEvidence.collected_at))
+    )
+    return list(db.execute(stmt).scalars().all())
+
+
+def current_evidence_for_control(db: Session, *, user_id: uuid.UUID, control_key: str) -> CurrentControlEvidence | None:
+    return db.get(CurrentControlEvidence, (user_id, control_key))
+
+
 def latest_evidence_for_control(db: Session, *, user_id: uuid.UUID, control_key: str) -> ControlEvidence | None:
     stmt = (
         select(ControlEvidence)
@@ -74,25 +241,137 @@ def latest_evidence_for_control(db: Session, *, user_id: uuid.UUID, control_key:
 
 
 def latest_evidence_all_controls(db: Session, *, user_id: uuid.UUID) -> list[ControlEvidence]:
-    # MVP-friendly: fetch all rows and reduce in Python (12 controls max).
-    stmt = select(ControlEvidence).where(ControlEvidence.user_id == user_id).order_by(desc(ControlEvidence.collected_at))
-    rows = list(db.execute(stmt).scalars().all())
-    seen: set[str] = set()
-    out: list[ControlEvidence] = []
-    for r in rows:
-        if r.control_key in seen:
-            continue
-        seen.add(r.control_key)
-        out.append(r)
-    return out
+    # One row per control, newest first; served by ix_control_evidence_user_control_collected.
+    if db.get_bind().dialect.name == "postgresql":
+        latest = (
+            select(ControlEvidence.id)
+            .where(ControlEvidence.user_id == user_id)
+            .distinct(ControlEvidence.control_key)
+            .order_by(ControlEvidence.control_key, desc(ControlEvidence.collected_at), ControlEvidence.id)
+        )
+    else:
+        # Portable fallback (SQLite >= 3.25): rank rows per control with a window function.
+        ranked = (
+            select(
+                ControlEvidence.id,
+                func.row_number()
+                .over(
+                    partition_by=ControlEvidence.control_key,
+                    order_by=(desc(ControlEvidence.collected_at), ControlEvidence.id),
+                )
+                .label("rn"),
+            )
+            .where(ControlEvidence.user_id == user_id)
+            .subquery()
+        )
+        latest = select(ranked.c.id).where(ranked.c.rn == 1)
+    stmt = select(ControlEvidence).where(ControlEvidence.id.in_(latest)).order_by(desc(ControlEvidence.collected_at))
+    return list(db.execute(stmt).scalars().all())
+
+
+def rebuild_current_evidence(db: Session, *, user_id: uuid.UUID) -> int:
+    """Recompute the user's current_control_evidence rows from history in one transaction.
+
+    The read model is normally maintained on write; this repairs it after history was
+    changed outside that path (a restored backup, manual deletes). Returns rows written.
+    """
+
+    latest = latest_evidence_all_controls(db, user_id=user_id)
+    db.execute(delete(CurrentControlEvidence).where(CurrentControlEvidence.user_id == user_id))
+    db.add_all(
+        CurrentControlEvidence(
+            user_id=r.user_id,
+            control_key=r.control_key,
+            evidence_id=r.id,
+            run_id=r.run_id,
+            provider=r.provider,
+            status=r.status,
+            artifacts=r.artifacts,
+            notes=r.notes,
+            collected_at=r.collected_at,
+        )
+        for r in latest
+    )
+    db.commit()
+    return len(latest)
 
 
 def delete_all_user_data(db: Session, *, user_id: uuid.UUID) -> None:
+    db.execute(delete(CurrentControlEvidence).where(CurrentControlEvidence.user_id == user_id))
     db.execute(delete(ControlEvidence).where(ControlEvidence.user_id == user_id))
+    db.execute(delete(EvidenceBlob).where(EvidenceBlob.user_id == user_id))
     db.execute(delete(EvidenceRun).where(EvidenceRun.user_id == user_id))
     db.commit()
 
 
 def delete_user_evidence_for_provider(db: Session, *, user_id: uuid.UUID, provider: str) -> None:
+    # Blobs only this provider's evidence referenced (e.g. GitHub per_repo tables) go with it.
+    shas: set[str] = set()
+    for model in (ControlEvidence, CurrentControlEvidence):
+        stmt = select(model.artifacts).where(model.user_id == user_id, model.provider == provider)
+        for artifacts in db.execute(stmt.execution_options(yield_per=1000)).scalars():
+            shas |= blob_shas(artifacts)
+    db.execute(
+        delete(CurrentControlEvidence).where(
+            CurrentControlEvidence.user_id == user_id, CurrentControlEvidence.provider == provider
+        )
+    )
     db.execute(delete(ControlEvidence).where(ControlEvidence.user_id == user_id, ControlEvidence.provider == provider))
+    delete_unreferenced_blobs(db, user_id=user_id, shas=shas, commit=False)
     db.commit()
+
+
+def list_runs(db: Session, *, user_id: uuid.UUID) -> list[EvidenceRun]:
+    stmt = select(EvidenceRun).where(EvidenceRun.user_id == user_id).order_by(desc(EvidenceRun.started_at))
+    return list(db.execute(stmt).scalars().all())
+
+
+def users_with_runs(db: Session) -> list[uuid.UUID]:
+    return list(db.execute(select(EvidenceRun.user_id).distinct()).scalars().all())
+
+
+def current_run_ids(db: Session, *, user_id: uuid.UUID) -> set[uuid.UUID]:
+    stmt = select(CurrentControlEvidence.run_id).where(CurrentControlEvidence.user_id == user_id).distinct()
+    return set(db.execute(stmt).scalars().all())
+
+
+def blob_shas_for_runs(db: Session, *, run_ids: list[uuid.UUID], batch_size: int = 500) -> set[str]:
+    shas: set[str] = set()
+    for i in range(0, len(run_ids), batch_size):
+        stmt = select(ControlEvidence.artifacts).where(ControlEvidence.run_id.in_(run_ids[i : i + batch_size]))
+        for artifacts in db.execute(stmt).scalars():
+            shas |= blob_shas(artifacts)
+    return shas
+
+
+def runs_started_before(db: Session, *, user_id: uuid.UUID, cutoff: datetime) -> list[uuid.UUID]:
+    stmt = select(EvidenceRun.id).where(EvidenceRun.user_id == user_id, EvidenceRun.started_at < cutoff)
+    return list(db.execute(stmt).scalars().all())
+
+
+def delete_runs(db: Session, *, run_ids: list[uuid.UUID], batch_size: int = 500) -> int:
+    """Delete runs with their evidence and jobs, committing every batch_size rows.
+
+    Each statement is DELETE ... WHERE id IN (SELECT id ... LIMIT batch_size), so no
+    single transaction holds locks on more than one batch. Returns evidence rows deleted.
+    """
+
+    deleted = 0
+    for i in range(0, len(run_ids), batch_size):
+        chunk = run_ids[i : i + batch_size]
+        deleted += _delete_in_batches(db, ControlEvidence, ControlEvidence.run_id.in_(chunk), batch_size=batch_size)
+        _delete_in_batches(db, CollectJob, CollectJob.run_id.in_(chunk), batch_size=batch_size)
+        _delete_in_batches(db, EvidenceRun, EvidenceRun.id.in_(chunk), batch_size=batch_size)
+    return deleted
+
+
+def _delete_in_batches(db: Session, model, condition, *, batch_size: int) -> int:
+    total = 0
+    while True:
+        ids = select(model.id).where(condition).limit(batch_size).scalar_subquery()
+        res = db.execute(delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False))
+        db.commit()
+        n = res.rowcount or 0
+        total += n
+        if n < batch_size:
+            return total
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import uuid
+from datetime import datetime
+from typing import Any
+
+from app.core.time import utcnow
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.orm import Session
+
+from app.models.evidence import ControlEvidence, CurrentControlEvidence
+from app.models.evidence_blob import EvidenceBlob
+
+
+BLOB_REF_KEY = "$blob"
+
+
+def encode_blob(value: Any) -> tuple[str, bytes]:
+    """Return (sha256, canonical JSON bytes) for a blob value."""
+
+    data = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(data).hexdigest(), data
+
+
+def blob_ref(sha256: str) -> dict:
+    return {BLOB_REF_KEY: sha256}
+
+
+def blob_ref_sha(value: Any) -> str | None:
+    if isinstance(value, dict) and len(value) == 1 and isinstance(value.get(BLOB_REF_KEY), str):
+        return value[BLOB_REF_KEY]
+    return None
+
+
+def blob_shas(artifacts: dict | None) -> set[str]:
+    # References live at the top level of an artifacts dict.
+    return {sha for v in (artifacts or {}).values() if (sha := blob_ref_sha(v)) is not None}
+
+
+def resolve_blob_refs(artifacts: dict | None, blobs: dict[str, Any]) -> dict:
+    """Replace blob references with their bodies; unknown references are left as-is."""
+
+    out: dict = {}
+    for k, v in (artifacts or {}).items():
+        sha = blob_ref_sha(v)
+        out[k] = blobs[sha] if sha is not None and sha in blobs else v
+    return out
+
+
+def load_blobs(db: Session, *, user_id: uuid.UUID, shas: set[str]) -> dict[str, Any]:
+    if not shas:
+        return {}
+    stmt = select(EvidenceBlob).where(EvidenceBlob.user_id == user_id, EvidenceBlob.sha256.in_(sorted(shas)))
+    return {b.sha256: b.body for b in db.execute(stmt).scalars().all()}
+
+
+def resolve_artifacts(db: Session, *, user_id: uuid.UUID, artifacts: dict | None) -> dict:
+    return resolve_blob_refs(artifacts, load_blobs(db, user_id=user_id, shas=blob_shas(artifacts)))
+
+
+def insert_blobs(db: Session, *, user_id: uuid.UUID, blobs: dict[str, Any]) -> None:
+    # Content-addressed: an existing row with the same hash already holds the same body.
+    if not blobs:
+        return
+    _lock_user_blobs(db, user_id)
+    now = utcnow()
+    values = [
+        {"user_id": user_id, "sha256": sha, "body": body, "size_bytes": len(encode_blob(body)[1]), "created_at": now}
+        for sha, body in blobs.items()
+    ]
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        existing = set(load_blobs(db, user_id=user_id, shas=set(blobs)))
+        db.add_all(EvidenceBlob(**v) for v in values if v["sha256"] not in existing)
+        return
+    db.execute(dialect_insert(EvidenceBlob).values(values).on_conflict_do_nothing())
+
+
+def blob_shas_created_before(db: Session, *, user_id: uuid.UUID, cutoff: datetime) -> set[str]:
+    stmt = select(EvidenceBlob.sha256).where(EvidenceBlob.user_id == user_id, EvidenceBlob.created_at < cutoff)
+    return set(db.execute(stmt).scalars().all())
+
+
+def referenced_blob_shas(db: Session, *, user_id: uuid.UUID) -> set[str]:
+    """Every blob sha referenced by the user's evidence (history or current), in one pass per table."""
+
+    shas: set[str] = set()
+    for model in (ControlEvidence, CurrentControlEvidence):
+        stmt = select(model.artifacts).where(model.user_id == user_id).execution_options(yield_per=1000)
+        for artifacts in db.execute(stmt).scalars():
+            shas |= blob_shas(artifacts)
+    return shas
+
+
+def delete_unreferenced_blobs(db: Session, *, user_id: uuid.UUID, shas: set[str], commit: bool = True) -> int:
+    """Delete the given blobs unless remaining evidence (history or current) still references them.
+
+    With commit=False the sweep joins the caller's transaction (e.g. the evidence delete
+    that orphaned the blobs), which then commits both together.
+    """
+
+    if not shas:
+        return 0
+    # Held until commit: an evidence write that found one of these blobs already present
+    # (ON CONFLICT DO NOTHING) either committed before we read references or waits for us.
+    _lock_user_blobs(db, user_id)
+    unreferenced = sorted(shas - referenced_blob_shas(db, user_id=user_id))
+    deleted = 0
+    if unreferenced:
+        res = db.execute(
+            delete(EvidenceBlob).where(EvidenceBlob.user_id == user_id, EvidenceBlob.sha256.in_(unreferenced))
+        )
+        deleted = res.rowcount or 0
+    if commit:
+        db.commit()
+    return deleted
+
+
+def _lock_user_blobs(db: Session, user_id: uuid.UUID) -> None:
+    # Per-user transaction-scoped lock serializing blob inserts against blob garbage collection.
+    # Other dialects serialize writers at the database level.
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtextextended(:key, 0))"), {"key": f"evidence_blobs:{user_id}"})
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import re
+import threading
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+
+from sqlalchemy import Connection, Engine, text
+
+
+# On Postgres control_evidence is range-partitioned by month on collected_at
+# (see alembic 0008). Everything here is a no-op on other dialects.
+PARENT_TABLE = "control_evidence"
+_PARTITION_RE = re.compile(r"^control_evidence_y(\d{4})m(\d{2})$")
+
+# Process-level caches: partitioned-ness per database URL and partitions known to exist.
+_partitioned: dict[str, bool] = {}
+_ensured: set[tuple[str, str]] = set()
+_lock = threading.Lock()
+
+
+def month_start(value: datetime | date) -> date:
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        value = value.date()
+    return value.replace(day=1)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def create_partition_sql(month: date) -> str:
+    lower = month_start(month)
+    upper = next_month(lower)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(lower)} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{_utc_literal(lower)}') TO ('{_utc_literal(upper)}')"
+    )
+
+
+def _utc_literal(month: date) -> str:
+    # Explicit offset: bare dates on a timestamptz column are read in the session TimeZone,
+    # while month_start() buckets rows by their UTC month.
+    return f"{month.isoformat()} 00:00:00+00"
+
+
+def is_partitioned(bind: Engine | Connection) -> bool:
+    if bind.dialect.name != "postgresql":
+        return False
+    key = _url_key(bind)
+    with _lock:
+        cached = _partitioned.get(key)
+    if cached is not None:
+        return cached
+    with _connect(bind) as conn:
+        partitioned = bool(
+            conn.execute(
+                text(
+                    "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+                    "WHERE c.relname = :table"
+                ),
+                {"table": PARENT_TABLE},
+            ).scalar()
+        )
+    with _lock:
+        _partitioned[key] = partitioned
+    return partitioned
+
+
+def ensure_evidence_partitions(bind: Engine | Connection, months: Iterable[datetime | date]) -> None:
+    """Create any missing monthly partitions covering the given timestamps.
+
+    Given an Engine, the DDL runs in its own short transaction rather than inside the
+    caller's evidence insert. Partitions already ensured by this process are skipped,
+    so the steady-state cost on the insert path is a set lookup.
+    """
+
+    if not is_partitioned(bind):
+        return
+    key = _url_key(bind)
+    wanted = sorted({month_start(m) for m in months})
+    with _lock:
+        missing = [m for m in wanted if (key, partition_name(m)) not in _ensured]
+    if not missing:
+        return
+    with _connect(bind, begin=True) as conn:
+        for month in missing:
+            conn.execute(text(create_partition_sql(month)))
+    with _lock:
+        _ensured.update((key, partition_name(m)) for m in missing)
+
+
+def list_evidence_partitions(bind: Engine | Connection) -> list[tuple[str, date]]:
+    """Return (name, month) for each existing monthly partition, oldest first."""
+
+    if not is_partitioned(bind):
+        return []
+    with _connect(bind) as conn:
+        names = conn.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = :table"
+            ),
+            {"table": PARENT_TABLE},
+        ).scalars().all()
+    partitions = []
+    for name in names:
+        m = _PARTITION_RE.match(name)
+        if m:
+            partitions.append((name, date(int(m.group(1)), int(m.group(2)), 1)))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def partitions_before(bind: Engine | Connection, cutoff: datetime) -> list[str]:
+    # Only months that end on or before the cutoff month's first day are wholly expired.
+    boundary = month_start(cutoff)
+    return [name for name, month in list_evidence_partitions(bind) if next_month(month) <= boundary]
+
+
+def partitions_without_live_runs(bind: Engine | Connection, names: list[str]) -> list[str]:
+    """Filter names down to partitions holding no rows of protected or still-running runs.
+
+    Protected runs back current_control_evidence; dropping their rows (or a run that is
+    still writing) would break the guarantees the row-by-row retention path keeps.
+    """
+
+    droppable = []
+    with _connect(bind) as conn:
+        for name in names:
+            if not _PARTITION_RE.match(name):
+                raise ValueError(f"not an evidence partition: {name}")
+            live = conn.execute(
+                text(
+                    f"SELECT 1 FROM {name} e WHERE "
+                    "EXISTS (SELECT 1 FROM current_control_evidence c WHERE c.run_id = e.run_id) "
+                    "OR EXISTS (SELECT 1 FROM evidence_runs r WHERE r.id = e.run_id AND r.status = 'running') "
+                    "LIMIT 1"
+                )
+            ).scalar()
+            if not live:
+                droppable.append(name)
+    return droppable
+
+
+def drop_evidence_partitions(bind: Engine | Connection, names: list[str]) -> None:
+    if not names:
+        return
+    key = _url_key(bind)
+    with _connect(bind, begin=True) as conn:
+        for name in names:
+            if not _PARTITION_RE.match(name):
+                raise ValueError(f"not an evidence partition: {name}")
+            conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+    with _lock:
+        _ensured.difference_update((key, n) for n in names)
+
+
+def _url_key(bind: Engine | Connection) -> str:
+    return str(bind.engine.url)
+
+
+@contextmanager
+def _connect(bind: Engine | Connection, *, begin: bool = False) -> Iterator[Connection]:
+    # A Connection (e.g. a test's outer transaction) is used as-is.
+    if isinstance(bind, Connection):
+        yield bind
+        return
+    with (bind.begin() if begin else bind.connect()) as conn:
+        yield conn
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import uuid
+
+from app.core.time import utcnow
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.db.session import supports_concurrent_sessions
+from app.models.http_cache_entry import HttpCacheEntry
+from app.providers.http_cache import CachedResponse, ResponseCache
+
+
+def _url_hash(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def load_response_cache(db: Session, *, connection_id: uuid.UUID) -> ResponseCache:
+    """Load the connection's validators; bodies are read by URL only when a 304 needs one."""
+
+    stmt = select(HttpCacheEntry.url, HttpCacheEntry.etag, HttpCacheEntry.last_modified).where(
+        HttpCacheEntry.connection_id == connection_id
+    )
+    validators = {url: (etag, last_modified) for url, etag, last_modified in db.execute(stmt).all()}
+    bind = db.get_bind()
+    lock = threading.Lock()
+
+    def load_body(url: str) -> CachedResponse | None:
+        # Provider calls fan out over threads: use a short session of our own where the
+        # engine allows it, otherwise serialize access to the caller's session (SQLite).
+        if supports_concurrent_sessions(bind):
+            with Session(bind=bind, autoflush=False) as own:
+                return load_cached_response(own, connection_id=connection_id, url=url)
+        with lock:
+            return load_cached_response(db, connection_id=connection_id, url=url)
+
+    return ResponseCache(validators=validators, load_body=load_body)
+
+
+def load_cached_response(db: Session, *, connection_id: uuid.UUID, url: str) -> CachedResponse | None:
+    stmt = select(HttpCacheEntry).where(
+        HttpCacheEntry.connection_id == connection_id,
+        HttpCacheEntry.url_hash == _url_hash(url),
+    )
+    row = db.execute(stmt).scalars().first()
+    if row is None:
+        return None
+    return CachedResponse(etag=row.etag, last_modified=row.last_modified, body=row.body, next_url=row.next_url)
+
+
+def save_response_cache(db: Session, *, connection_id: uuid.UUID, cache: ResponseCache) -> None:
+    dirty = cache.dirty_entries()
+    if not dirty:
+        return
+
+    by_hash = {_url_hash(url): (url, entry) for url, entry in dirty.items()}
+    stmt = select(HttpCacheEntry).where(
+        HttpCacheEntry.connection_id == connection_id,
+        HttpCacheEntry.url_hash.in_(list(by_hash)),
+    )
+    existing = {row.url_hash: row for row in db.execute(stmt).scalars().all()}
+
+    now = utcnow()
+    for h, (url, entry) in by_hash.items():
+        row = existing.get(h)
+        if row is None:
+            row = HttpCacheEntry(connection_id=connection_id, url_hash=h, url=url)
+        row.etag = entry.etag
+        row.last_modified = entry.last_modified
+        row.next_url = entry.next_url
+        row.body = entry.body
+        row.updated_at = now
+        db.add(row)
+    db.commit()
+    cache.mark_clean()
+
+
+def delete_for_connection(db: Session, *, connection_id: uuid.UUID) -> None:
+    db.execute(delete(HttpCacheEntry).where(HttpCacheEntry.connection_id == connection_id))
+    db.commit()
@@ -5,10 +5,12 @@ from datetime import datetime
 
 from app.core.time import utcnow
 
-from sqlalchemy import select, update
+from sqlalchemy import bindparam, delete, select, update
 from sqlalchemy.orm import Session
 
+from app.core.auth_cache import auth_cache
 from app.models.session import Session as DbSession
+from app.models.user import User
 
 
 def create_session(
@@ -37,9 +39,24 @@ def get_session_by_token_hash(db: Session, token_hash: str) -> DbSession | None:
     return db.execute(stmt).scalars().first()
 
 
-def touch_session(db: Session, session_id: uuid.UUID) -> None:
-    stmt = update(DbSession).where(DbSession.id == session_id).values(last_seen_at=utcnow())
-    db.execute(stmt)
+def get_session_with_user(db: Session, token_hash: str) -> tuple[DbSession, User] | None:
+    # One round-trip for the auth dependency's cache misses.
+    stmt = select(DbSession, User).join(User, User.id == DbSession.user_id).where(DbSession.token_hash == token_hash)
+    row = db.execute(stmt).first()
+    return (row[0], row[1]) if row is not None else None
+
+
+def touch_sessions(db: Session, *, touches: dict[uuid.UUID, datetime]) -> None:
+    # One executemany UPDATE for many sessions; never moves last_seen_at backwards.
+    if not touches:
+        return
+    table = DbSession.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("b_id"), table.c.last_seen_at < bindparam("b_seen"))
+        .values(last_seen_at=bindparam("b_seen"))
+    )
+    db.execute(stmt, [{"b_id": sid, "b_seen": seen} for sid, seen in touches.items()])
     db.commit()
 
 
@@ -47,10 +64,10 @@ def revoke_session(db: Session, session_id: uuid.UUID) -> None:
     stmt = update(DbSession).where(DbSession.id == session_id).values(revoked_at=utcnow())
     db.execute(stmt)
     db.commit()
+    auth_cache().invalidate_session(session_id)
 
 
 def delete_all_sessions_for_user(db: Session, *, user_id: uuid.UUID) -> None:
-    from sqlalchemy import delete
-
     db.execute(delete(DbSession).where(DbSession.user_id == user_id))
     db.commit()
+    auth_cache().invalidate_user(user_id)
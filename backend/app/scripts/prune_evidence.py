@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import argparse
+
+from sqlalchemy.orm import Session
+
+from app.core.settings import get_settings
+from app.db.session import get_engine
+from app.repos.users import get_user_by_email
+from app.services.retention import RetentionPolicy, prune_evidence
+
+
+def main() -> int:
+    settings = get_settings()
+    p = argparse.ArgumentParser(description="Prune old evidence runs according to the retention policy (local only).")
+    p.add_argument("--keep-runs", type=int, default=settings.evidence_retention_keep_runs)
+    p.add_argument("--weekly-after-days", type=int, default=settings.evidence_retention_weekly_after_days)
+    p.add_argument("--monthly-after-days", type=int, default=settings.evidence_retention_monthly_after_days)
+    p.add_argument("--max-age-days", type=int, default=settings.evidence_retention_max_age_days)
+    p.add_argument("--batch-size", type=int, default=settings.evidence_retention_batch_size)
+    p.add_argument("--email", default=None, help="Only prune this user's evidence.")
+    p.add_argument("--dry-run", action="store_true", help="Report what would be deleted without deleting.")
+    args = p.parse_args()
+
+    policy = RetentionPolicy(
+        keep_runs=args.keep_runs,
+        weekly_after_days=args.weekly_after_days,
+        monthly_after_days=args.monthly_after_days,
+        max_age_days=args.max_age_days,
+    )
+    if not policy.enabled:
+        p.error("--keep-runs or --max-age-days (or their EVIDENCE_RETENTION_* settings) must be at least 1")
+
+    with Session(get_engine()) as db:
+        user_id = None
+        if args.email:
+            user = get_user_by_email(db, args.email)
+            if user is None:
+                p.error(f"No user with email {args.email}")
+            user_id = user.id
+        report = prune_evidence(
+            db, policy=policy, batch_size=max(1, args.batch_size), user_id=user_id, dry_run=args.dry_run
+        )
+
+    verb = "Would delete" if args.dry_run else "Deleted"
+    print(
+        f"{verb} {report.runs_deleted} runs across {report.users} users "
+        f"({report.evidence_deleted} evidence rows, {report.blobs_deleted} blobs, "
+        f"{report.partitions_dropped} monthly partitions)."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import argparse
+
+from sqlalchemy.orm import Session
+
+from app.db.session import get_engine
+from app.repos.evidence import rebuild_current_evidence, users_with_runs
+from app.repos.users import get_user_by_email
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Rebuild current_control_evidence from evidence history (local only).")
+    p.add_argument("--email", default=None, help="Only rebuild this user's current evidence.")
+    args = p.parse_args()
+
+    with Session(get_engine()) as db:
+        if args.email:
+            user = get_user_by_email(db, args.email)
+            if user is None:
+                p.error(f"No user with email {args.email}")
+            user_ids = [user.id]
+        else:
+            user_ids = users_with_runs(db)
+        rows = sum(rebuild_current_evidence(db, user_id=uid) for uid in user_ids)
+
+    print(f"Rebuilt {rows} current evidence rows across {len(user_ids)} users.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import argparse
+
+from sqlalchemy.orm import Session
+
+from app.core.settings import get_settings, parse_fernet_keys
+from app.crypto.fernet import rotate_str
+from app.db.session import get_engine
+from app.repos.connections import iter_connection_batches
+from app.services.pack_signing import reencrypt_signing_key
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(
+        description="Re-encrypt stored provider tokens and the signing key under FERNET_KEY (local only)."
+    )
+    p.add_argument("--batch-size", type=int, default=100, help="Connections re-encrypted per transaction.")
+    args = p.parse_args()
+
+    if len(parse_fernet_keys(get_settings())) < 2:
+        p.error("Set FERNET_PREVIOUS_KEYS to the old key(s) before rotating")
+
+    rotated = failed = 0
+    with Session(get_engine()) as db:
+        for batch in iter_connection_batches(db, batch_size=max(1, args.batch_size)):
+            for conn in batch:
+                try:
+                    conn.encrypted_access_token = rotate_str(conn.encrypted_access_token)
+                    if conn.encrypted_refresh_token:
+                        conn.encrypted_refresh_token = rotate_str(conn.encrypted_refresh_token)
+                except ValueError:
+                    # Not decryptable with any key in the ring: leave it; the user must reconnect.
+                    failed += 1
+                    continue
+                rotated += 1
+            db.commit()
+
+    try:
+        signing = "re-encrypted" if reencrypt_signing_key() else "nothing to re-encrypt"
+    except ValueError:
+        signing = "not decryptable (a new key will be generated on next export)"
+
+    print(f"Re-encrypted {rotated} connections ({failed} undecryptable); signing key: {signing}.")
+    print("Once every API process runs with the new FERNET_KEY, remove FERNET_PREVIOUS_KEYS.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -8,6 +8,7 @@ from app.core.security import hash_password
 from app.db.session import get_engine
 from app.models.user import User
 from app.repos.audit_events import delete_all_for_user as delete_audit
+from app.repos.collect_jobs import delete_all_for_user as delete_collect_jobs
 from app.repos.connections import delete_connection
 from app.repos.evidence import delete_all_user_data
 from app.repos.oauth_states import delete_all_for_user as delete_oauth_states
@@ -39,6 +40,7 @@ def _ensure_demo_user(db: Session, *, email: str, password: str) -> User:
 
 
 def _wipe_user_but_keep_account(db: Session, *, user_id) -> None:
+    delete_collect_jobs(db, user_id=user_id)
     delete_all_user_data(db, user_id=user_id)
     delete_oauth_states(db, user_id=user_id)
     delete_connection(db, user_id=user_id, provider="github")
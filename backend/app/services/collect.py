@@ -1,16 +1,25 @@
 from __future__ import annotations
 
-from dataclasses import asdict
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta, timezone
 
 from sqlalchemy.orm import Session
 
 from app.core.settings import get_settings
-from app.providers.github_api import GitHubApi, GitHubApiError
-from app.providers.graph_api import GraphApi, GraphApiError
+from app.core.time import isoformat_z
+from app.db.session import supports_concurrent_sessions
+from app.models.evidence import EvidenceRun
+from app.providers.github_api import GitHubApi, GitHubApiError, RepoSummary
+from app.providers.graph_api import GraphApi, GraphApiError, GraphControlSet
+from app.providers.rate_limit import RateGovernor, governor_for
 from app.repos.connections import get_connection
-from app.repos.evidence import add_control_evidence, create_run, finish_run
+from app.repos.evidence import EvidenceBatch, add_control_evidence_many, create_run, finish_run
+from app.repos.http_cache import load_response_cache, save_response_cache
+from app.services.collect_events import collect_events
 from app.services.control_defs import CONTROLS
+from app.services.fanout import bounded_map
 from app.services.tokens import TokenDecryptError, TokenExpiredError, get_github_access_token, get_microsoft_access_token
 
 
@@ -29,59 +38,145 @@ MICROSOFT_CONTROL_KEYS = (
 )
 
 
-def collect_now(db: Session, *, user_id) -> dict:
-    run = create_run(db, user_id=user_id)
+ProgressCallback = Callable[[str, str], None]
+
+
+def collect_now(db: Session, *, user_id, run_id=None, progress: ProgressCallback | None = None) -> dict:
+    """Collect a complete snapshot into run_id (a new run when omitted) and finish the run.
+
+    progress, when given, is called as progress(provider, state) with state one of
+    running|done|failed; it may be called from collector threads.
+    """
+
+    run = create_run(db, user_id=user_id, status="running") if run_id is None else db.get(EvidenceRun, run_id)
+    batch = EvidenceBatch(user_id=user_id, run_id=run.id)
 
     settings = get_settings()
     if settings.app_env == "demo":
-        write_demo_snapshot(db, user_id=user_id, run_id=run.id)
-        finish_run(db, run_id=run.id, status="success", error_summary=None)
+        _write_demo_controls(batch)
+        _collect_pack_hygiene(db, batch=batch)
+        for provider in collector_providers():
+            _report(progress, provider, "done")
+        finish_run(db, run_id=run.id, status="success", error_summary=None, evidence=batch)
         return {"run_id": str(run.id), "status": "success", "errors": []}
 
-    errors: list[str] = []
-
     # Always write a complete 12-control snapshot per run (no mixing across runs).
-    try:
-        _collect_github(db, user_id=user_id, run_id=run.id)
-    except Exception as e:
-        errors.append(f"github: {type(e).__name__}")
-        _write_unknown_controls(
-            db,
-            user_id=user_id,
-            run_id=run.id,
-            keys=GITHUB_CONTROL_KEYS,
-            provider="github",
-            artifacts={"error": "github_collection_failed", "error_type": type(e).__name__},
-            notes="GitHub evidence collection failed; reconnect or check permissions.",
-            only_missing=True,
-        )
-
-    try:
-        _collect_microsoft(db, user_id=user_id, run_id=run.id)
-    except Exception as e:
-        errors.append(f"microsoft: {type(e).__name__}")
-        _write_unknown_controls(
-            db,
-            user_id=user_id,
-            run_id=run.id,
-            keys=MICROSOFT_CONTROL_KEYS,
-            provider="microsoft",
-            artifacts={"error": "microsoft_collection_failed", "error_type": type(e).__name__},
-            notes="Microsoft evidence collection failed; reconnect or check permissions/admin consent.",
-            only_missing=True,
-        )
+    errors = _run_provider_collectors(db, batch=batch, progress=progress)
 
-    # Pack hygiene controls computed from what we just stored.
-    _collect_pack_hygiene(db, user_id=user_id, run_id=run.id)
+    # Pack hygiene controls computed from what we just collected.
+    _collect_pack_hygiene(db, batch=batch)
 
+    # Evidence rows and the final run status are written in one transaction.
     if errors:
-        finish_run(db, run_id=run.id, status="partial", error_summary="; ".join(errors))
+        finish_run(db, run_id=run.id, status="partial", error_summary="; ".join(errors), evidence=batch)
     else:
-        finish_run(db, run_id=run.id, status="success", error_summary=None)
+        finish_run(db, run_id=run.id, status="success", error_summary=None, evidence=batch)
 
     return {"run_id": str(run.id), "status": "partial" if errors else "success", "errors": errors}
 
 
+@dataclass(frozen=True)
+class _ProviderCollector:
+    provider: str
+    collect: Callable[..., None]
+    keys: tuple[str, ...]
+    failure_notes: str
+
+
+def _provider_collectors() -> tuple[_ProviderCollector, ...]:
+    return (
+        _ProviderCollector(
+            provider="github",
+            collect=_collect_github,
+            keys=GITHUB_CONTROL_KEYS,
+            failure_notes="GitHub evidence collection failed; reconnect or check permissions.",
+        ),
+        _ProviderCollector(
+            provider="microsoft",
+            collect=_collect_microsoft,
+            keys=MICROSOFT_CONTROL_KEYS,
+            failure_notes="Microsoft evidence collection failed; reconnect or check permissions/admin consent.",
+        ),
+    )
+
+
+def collector_providers() -> tuple[str, ...]:
+    return tuple(c.provider for c in _provider_collectors())
+
+
+def _report(progress: ProgressCallback | None, provider: str, state: str) -> None:
+    if progress is not None:
+        progress(provider, state)
+
+
+def _run_provider_collectors(db: Session, *, batch: EvidenceBatch, progress: ProgressCallback | None = None) -> list[str]:
+    """Run every provider collector into batch and return the per-provider error strings.
+
+    Providers hit different services and write disjoint control keys, so they run
+    concurrently, each in its own session on the same engine and with its own buffer.
+    Engines that cannot share work across threads (SQLite) run them one after another.
+    """
+
+    bind = db.get_bind()
+    collectors = _provider_collectors()
+    max_in_flight = len(collectors) if supports_concurrent_sessions(bind) else 1
+    results = bounded_map(
+        lambda c: _run_provider_collector(bind, c, batch=batch.empty_copy(), progress=progress),
+        collectors,
+        max_in_flight=max_in_flight,
+    )
+    errors: list[str] = []
+    for error, provider_batch in results:
+        batch.extend(provider_batch)
+        if error is not None:
+            errors.append(error)
+    return errors
+
+
+def _run_provider_collector(
+    bind, collector: _ProviderCollector, *, batch: EvidenceBatch, progress: ProgressCallback | None = None
+) -> tuple[str | None, EvidenceBatch]:
+    _report(progress, collector.provider, "running")
+    started = time.perf_counter()
+    with Session(bind=bind, autoflush=False) as db:
+        try:
+            collector.collect(db, batch=batch)
+        except Exception as e:
+            db.rollback()
+            _write_unknown_controls(
+                batch,
+                keys=collector.keys,
+                provider=collector.provider,
+                artifacts={"error": f"{collector.provider}_collection_failed", "error_type": type(e).__name__},
+                notes=collector.failure_notes,
+                only_missing=True,
+            )
+            error = f"{collector.provider}: {type(e).__name__}"
+            _provider_finished(batch.run_id, collector.provider, "failed", started, error=error)
+            _report(progress, collector.provider, "failed")
+            return error, batch
+    _provider_finished(batch.run_id, collector.provider, "done", started)
+    _report(progress, collector.provider, "done")
+    return None, batch
+
+
+def _provider_finished(run_id, provider: str, state: str, started: float, *, error: str | None = None) -> None:
+    collect_events.publish(
+        run_id, "provider_finished", provider=provider, state=state, elapsed_ms=_elapsed_ms(started), error=error
+    )
+
+
+def _elapsed_ms(started: float) -> int:
+    return int((time.perf_counter() - started) * 1000)
+
+
+def _write_control(batch: EvidenceBatch, **kwargs) -> None:
+    row = batch.add(**kwargs)
+    collect_events.publish(
+        batch.run_id, "control_written", control_key=row["control_key"], provider=row["provider"], status=row["status"]
+    )
+
+
 def write_demo_snapshot(db: Session, *, user_id, run_id=None) -> dict:
     """Write a deterministic 12-control demo snapshot.
 
@@ -92,33 +187,36 @@ def write_demo_snapshot(db: Session, *, user_id, run_id=None) -> dict:
         run = create_run(db, user_id=user_id)
         run_id = run.id
 
+    batch = EvidenceBatch(user_id=user_id, run_id=run_id)
+    _write_demo_controls(batch)
+    # Pack hygiene controls computed from what we just collected.
+    _collect_pack_hygiene(db, batch=batch)
+    add_control_evidence_many(db, batch=batch)
+    return {"run_id": str(run_id)}
+
+
+def _write_demo_controls(batch: EvidenceBatch) -> None:
     demo_note = "DEMO: synthetic evidence for offline demonstration only."
 
     # Microsoft controls
-    add_control_evidence(
-        db,
-        user_id=user_id,
-        run_id=run_id,
+    _write_control(
+        batch,
         control_key="ms.security_defaults",
         provider="microsoft",
         status="pass",
         artifacts={"demo": True, "security_defaults_enabled": True},
         notes=demo_note,
     )
-    add_control_evidence(
-        db,
-        user_id=user_id,
-        run_id=run_id,
+    _write_control(
+        batch,
         control_key="ms.conditional_access_presence",
         provider="microsoft",
         status="warn",
         artifacts={"demo": True, "conditional_access_policies_count": 2},
         notes=demo_note,
     )
-    add_control_evidence(
-        db,
-        user_id=user_id,
-        run_id=run_id,
+    _write_control(
+        batch,
         control_key="ms.admin_surface_area",
         provider="microsoft",
         status="warn",
@@ -127,50 +225,40 @@ def write_demo_snapshot(db: Session, *, user_id, run_id=None) -> dict:
     )
 
     # GitHub controls
-    add_control_evidence(
-        db,
-        user_id=user_id,
-        run_id=run_id,
+    _write_control(
+        batch,
         control_key="gh.branch_protection",
         provider="github",
         status="pass",
         artifacts={"demo": True, "repos_sampled": 5, "protected_default_branch": 5},
         notes=demo_note,
     )
-    add_control_evidence(
-        db,
-        user_id=user_id,
-        run_id=run_id,
+    _write_control(
+        batch,
         control_key="gh.pr_reviews_required",
         provider="github",
         status="pass",
         artifacts={"demo": True, "repos_sampled": 5, "required_reviews": 5},
         notes=demo_note,
     )
-    add_control_evidence(
-        db,
-        user_id=user_id,
-        run_id=run_id,
+    _write_control(
+        batch,
         control_key="gh.force_pushes_disabled",
         provider="github",
         status="pass",
         artifacts={"demo": True, "repos_sampled": 5, "force_push_enabled": 0},
         notes=demo_note,
     )
-    add_control_evidence(
-        db,
-        user_id=user_id,
-        run_id=run_id,
+    _write_control(
+        batch,
         control_key="gh.enforce_admins",
         provider="github",
         status="warn",
         artifacts={"demo": True, "repos_sampled": 5, "enforce_admins_enabled": 3},
         notes=demo_note,
     )
-    add_control_evidence(
-        db,
-        user_id=user_id,
-        run_id=run_id,
+    _write_control(
+        batch,
         control_key="gh.repo_visibility_review",
         provider="github",
         status="warn",
@@ -178,18 +266,13 @@ def write_demo_snapshot(db: Session, *, user_id, run_id=None) -> dict:
         notes=demo_note,
     )
 
-    # Pack hygiene controls computed from what we just stored.
-    _collect_pack_hygiene(db, user_id=user_id, run_id=run_id)
-    return {"run_id": str(run_id)}
-
 
-def _collect_github(db: Session, *, user_id, run_id) -> None:
-    conn = get_connection(db, user_id=user_id, provider="github")
+def _collect_github(db: Session, *, batch: EvidenceBatch) -> None:
+    run_id = batch.run_id
+    conn = get_connection(db, user_id=batch.user_id, provider="github")
     if conn is None:
         _write_unknown_controls(
-            db,
-            user_id=user_id,
-            run_id=run_id,
+            batch,
             keys=GITHUB_CONTROL_KEYS,
             provider="github",
             artifacts={"error": "github_not_connected"},
@@ -201,35 +284,47 @@ def _collect_github(db: Session, *, user_id, run_id) -> None:
         token = get_github_access_token(conn)
     except TokenDecryptError as e:
         _write_unknown_controls(
-            db,
-            user_id=user_id,
-            run_id=run_id,
+            batch,
             keys=GITHUB_CONTROL_KEYS,
             provider="github",
             artifacts={"error": "github_token_decrypt_failed"},
             notes=str(e),
         )
         return
-    api = GitHubApi(access_token=token)
+    settings = get_settings()
+    cache = load_response_cache(db, connection_id=conn.id) if settings.provider_http_cache else None
+    api = GitHubApi(access_token=token, cache=cache, governor=_connection_governor(conn))
 
+    limit = settings.github_repo_sample_size if settings.github_repo_sample_size > 0 else None
+    org = settings.github_org.strip() or None
+    use_graphql = settings.github_collection_backend == "graphql"
+    started = time.perf_counter()
     try:
-        repos = api.list_repos(per_page=100)[:10]
+        if use_graphql:
+            # Repo metadata and protection rules arrive together, up to 100 repos per request.
+            repos = api.list_repos_with_protection(limit=limit, org=org)
+        else:
+            repos = api.list_repos(per_page=100, limit=limit, org=org)
     except Exception as e:
         _write_unknown_controls(
-            db,
-            user_id=user_id,
-            run_id=run_id,
+            batch,
             keys=GITHUB_CONTROL_KEYS,
             provider="github",
             artifacts={"error": "github_repo_list_failed", "error_type": type(e).__name__},
             notes="Unable to list repositories with the current GitHub token/scopes; reconnect or adjust permissions.",
         )
         return
+    collect_events.publish(
+        run_id,
+        "repos_listed",
+        provider="github",
+        backend=settings.github_collection_backend,
+        count=len(repos),
+        elapsed_ms=_elapsed_ms(started),
+    )
     if not repos:
         _write_unknown_controls(
-            db,
-            user_id=user_id,
-            run_id=run_id,
+            batch,
             keys=GITHUB_CONTROL_KEYS,
             provider="github",
             artifacts={"repos_sampled": 0},
@@ -237,24 +332,20 @@ def _collect_github(db: Session, *, user_id, run_id) -> None:
         )
         return
 
-    repo_rows: list[dict] = []
-    visibility_counts = {"public": 0, "private": 0, "internal": 0, "unknown": 0}
-
-    for r in repos:
-        visibility = (r.visibility or "unknown").lower()
-        visibility_counts[visibility] = visibility_counts.get(visibility, 0) + 1
-
-        row = {"repo": r.full_name, "default_branch": r.default_branch, "visibility": visibility}
-        try:
-            protection = api.get_branch_protection(full_name=r.full_name, branch=r.default_branch)
-        except GitHubApiError as e:
-            row["error"] = str(e)
-            row["branch_protection"] = None
-            repo_rows.append(row)
-            continue
-
-        row["branch_protection"] = protection
-        repo_rows.append(row)
+    if use_graphql:
+        repo_rows = [_repo_row(p.repo, protection=p.branch_protection, error=p.error) for p in repos]
+        for row in repo_rows:
+            _publish_repo_fetched(run_id, row, elapsed_ms=None)
+    else:
+        # Protection lookups are independent per repo; fan out with bounded concurrency.
+        # bounded_map preserves input order, so per_repo stays deterministic.
+        repo_rows = bounded_map(
+            lambda r: _fetch_repo_row(api, r, run_id=run_id),
+            repos,
+            max_in_flight=settings.github_max_concurrency,
+        )
+    if cache is not None:
+        save_response_cache(db, connection_id=conn.id, cache=cache)
 
     def _bool(obj: dict | None, path: list[str], *, default: bool = False) -> bool:
         cur = obj or {}
@@ -264,6 +355,10 @@ def _collect_github(db: Session, *, user_id, run_id) -> None:
             cur = cur[p]
         return bool(cur)
 
+    visibility_counts = {"public": 0, "private": 0, "internal": 0, "unknown": 0}
+    for row in repo_rows:
+        visibility_counts[row["visibility"]] = visibility_counts.get(row["visibility"], 0) + 1
+
     per_repo = []
     for row in repo_rows:
         protection = row.get("branch_protection")
@@ -299,65 +394,92 @@ def _collect_github(db: Session, *, user_id, run_id) -> None:
     enforce_admins_status = _aggregate_status(n, enforce_admins_n, bad_count=(n - enforce_admins_n))
     visibility_status = "warn" if public_n > 0 else "pass"
 
-    add_control_evidence(
-        db,
-        user_id=user_id,
-        run_id=run_id,
+    # All five controls carry the same per-repo table; store it once and reference it.
+    per_repo_ref = batch.add_blob(per_repo)
+
+    _write_control(
+        batch,
         control_key="gh.branch_protection",
         provider="github",
         status=branch_protection_status,
-        artifacts={"repos_sampled": n, "protected": protected_n, "per_repo": per_repo, "visibility_counts": visibility_counts},
+        artifacts={"repos_sampled": n, "protected": protected_n, "per_repo": per_repo_ref, "visibility_counts": visibility_counts},
         notes=_notes_ratio("Branch protection enabled", protected_n, n),
     )
-    add_control_evidence(
-        db,
-        user_id=user_id,
-        run_id=run_id,
+    _write_control(
+        batch,
         control_key="gh.pr_reviews_required",
         provider="github",
         status=pr_reviews_status,
-        artifacts={"repos_sampled": n, "pr_reviews_required": pr_reviews_n, "per_repo": per_repo},
+        artifacts={"repos_sampled": n, "pr_reviews_required": pr_reviews_n, "per_repo": per_repo_ref},
         notes=_notes_ratio("PR reviews required", pr_reviews_n, n),
     )
-    add_control_evidence(
-        db,
-        user_id=user_id,
-        run_id=run_id,
+    _write_control(
+        batch,
         control_key="gh.force_pushes_disabled",
         provider="github",
         status=force_pushes_status,
-        artifacts={"repos_sampled": n, "force_pushes_allowed": force_push_allowed_n, "per_repo": per_repo},
+        artifacts={"repos_sampled": n, "force_pushes_allowed": force_push_allowed_n, "per_repo": per_repo_ref},
         notes="Force pushes should generally be disabled on protected branches.",
     )
-    add_control_evidence(
-        db,
-        user_id=user_id,
-        run_id=run_id,
+    _write_control(
+        batch,
         control_key="gh.enforce_admins",
         provider="github",
         status=enforce_admins_status,
-        artifacts={"repos_sampled": n, "enforce_admins_enabled": enforce_admins_n, "per_repo": per_repo},
+        artifacts={"repos_sampled": n, "enforce_admins_enabled": enforce_admins_n, "per_repo": per_repo_ref},
         notes=_notes_ratio("Admin enforcement enabled", enforce_admins_n, n),
     )
-    add_control_evidence(
-        db,
-        user_id=user_id,
-        run_id=run_id,
+    _write_control(
+        batch,
         control_key="gh.repo_visibility_review",
         provider="github",
         status=visibility_status,
-        artifacts={"repos_sampled": n, "visibility_counts": visibility_counts, "public_repos_in_sample": public_n, "per_repo": per_repo},
+        artifacts={"repos_sampled": n, "visibility_counts": visibility_counts, "public_repos_in_sample": public_n, "per_repo": per_repo_ref},
         notes="Public repositories may expose code or metadata; review if public repos are intended.",
     )
 
 
-def _collect_microsoft(db: Session, *, user_id, run_id) -> None:
-    conn = get_connection(db, user_id=user_id, provider="microsoft")
+def _fetch_repo_row(api: GitHubApi, r: RepoSummary, *, run_id=None) -> dict:
+    started = time.perf_counter()
+    try:
+        protection = api.get_branch_protection(full_name=r.full_name, branch=r.default_branch)
+    except GitHubApiError as e:
+        row = _repo_row(r, protection=None, error=str(e))
+    else:
+        row = _repo_row(r, protection=protection, error=None)
+    _publish_repo_fetched(run_id, row, elapsed_ms=_elapsed_ms(started))
+    return row
+
+
+def _publish_repo_fetched(run_id, row: dict, *, elapsed_ms: int | None) -> None:
+    if run_id is None:
+        return
+    collect_events.publish(
+        run_id,
+        "repo_fetched",
+        provider="github",
+        repo=row["repo"],
+        protected=row.get("branch_protection") is not None,
+        error=row.get("error"),
+        elapsed_ms=elapsed_ms,
+    )
+
+
+def _repo_row(r: RepoSummary, *, protection: dict | None, error: str | None) -> dict:
+    visibility = (r.visibility or "unknown").lower()
+    row = {"repo": r.full_name, "default_branch": r.default_branch, "visibility": visibility}
+    if error is not None:
+        row["error"] = error
+    row["branch_protection"] = protection
+    return row
+
+
+def _collect_microsoft(db: Session, *, batch: EvidenceBatch) -> None:
+    run_id = batch.run_id
+    conn = get_connection(db, user_id=batch.user_id, provider="microsoft")
     if conn is None:
         _write_unknown_controls(
-            db,
-            user_id=user_id,
-            run_id=run_id,
+            batch,
             keys=MICROSOFT_CONTROL_KEYS,
             provider="microsoft",
             artifacts={"error": "microsoft_not_connected"},
@@ -369,33 +491,42 @@ def _collect_microsoft(db: Session, *, user_id, run_id) -> None:
         token = get_microsoft_access_token(db, conn)
     except (TokenDecryptError, TokenExpiredError) as e:
         _write_unknown_controls(
-            db,
-            user_id=user_id,
-            run_id=run_id,
+            batch,
             keys=MICROSOFT_CONTROL_KEYS,
             provider="microsoft",
             artifacts={"error": "microsoft_token_invalid"},
             notes=str(e),
         )
         return
-    api = GraphApi(access_token=token)
+    cache = load_response_cache(db, connection_id=conn.id) if get_settings().provider_http_cache else None
+    api = GraphApi(access_token=token, cache=cache, governor=_connection_governor(conn))
+
+    # One $batch round-trip; each field is either a value or its GraphApiError.
+    started = time.perf_counter()
+    try:
+        results = api.get_control_set()
+    except GraphApiError as e:
+        # A batch-level failure (401/403/5xx) applies to every control, each recorded
+        # with its own permission-specific notes below.
+        results = GraphControlSet(
+            org=e, security_defaults=e, conditional_access_policy_count=e, directory_roles_count=e
+        )
+    collect_events.publish(run_id, "control_set_fetched", provider="microsoft", elapsed_ms=_elapsed_ms(started))
 
     artifacts: dict = {}
     try:
-        org = api.get_org()
+        org = _unwrap(results.org)
         artifacts["organization"] = asdict(org)
     except GraphApiError as e:
         artifacts["organization_error"] = {"status_code": e.status_code, "message": str(e)}
 
     # Security Defaults
     try:
-        sd = api.get_security_defaults()
+        sd = _unwrap(results.security_defaults)
         enabled = bool(sd.get("isEnabled"))
         status_sd = "pass" if enabled else "warn"
-        add_control_evidence(
-            db,
-            user_id=user_id,
-            run_id=run_id,
+        _write_control(
+            batch,
             control_key="ms.security_defaults",
             provider="microsoft",
             status=status_sd,
@@ -403,10 +534,8 @@ def _collect_microsoft(db: Session, *, user_id, run_id) -> None:
             notes="Security Defaults enabled is generally a baseline when Conditional Access is not configured.",
         )
     except GraphApiError as e:
-        add_control_evidence(
-            db,
-            user_id=user_id,
-            run_id=run_id,
+        _write_control(
+            batch,
             control_key="ms.security_defaults",
             provider="microsoft",
             status="unknown",
@@ -416,12 +545,10 @@ def _collect_microsoft(db: Session, *, user_id, run_id) -> None:
 
     # Conditional Access presence
     try:
-        ca_count = api.count_conditional_access_policies()
+        ca_count = _unwrap(results.conditional_access_policy_count)
         status_ca = "pass" if ca_count > 0 else "warn"
-        add_control_evidence(
-            db,
-            user_id=user_id,
-            run_id=run_id,
+        _write_control(
+            batch,
             control_key="ms.conditional_access_presence",
             provider="microsoft",
             status=status_ca,
@@ -429,10 +556,8 @@ def _collect_microsoft(db: Session, *, user_id, run_id) -> None:
             notes="Conditional Access policies are a common control for enforcing MFA and access constraints.",
         )
     except GraphApiError as e:
-        add_control_evidence(
-            db,
-            user_id=user_id,
-            run_id=run_id,
+        _write_control(
+            batch,
             control_key="ms.conditional_access_presence",
             provider="microsoft",
             status="unknown",
@@ -442,13 +567,11 @@ def _collect_microsoft(db: Session, *, user_id, run_id) -> None:
 
     # Admin surface area heuristic
     try:
-        roles_count = api.count_directory_roles()
+        roles_count = _unwrap(results.directory_roles_count)
         # Heuristic: a very large number of active roles may correlate with complexity/risk.
         status_roles = "pass" if 1 <= roles_count <= 10 else "warn"
-        add_control_evidence(
-            db,
-            user_id=user_id,
-            run_id=run_id,
+        _write_control(
+            batch,
             control_key="ms.admin_surface_area",
             provider="microsoft",
             status=status_roles,
@@ -456,10 +579,8 @@ def _collect_microsoft(db: Session, *, user_id, run_id) -> None:
             notes="Heuristic only: review privileged roles and assignments periodically.",
         )
     except GraphApiError as e:
-        add_control_evidence(
-            db,
-            user_id=user_id,
-            run_id=run_id,
+        _write_control(
+            batch,
             control_key="ms.admin_surface_area",
             provider="microsoft",
             status="unknown",
@@ -467,13 +588,34 @@ def _collect_microsoft(db: Session, *, user_id, run_id) -> None:
             notes="Unable to read directory roles via Graph with current permissions.",
         )
 
+    if cache is not None:
+        save_response_cache(db, connection_id=conn.id, cache=cache)
 
-def _collect_pack_hygiene(db: Session, *, user_id, run_id) -> None:
-    latest_rows = {r.control_key: r for r in _latest_run_rows(db, user_id=user_id, run_id=run_id)}
+
+def _connection_governor(conn) -> RateGovernor:
+    # One budget per provider connection, shared by every collection that uses it.
+    settings = get_settings()
+    return governor_for(
+        f"{conn.provider}:{conn.id}",
+        rate_per_second=settings.provider_rate_per_second,
+        burst=settings.provider_rate_burst,
+        max_retries=settings.provider_max_retries,
+        max_wait_seconds=settings.provider_max_wait_seconds,
+    )
+
+
+def _unwrap(value):
+    if isinstance(value, GraphApiError):
+        raise value
+    return value
+
+
+def _collect_pack_hygiene(db: Session, *, batch: EvidenceBatch) -> None:
+    latest_rows = {r["control_key"]: r for r in batch.rows}
     now = datetime.now(timezone.utc)
 
     # Evidence freshness: warn if newest evidence older than 7 days.
-    newest = max((r.collected_at for r in latest_rows.values()), default=None)
+    newest = max((r["collected_at"] for r in latest_rows.values()), default=None)
     if newest is None:
         status = "unknown"
         artifacts = {"newest_collected_at": None}
@@ -486,12 +628,10 @@ def _collect_pack_hygiene(db: Session, *, user_id, run_id) -> None:
             newest_utc = newest_utc.astimezone(timezone.utc)
         stale = newest_utc < (now - timedelta(days=7))
         status = "warn" if stale else "pass"
-        artifacts = {"newest_collected_at": newest.isoformat() + "Z", "stale_days_threshold": 7}
+        artifacts = {"newest_collected_at": isoformat_z(newest), "stale_days_threshold": 7}
         notes = "Evidence should be refreshed regularly for procurement processes."
-    add_control_evidence(
-        db,
-        user_id=user_id,
-        run_id=run_id,
+    _write_control(
+        batch,
         control_key="pack.evidence_freshness",
         provider="pack",
         status=status,
@@ -504,10 +644,8 @@ def _collect_pack_hygiene(db: Session, *, user_id, run_id) -> None:
     present = set(latest_rows.keys())
     missing = sorted(expected_provider - present)
     status = "pass" if not missing else "warn"
-    add_control_evidence(
-        db,
-        user_id=user_id,
-        run_id=run_id,
+    _write_control(
+        batch,
         control_key="pack.documentation_completeness",
         provider="pack",
         status=status,
@@ -516,10 +654,8 @@ def _collect_pack_hygiene(db: Session, *, user_id, run_id) -> None:
     )
 
     # Export integrity: validated during export.
-    add_control_evidence(
-        db,
-        user_id=user_id,
-        run_id=run_id,
+    _write_control(
+        batch,
         control_key="pack.export_integrity",
         provider="pack",
         status="unknown",
@@ -528,13 +664,11 @@ def _collect_pack_hygiene(db: Session, *, user_id, run_id) -> None:
     )
 
     # Connection status
-    gh = get_connection(db, user_id=user_id, provider="github")
-    ms = get_connection(db, user_id=user_id, provider="microsoft")
+    gh = get_connection(db, user_id=batch.user_id, provider="github")
+    ms = get_connection(db, user_id=batch.user_id, provider="microsoft")
     status = "pass" if (gh is not None and ms is not None) else "warn"
-    add_control_evidence(
-        db,
-        user_id=user_id,
-        run_id=run_id,
+    _write_control(
+        batch,
         control_key="pack.connection_status",
         provider="pack",
         status=status,
@@ -543,21 +677,9 @@ def _collect_pack_hygiene(db: Session, *, user_id, run_id) -> None:
     )
 
 
-def _latest_run_rows(db: Session, *, user_id, run_id):
-    # Fetch all rows for this run.
-    from sqlalchemy import select
-
-    from app.models.evidence import ControlEvidence
-
-    stmt = select(ControlEvidence).where(ControlEvidence.user_id == user_id, ControlEvidence.run_id == run_id)
-    return list(db.execute(stmt).scalars().all())
-
-
 def _write_unknown_controls(
-    db: Session,
+    batch: EvidenceBatch,
     *,
-    user_id,
-    run_id,
     keys: tuple[str, ...],
     provider: str,
     artifacts: dict,
@@ -565,13 +687,11 @@ def _write_unknown_controls(
     only_missing: bool = False,
 ) -> None:
     if only_missing:
-        present = {r.control_key for r in _latest_run_rows(db, user_id=user_id, run_id=run_id)}
+        present = batch.control_keys()
         keys = tuple(k for k in keys if k not in present)
     for key in keys:
-        add_control_evidence(
-            db,
-            user_id=user_id,
-            run_id=run_id,
+        _write_control(
+            batch,
             control_key=key,
             provider=provider,
             status="unknown",
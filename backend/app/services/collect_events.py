@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections.abc import AsyncIterator, Callable, Iterator
+from dataclasses import dataclass, field
+
+from app.core.time import isoformat_z, utcnow
+
+
+@dataclass
+class _RunChannel:
+    events: list[dict] = field(default_factory=list)
+    # Sequence number of events[0]; older events were dropped to bound memory.
+    first_seq: int = 1
+    closed_at: float | None = None
+
+
+class EventBus:
+    """In-memory, per-run progress events for live collection streams.
+
+    A run is opened when its job is queued. Collectors publish small dicts keyed by
+    run id; subscribers replay what has been
+    published so far and then block for new events until the run is closed. Events
+    live in this process only: a stream must be served by the process running the job.
+    Closed runs are kept for retain_seconds so late subscribers still see the tail.
+
+    subscribe_async() is the event-loop variant used by HTTP streams: it awaits an
+    asyncio notification instead of parking a threadpool worker per open stream.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_events_per_run: int = 2000,
+        retain_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_events_per_run = max_events_per_run
+        self.retain_seconds = retain_seconds
+        self._clock = clock
+        self._runs: dict[str, _RunChannel] = {}
+        self._cond = threading.Condition()
+        # Async subscribers per run: (their event loop, the asyncio.Event to set).
+        self._waiters: dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+
+    def open(self, run_id) -> None:
+        with self._cond:
+            self._prune()
+            self._runs.setdefault(str(run_id), _RunChannel())
+
+    def publish(self, run_id, event_type: str, **data) -> None:
+        # Runs nobody opened (direct collector calls, scripts) are not recorded.
+        with self._cond:
+            channel = self._runs.get(str(run_id))
+            if channel is None or channel.closed_at is not None:
+                return
+            seq = channel.first_seq + len(channel.events)
+            channel.events.append({"seq": seq, "type": event_type, "at": isoformat_z(utcnow()), **data})
+            overflow = len(channel.events) - self.max_events_per_run
+            if overflow > 0:
+                del channel.events[:overflow]
+                channel.first_seq += overflow
+            self._cond.notify_all()
+            self._wake(str(run_id))
+
+    def close(self, run_id) -> None:
+        with self._cond:
+            channel = self._runs.get(str(run_id))
+            if channel is None:
+                return
+            channel.closed_at = self._clock()
+            self._cond.notify_all()
+            self._wake(str(run_id))
+
+    def has_run(self, run_id) -> bool:
+        """True while the run is open or its closed history is still retained."""
+        with self._cond:
+            return str(run_id) in self._runs
+
+    def subscribe(self, run_id, *, after_seq: int = 0, heartbeat_seconds: float = 15.0) -> Iterator[dict | None]:
+        """Yield events with seq > after_seq, then new ones until the run closes.
+
+        Yields None whenever heartbeat_seconds pass without an event so callers can
+        keep idle connections alive. Returns immediately for unknown runs.
+        """
+
+        key = str(run_id)
+        cursor = after_seq
+        while True:
+            with self._cond:
+                channel = self._runs.get(key)
+                if channel is None:
+                    return
+                pending = [e for e in channel.events if e["seq"] > cursor]
+                if not pending:
+                    if channel.closed_at is not None:
+                        return
+                    if self._cond.wait(timeout=heartbeat_seconds):
+                        continue
+            if not pending:
+                yield None
+                continue
+            for event in pending:
+                cursor = event["seq"]
+                yield event
+
+    async def subscribe_async(
+        self, run_id, *, after_seq: int = 0, heartbeat_seconds: float = 15.0
+    ) -> AsyncIterator[dict | None]:
+        """Async subscribe(): same events and heartbeats, without blocking a thread."""
+
+        key = str(run_id)
+        cursor = after_seq
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            self._waiters.setdefault(key, set()).add(waiter)
+        try:
+            while True:
+                with self._cond:
+                    channel = self._runs.get(key)
+                    if channel is None:
+                        return
+                    pending = [e for e in channel.events if e["seq"] > cursor]
+                    closed = channel.closed_at is not None
+                    # Cleared under the lock: anything published after this sets it again.
+                    waiter[1].clear()
+                if pending:
+                    for event in pending:
+                        cursor = event["seq"]
+                        yield event
+                    continue
+                if closed:
+                    return
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), timeout=heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._cond:
+                waiters = self._waiters.get(key)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[key]
+
+    def _wake(self, key: str) -> None:
+        # Called with the condition held, possibly from a collector thread.
+        for loop, event in self._waiters.get(key, ()):
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # Loop already closed; its subscriber is gone.
+
+    def _prune(self) -> None:
+        now = self._clock()
+        expired = [
+            k for k, c in self._runs.items() if c.closed_at is not None and now - c.closed_at > self.retain_seconds
+        ]
+        for k in expired:
+            del self._runs[k]
+
+
+collect_events = EventBus()
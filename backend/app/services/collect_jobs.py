@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from sqlalchemy.orm import Session
+
+from app.core.settings import get_settings
+from app.core.time import utcnow
+from app.db.session import supports_concurrent_sessions
+from app.models.collect_job import CollectJob
+from app.repos.audit_events import add_audit_event
+from app.repos.collect_jobs import (
+    active_job_for_user,
+    create_job_with_run,
+    fail_stale_jobs,
+    finish_job,
+    mark_job_running,
+    set_job_progress,
+    touch_jobs,
+)
+from app.repos.evidence import finish_run
+from app.services.collect import collect_now, collector_providers
+from app.services.collect_events import collect_events
+
+
+logger = logging.getLogger(__name__)
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+class _HeldJobs:
+    """Jobs this process has queued or is running, kept alive with a heartbeat.
+
+    One daemon thread touches updated_at of every held job each heartbeat interval, so
+    other processes can tell a long-running job (e.g. waiting out a provider rate limit)
+    from one orphaned by a restart. This process never fails a job it still holds.
+    """
+
+    def __init__(self):
+        self._jobs: dict[uuid.UUID, object] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def add(self, bind, job_id: uuid.UUID) -> None:
+        with self._lock:
+            self._jobs[job_id] = bind
+            if self._thread is None and supports_concurrent_sessions(bind):
+                self._thread = threading.Thread(target=self._beat, name="collect-job-heartbeat", daemon=True)
+                self._thread.start()
+
+    def discard(self, job_id: uuid.UUID) -> None:
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def ids(self) -> set[uuid.UUID]:
+        with self._lock:
+            return set(self._jobs)
+
+    def _beat(self) -> None:
+        while True:
+            time.sleep(max(1.0, get_settings().collect_job_heartbeat_seconds))
+            with self._lock:
+                by_bind: dict[object, list[uuid.UUID]] = {}
+                for job_id, bind in self._jobs.items():
+                    by_bind.setdefault(bind, []).append(job_id)
+            for bind, job_ids in by_bind.items():
+                if not supports_concurrent_sessions(bind):
+                    continue
+                try:
+                    with Session(bind=bind, autoflush=False) as db:
+                        touch_jobs(db, job_ids=job_ids)
+                except Exception:
+                    logger.exception("collect job heartbeat failed")
+
+
+_held = _HeldJobs()
+
+
+def _worker_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=max(1, get_settings().collect_job_workers),
+                thread_name_prefix="collect-job",
+            )
+        return _pool
+
+
+def start_collect_job(db: Session, *, user_id: uuid.UUID) -> CollectJob:
+    """Queue a collection for the user and return its job row without waiting for it.
+
+    A user has at most one active job; asking again returns the one already queued or
+    running, and a unique index settles concurrent requests. Active jobs whose heartbeat
+    is older than collect_job_stale_after_seconds were orphaned by a restart and are
+    failed first, unless this process still holds them.
+    The job runs on the in-process worker pool with its own session. Engines that
+    cannot share connections across threads (SQLite) run the job inline instead.
+    """
+
+    stale_after = get_settings().collect_job_stale_after_seconds
+    if stale_after > 0:
+        fail_stale_jobs(
+            db, user_id=user_id, cutoff=utcnow() - timedelta(seconds=stale_after), exclude=_held.ids()
+        )
+
+    progress = {p: "pending" for p in collector_providers()}
+    for _ in range(2):
+        active = active_job_for_user(db, user_id=user_id)
+        if active is not None:
+            return active
+        job = create_job_with_run(db, user_id=user_id, progress=progress)
+        if job is not None:
+            break
+        # Lost the race to a concurrent request: return its job, or retry if it already finished.
+    else:
+        raise RuntimeError("could not create a collect job")
+    collect_events.open(job.run_id)
+
+    bind = db.get_bind()
+    _held.add(bind, job.id)
+    if supports_concurrent_sessions(bind):
+        _worker_pool().submit(run_collect_job, bind, job.id)
+    else:
+        run_collect_job(bind, job.id)
+        db.refresh(job)
+    return job
+
+
+class _JobProgress:
+    # Collectors report from their own threads; serialize updates to the job row.
+    def __init__(self, bind, job_id: uuid.UUID, progress: dict):
+        self._bind = bind
+        self._job_id = job_id
+        self._progress = dict(progress)
+        self._lock = threading.Lock()
+
+    def __call__(self, provider: str, state: str) -> None:
+        with self._lock:
+            self._progress[provider] = state
+            with Session(bind=self._bind, autoflush=False) as db:
+                set_job_progress(db, job_id=self._job_id, progress=self._progress)
+
+
+def run_collect_job(bind, job_id: uuid.UUID) -> None:
+    try:
+        _run_collect_job(bind, job_id)
+    finally:
+        _held.discard(job_id)
+
+
+def _run_collect_job(bind, job_id: uuid.UUID) -> None:
+    with Session(bind=bind, autoflush=False) as db:
+        job = db.get(CollectJob, job_id)
+        if job is None:
+            return
+        user_id, run_id = job.user_id, job.run_id
+        progress = _JobProgress(bind, job_id, job.progress or {})
+        if not mark_job_running(db, job_id=job_id):
+            collect_events.close(run_id)
+            return
+
+        try:
+            res = collect_now(db, user_id=user_id, run_id=run_id, progress=progress)
+        except Exception as e:
+            db.rollback()
+            res = {"run_id": str(run_id), "status": "failed", "errors": [f"collect: {type(e).__name__}"]}
+            finish_run(db, run_id=run_id, status="failed", error_summary=res["errors"][0])
+
+        finish_job(db, job_id=job_id, status=res["status"], error_summary="; ".join(res["errors"]) or None)
+        collect_events.publish(run_id, "run_finished", job_id=str(job_id), status=res["status"], errors=res["errors"])
+        collect_events.close(run_id)
+        add_audit_event(
+            db,
+            user_id=user_id,
+            action="collect",
+            metadata={"job_id": str(job_id), "run_id": res["run_id"], "status": res["status"], "errors": res["errors"]},
+        )
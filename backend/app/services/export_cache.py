@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.core.settings import get_settings
+from app.services.export_store import all_user_exports_dirs, user_exports_dir
+
+
+# Bump whenever report.md / report.pdf / evidence-pack.zip rendering changes, so old
+# cache entries stop matching.
+TEMPLATE_VERSION = "3"
+
+REPORT_MD = "report.md"
+REPORT_PDF = "report.pdf"
+EVIDENCE_ZIP = "evidence-pack.zip"
+
+_FINGERPRINT_RE = re.compile(r"^[a-f0-9]{64}$")
+_evict_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class CachedRender:
+    report_md: Path
+    report_pdf: Path
+    evidence_zip: Path
+
+
+def export_fingerprint(
+    *,
+    user_id: str,
+    app_version: str,
+    stored_evidence_by_key: dict[str, dict],
+    blob_shas: set[str],
+) -> str:
+    """SHA-256 over everything the rendered payloads depend on.
+
+    Stored evidence keeps blob references, and blobs are content-addressed, so the set of
+    referenced hashes stands in for their bodies. The payloads' timestamp is derived from
+    the evidence, so it is covered too.
+    """
+
+    payload = {
+        "template_version": TEMPLATE_VERSION,
+        "app_version": app_version,
+        "user_id": user_id,
+        "evidence": stored_evidence_by_key,
+        "blobs": sorted(blob_shas),
+    }
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def enabled() -> bool:
+    return get_settings().export_cache_max_bytes > 0
+
+
+def lookup(*, user_id: str, fingerprint: str) -> CachedRender | None:
+    entry = _entry_dir(user_id=user_id, fingerprint=fingerprint)
+    render = CachedRender(
+        report_md=entry / REPORT_MD,
+        report_pdf=entry / REPORT_PDF,
+        evidence_zip=entry / EVIDENCE_ZIP,
+    )
+    if not all(p.is_file() for p in (render.report_md, render.report_pdf, render.evidence_zip)):
+        return None
+    try:
+        # Recency for LRU eviction.
+        os.utime(entry)
+    except OSError:
+        return None
+    return render
+
+
+def store(*, user_id: str, fingerprint: str, report_md: bytes, report_pdf: bytes, evidence_zip: Path) -> None:
+    """Save rendered payloads under users/<id>/cache/<fingerprint>/, then evict to the byte budget.
+
+    The entry is assembled in a temp directory and renamed into place, so readers never
+    see a partial entry; if another export stored the same fingerprint first, ours is dropped.
+    """
+
+    entry = _entry_dir(user_id=user_id, fingerprint=fingerprint)
+    if entry.exists():
+        return
+    tmp = entry.with_name(f".{fingerprint}.{uuid.uuid4().hex}.tmp")
+    tmp.mkdir(parents=True)
+    try:
+        (tmp / REPORT_MD).write_bytes(report_md)
+        (tmp / REPORT_PDF).write_bytes(report_pdf)
+        shutil.copyfile(evidence_zip, tmp / EVIDENCE_ZIP)
+        tmp.rename(entry)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        return
+    evict(max_bytes=get_settings().export_cache_max_bytes)
+
+
+def evict(*, max_bytes: int) -> int:
+    """Delete least recently used entries across all users until the cache fits max_bytes."""
+
+    with _evict_lock:
+        entries = []
+        for user_dir in all_user_exports_dirs():
+            cache_dir = user_dir / "cache"
+            if not cache_dir.is_dir():
+                continue
+            for entry in cache_dir.iterdir():
+                if not entry.is_dir() or not _FINGERPRINT_RE.match(entry.name):
+                    continue
+                try:
+                    size = sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+                    entries.append((entry.stat().st_mtime, size, entry))
+                except OSError:
+                    continue
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+def link_or_copy(src: Path, dst: Path) -> None:
+    # A hard link pins the cached bytes even if the entry is evicted mid-export.
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _entry_dir(*, user_id: str, fingerprint: str) -> Path:
+    if not _FINGERPRINT_RE.match(fingerprint):
+        raise ValueError("Invalid export fingerprint")
+    return user_exports_dir(user_id=user_id) / "cache" / fingerprint
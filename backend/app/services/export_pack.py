@@ -3,111 +3,227 @@ from __future__ import annotations
 import base64
 import hashlib
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
 
 from app.core.time import utcnow
-from io import BytesIO
-from zipfile import ZIP_DEFLATED, ZipFile
+from zipfile import ZipFile
 
 from sqlalchemy.orm import Session
 
-from app.export.evidence_zip import build_evidence_zip
+from app.core.settings import get_settings
+from app.core.workers import BoundedProcessPool, WorkerPoolSaturated, process_pool
+
+from app.export.evidence_zip import write_evidence_zip
 from app.export.report_md import render_report_md
 from app.export.report_pdf import render_report_pdf
-from app.repos.evidence import add_control_evidence, latest_evidence_all_controls, latest_run
+from app.repos.evidence import add_control_evidence, current_evidence_all_controls, latest_run
+from app.repos.evidence_blobs import blob_shas, encode_blob, load_blobs, resolve_blob_refs
+from app.services import export_cache
 from app.services.control_defs import CONTROLS
-from app.services.export_store import store_export_pack
+from app.services.export_store import PackWriter, StoredExport, open_pack_writer
 from app.services.pack_signing import canonical_manifest_bytes, ensure_signing_material
 
 
-def export_pack(db: Session, *, user_id) -> bytes:
+def export_pack(db: Session, *, user_id) -> StoredExport:
+    """Build, sign and store a pack for the user's current evidence; returns the stored file.
+
+    The pack is assembled straight into a temp file under exports_dir (see
+    export_store.PackWriter) and renamed into place, so its size never has to fit in memory.
+    """
     run = latest_run(db, user_id=user_id)
     if run is None:
         raise ValueError("No evidence collected yet")
 
-    generated_at = utcnow()
+    created_at = utcnow()
     app_version = "0.1.0"
     export_id = uuid.uuid4().hex
 
     signing = ensure_signing_material()
 
-    rows = {r.control_key: r for r in latest_evidence_all_controls(db, user_id=user_id)}
+    rows = {r.control_key: r for r in current_evidence_all_controls(db, user_id=user_id)}
+    # The rendered payloads are stamped with the evidence time, not the wall clock, so
+    # unchanged evidence renders byte-identical payloads; the export time is only in the
+    # signed pack_manifest.json.
+    generated_at = _evidence_as_of(run, rows)
+    blobs = load_blobs(db, user_id=user_id, shas=set().union(*(blob_shas(r.artifacts) for r in rows.values())))
+    # Reports read resolved artifacts; the evidence zip keeps references and stores each blob once.
     evidence_by_key: dict[str, dict] = {}
+    stored_evidence_by_key: dict[str, dict] = {}
 
     for c in CONTROLS:
         r = rows.get(c.key)
         if r is None:
             evidence_by_key[c.key] = {"status": "unknown", "collected_at": None, "notes": "No evidence.", "artifacts": {}}
+            stored_evidence_by_key[c.key] = evidence_by_key[c.key]
             continue
-        evidence_by_key[c.key] = {
+        stored_evidence_by_key[c.key] = {
             "status": r.status,
             "collected_at": r.collected_at.isoformat() + "Z",
             "notes": r.notes,
             "artifacts": r.artifacts,
         }
+        evidence_by_key[c.key] = {
+            **stored_evidence_by_key[c.key],
+            "artifacts": resolve_blob_refs(r.artifacts, blobs),
+        }
+
+    with open_pack_writer(user_id=str(user_id), export_id=export_id) as pack:
+        # Unchanged evidence reuses previously rendered payloads; the manifest and signature
+        # below are still fresh for every export.
+        fingerprint = export_cache.export_fingerprint(
+            user_id=str(user_id),
+            app_version=app_version,
+            stored_evidence_by_key=stored_evidence_by_key,
+            blob_shas=set(blobs),
+        )
+        payloads = _cached_payloads(pack, user_id=str(user_id), fingerprint=fingerprint)
+        if payloads is None:
+            payloads = _render_payloads(
+                pack,
+                generated_at=generated_at,
+                app_version=app_version,
+                user_id=str(user_id),
+                evidence_by_key=evidence_by_key,
+                stored_evidence_by_key=stored_evidence_by_key,
+                blobs={sha: encode_blob(body)[1] for sha, body in blobs.items()},
+            )
+            if export_cache.enabled():
+                export_cache.store(
+                    user_id=str(user_id),
+                    fingerprint=fingerprint,
+                    report_md=payloads[0],
+                    report_pdf=payloads[1],
+                    evidence_zip=payloads[2],
+                )
+        report_md, report_pdf, evidence_zip_path = payloads
+        # Entries go in sorted name order (deterministic zip), independent of render completion order.
+        pack_hashes = {
+            "evidence-pack.zip": pack.write_file("evidence-pack.zip", evidence_zip_path),
+            "report.md": hashlib.sha256(report_md).hexdigest(),
+            "report.pdf": hashlib.sha256(report_pdf).hexdigest(),
+        }
+
+        # Pack-level manifest + signature (tamper-evident).
+        pack_manifest = {
+            "export_id": export_id,
+            "created_at_utc": created_at.isoformat() + "Z",
+            "run_id": str(run.id),
+            "app_version": app_version,
+            "mode": signing.mode,
+            "public_key_b64": signing.public_key_b64,
+            "hashes": {k: pack_hashes[k] for k in sorted(pack_hashes)},
+        }
+        pack_manifest_bytes = canonical_manifest_bytes(pack_manifest)
+        sig_bytes = signing.sign(pack_manifest_bytes)
+        pack_sig_text = base64.b64encode(sig_bytes).decode("ascii") + "\n"
+        pack.write_bytes("pack_manifest.json", pack_manifest_bytes)
+        pack.write_bytes("pack_manifest.sig", pack_sig_text.encode("utf-8"))
+        pack.write_bytes("report.md", report_md)
+        pack.write_bytes("report.pdf", report_pdf)
+
+        integrity_status, integrity_artifacts, integrity_notes = _validate_manifest(evidence_zip_path)
+        add_control_evidence(
+            db,
+            user_id=user_id,
+            run_id=run.id,
+            control_key="pack.export_integrity",
+            provider="pack",
+            status=integrity_status,
+            artifacts=integrity_artifacts,
+            notes=integrity_notes,
+            # Stamped like the payloads, so the next export of the same evidence renders identically.
+            collected_at=generated_at,
+        )
+        return pack.commit()
+
+
+def _evidence_as_of(run, rows: dict) -> datetime:
+    """Newest collected_at among the exported evidence (the run's end when there is none).
+
+    pack.export_integrity is left out: it is written by the exports themselves.
+    """
+    collected = [r.collected_at for key, r in rows.items() if key != "pack.export_integrity"]
+    if collected:
+        return max(collected)
+    return run.finished_at or run.started_at
+
+
+def _cached_payloads(pack: PackWriter, *, user_id: str, fingerprint: str) -> tuple[bytes, bytes, Path] | None:
+    if not export_cache.enabled():
+        return None
+    cached = export_cache.lookup(user_id=user_id, fingerprint=fingerprint)
+    if cached is None:
+        return None
+    try:
+        evidence_zip_path = pack.scratch_path(".evidence-pack.zip")
+        export_cache.link_or_copy(cached.evidence_zip, evidence_zip_path)
+        return cached.report_md.read_bytes(), cached.report_pdf.read_bytes(), evidence_zip_path
+    except OSError:
+        # Evicted between lookup and read: render from scratch.
+        return None
+
+
+def _render_payloads(
+    pack: PackWriter,
+    *,
+    generated_at: datetime,
+    app_version: str,
+    user_id: str,
+    evidence_by_key: dict[str, dict],
+    stored_evidence_by_key: dict[str, dict],
+    blobs: dict[str, bytes],
+) -> tuple[bytes, bytes, Path]:
+    """Render report.md, report.pdf and the evidence zip concurrently.
+
+    The three are independent functions of the evidence. The PDF (reportlab, CPU-bound)
+    runs in a worker process; markdown and the zip (mostly I/O) run on threads. Export
+    latency is then roughly the PDF render time.
+    """
+
+    evidence_zip_path = pack.scratch_path(".evidence-pack.zip")
+
+    def render_zip() -> Path:
+        with open(evidence_zip_path, "wb") as f:
+            write_evidence_zip(
+                f,
+                generated_at=generated_at,
+                app_version=app_version,
+                user_id=user_id,
+                evidence_by_key=stored_evidence_by_key,
+                blobs=blobs,
+            )
+        return evidence_zip_path
+
+    report_kwargs = {"generated_at": generated_at, "app_version": app_version, "evidence_by_key": evidence_by_key}
+    with ThreadPoolExecutor(max_workers=3, thread_name_prefix="export-render") as ex:
+        pdf = ex.submit(_render_pdf, report_kwargs)
+        zip_path = ex.submit(render_zip)
+        md = ex.submit(lambda: render_report_md(**report_kwargs).encode("utf-8"))
+        return md.result(), pdf.result(), zip_path.result()
+
+
+def _pdf_pool() -> BoundedProcessPool:
+    workers = get_settings().export_pdf_workers
+    return process_pool("export-pdf", max_workers=workers, max_queued=0)
+
+
+def _render_pdf(report_kwargs: dict) -> bytes:
+    try:
+        return _pdf_pool().call(render_report_pdf, **report_kwargs)
+    except WorkerPoolSaturated:
+        # Every PDF worker is busy: render on this thread rather than wait in line.
+        return render_report_pdf(**report_kwargs)
+
 
-    report_md = render_report_md(generated_at=generated_at, app_version=app_version, evidence_by_key=evidence_by_key).encode("utf-8")
-    report_pdf = render_report_pdf(generated_at=generated_at, app_version=app_version, evidence_by_key=evidence_by_key)
-
-    evidence_zip_bytes, _manifest = build_evidence_zip(
-        generated_at=generated_at,
-        app_version=app_version,
-        user_id=str(user_id),
-        evidence_by_key=evidence_by_key,
-    )
-
-    # Pack-level manifest + signature (tamper-evident).
-    pack_hashes = {
-        "report.md": hashlib.sha256(report_md).hexdigest(),
-        "report.pdf": hashlib.sha256(report_pdf).hexdigest(),
-        "evidence-pack.zip": hashlib.sha256(evidence_zip_bytes).hexdigest(),
-    }
-    pack_manifest = {
-        "export_id": export_id,
-        "created_at_utc": generated_at.isoformat() + "Z",
-        "run_id": str(run.id),
-        "app_version": app_version,
-        "mode": signing.mode,
-        "public_key_b64": signing.public_key_b64,
-        "hashes": {k: pack_hashes[k] for k in sorted(pack_hashes)},
-    }
-    pack_manifest_bytes = canonical_manifest_bytes(pack_manifest)
-    sig_bytes = signing.sign(pack_manifest_bytes)
-    pack_sig_text = base64.b64encode(sig_bytes).decode("ascii") + "\n"
-
-    integrity_status, integrity_artifacts, integrity_notes = _validate_manifest(evidence_zip_bytes)
-    add_control_evidence(
-        db,
-        user_id=user_id,
-        run_id=run.id,
-        control_key="pack.export_integrity",
-        provider="pack",
-        status=integrity_status,
-        artifacts=integrity_artifacts,
-        notes=integrity_notes,
-        collected_at=generated_at,
-    )
-
-    outer = BytesIO()
-    with ZipFile(outer, "w", compression=ZIP_DEFLATED) as z:
-        z.writestr("report.md", report_md)
-        z.writestr("report.pdf", report_pdf)
-        z.writestr("evidence-pack.zip", evidence_zip_bytes)
-        z.writestr("pack_manifest.json", pack_manifest_bytes)
-        z.writestr("pack_manifest.sig", pack_sig_text.encode("utf-8"))
-
-    payload = outer.getvalue()
-    store_export_pack(user_id=str(user_id), export_id=export_id, pack_bytes=payload)
-    return payload
-
-
-def _validate_manifest(evidence_zip_bytes: bytes) -> tuple[str, dict, str]:
+def _validate_manifest(evidence_zip_path: Path) -> tuple[str, dict, str]:
     import json
 
     try:
-        with ZipFile(BytesIO(evidence_zip_bytes), "r") as z:
+        with ZipFile(evidence_zip_path, "r") as z:
             manifest = json.loads(z.read("manifest.json").decode("utf-8"))
-            files = manifest.get("files") or []
+            files = [*(manifest.get("files") or []), *(manifest.get("blobs") or [])]
             missing = []
             bad_hash = []
             for f in files:
@@ -1,12 +1,20 @@
 from __future__ import annotations
 
+import hashlib
+import os
 import re
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
 
 from app.core.settings import get_settings
+from app.export.zip_writer import DeterministicZip
 
 
 _EXPORT_ID_RE = re.compile(r"^[a-f0-9]{32}$")
+_COPY_CHUNK = 1024 * 1024
 
 
 def _backend_root() -> Path:
@@ -22,32 +30,139 @@ def _exports_root() -> Path:
     return _backend_root() / p
 
 
+def user_exports_dir(*, user_id: str) -> Path:
+    # Per-user namespace avoids collisions and enables wipe-by-user.
+    return _exports_root() / "users" / user_id
+
+
+def all_user_exports_dirs() -> list[Path]:
+    users = _exports_root() / "users"
+    return [p for p in users.iterdir() if p.is_dir()] if users.is_dir() else []
+
+
 def export_pack_path(*, user_id: str, export_id: str) -> Path:
     if not _EXPORT_ID_RE.match(export_id):
         raise ValueError("Invalid export_id")
-    # Per-user namespace avoids collisions and enables wipe-by-user.
-    return _exports_root() / "users" / user_id / f"{export_id}.zip"
+    return user_exports_dir(user_id=user_id) / f"{export_id}.zip"
+
+
+@dataclass(frozen=True)
+class StoredExport:
+    export_id: str
+    path: Path
+    size_bytes: int
+    sha256: str
+
+
+class _HashingWriter:
+    # Write-only, non-seekable file wrapper: the zip writer then streams entries with data
+    # descriptors instead of seeking back, so every byte is hashed exactly once.
+    def __init__(self, fp):
+        self._fp = fp
+        self._hash = hashlib.sha256()
+        self._size = 0
+
+    def write(self, data) -> int:
+        self._fp.write(data)
+        self._hash.update(data)
+        self._size += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._size
+
+    def flush(self) -> None:
+        self._fp.flush()
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+class PackWriter:
+    """Builds an export pack zip directly in a temp file under the user's export folder.
+
+    Entries are streamed into the zip (write_file copies in chunks), their SHA-256 is
+    computed while writing, and the whole pack's SHA-256 is computed as bytes hit disk.
+    Entries use deterministic headers and must be written in sorted name order.
+    Use via open_pack_writer(), which renames the finished file into place atomically.
+    """
+
+    def __init__(self, *, export_id: str, path: Path):
+        self.export_id = export_id
+        self.path = path
+        self._tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        self._scratch: list[Path] = []
+        self._fp = open(self._tmp, "wb")
+        self._out = _HashingWriter(self._fp)
+        self._zip = DeterministicZip(self._out)
+
+    def scratch_path(self, suffix: str) -> Path:
+        """A temp path next to the pack for intermediate files; removed when the writer finishes."""
+        p = self.path.with_name(f".{self.export_id}.{uuid.uuid4().hex}{suffix}")
+        self._scratch.append(p)
+        return p
+
+    def write_bytes(self, name: str, data: bytes) -> str:
+        self._zip.writestr(name, data)
+        return hashlib.sha256(data).hexdigest()
+
+    def write_file(self, name: str, src: Path) -> str:
+        h = hashlib.sha256()
+        with open(src, "rb") as f, self._zip.open(name, file_size=src.stat().st_size) as dest:
+            while chunk := f.read(_COPY_CHUNK):
+                h.update(chunk)
+                dest.write(chunk)
+        return h.hexdigest()
+
+    def commit(self) -> StoredExport:
+        self._zip.close()
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+        self._fp.close()
+        self._tmp.replace(self.path)
+        self._cleanup_scratch()
+        return StoredExport(
+            export_id=self.export_id,
+            path=self.path,
+            size_bytes=self._out.tell(),
+            sha256=self._out.hexdigest(),
+        )
+
+    def abort(self) -> None:
+        try:
+            self._zip.close()
+        except Exception:
+            pass
+        self._fp.close()
+        self._tmp.unlink(missing_ok=True)
+        self._cleanup_scratch()
+
+    def _cleanup_scratch(self) -> None:
+        for p in self._scratch:
+            p.unlink(missing_ok=True)
 
 
-def store_export_pack(*, user_id: str, export_id: str, pack_bytes: bytes) -> Path:
+@contextmanager
+def open_pack_writer(*, user_id: str, export_id: str) -> Iterator[PackWriter]:
+    """Yield a PackWriter for the pack's final path; the temp file is discarded on error."""
     path = export_pack_path(user_id=user_id, export_id=export_id)
     path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = path.with_suffix(".zip.tmp")
-    tmp.write_bytes(pack_bytes)
-    tmp.replace(path)
-    return path
+    writer = PackWriter(export_id=export_id, path=path)
+    try:
+        yield writer
+    except BaseException:
+        writer.abort()
+        raise
 
 
-def load_export_pack(*, user_id: str, export_id: str) -> bytes | None:
+def stored_export_path(*, user_id: str, export_id: str) -> Path | None:
     path = export_pack_path(user_id=user_id, export_id=export_id)
-    if not path.exists():
-        return None
-    return path.read_bytes()
+    return path if path.exists() else None
 
 
 def delete_exports_for_user(*, user_id: str) -> None:
     # Best-effort recursive delete.
-    root = _exports_root() / "users" / user_id
+    root = user_exports_dir(user_id=user_id)
     if not root.exists():
         return
     for p in sorted(root.rglob("*"), reverse=True):
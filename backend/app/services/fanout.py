@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def bounded_map(fn: Callable[[T], R], items: Iterable[T], *, max_in_flight: int) -> list[R]:
+    """Apply fn to every item with at most max_in_flight calls running at once.
+
+    Results are returned in input order regardless of completion order, so callers
+    can rely on deterministic output. An exception raised by fn propagates to the
+    caller (remaining calls are still allowed to finish).
+    """
+
+    items = list(items)
+    if max_in_flight <= 1 or len(items) <= 1:
+        return [fn(x) for x in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_in_flight, len(items))) as pool:
+        return list(pool.map(fn, items))
@@ -1,19 +1,27 @@
 from __future__ import annotations
 
 import base64
+import hashlib
+import hmac
 import json
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Any
 
 from app.core.time import isoformat_z, utcnow
 from pathlib import Path
 
-from app.core.settings import get_settings
-from app.crypto.fernet import decrypt_str, encrypt_str
+from app.core.settings import get_settings, parse_fernet_keys
+from app.crypto.fernet import decrypt_str, encrypt_str, rotate_str
 
 
 _STATE_FILENAME = "pack_signing_key.json"
 
+# Process-level cache of decrypted signing material, keyed by _fingerprint().
+_cache_lock = threading.Lock()
+_cached: tuple[tuple, SigningMaterial] | None = None
+
 
 def _app_dir() -> Path:
     # backend/app
@@ -40,33 +48,27 @@ def _b64d(s: str) -> bytes:
 class SigningMaterial:
     mode: str  # ed25519|hmac
     public_key_b64: str | None
+    # Decrypted key objects, loaded once by load_signing_material and kept in memory.
+    private_key: Any = field(default=None, repr=False, compare=False)
+    public_key: Any = field(default=None, repr=False, compare=False)
+    hmac_key: bytes | None = field(default=None, repr=False, compare=False)
 
     def sign(self, message: bytes) -> bytes:
         if self.mode == "ed25519":
-            priv = _load_ed25519_private_key()
-            return priv.sign(message)
+            return self.private_key.sign(message)
         if self.mode == "hmac":
-            import hmac
-            import hashlib
-
-            key = _hmac_key_from_fernet()
-            return hmac.new(key, message, hashlib.sha256).digest()
+            return hmac.new(self.hmac_key, message, hashlib.sha256).digest()
         raise ValueError("Unknown signing mode")
 
     def verify(self, message: bytes, signature: bytes) -> bool:
         if self.mode == "ed25519":
-            pub = _load_ed25519_public_key()
             try:
-                pub.verify(signature, message)
+                self.public_key.verify(signature, message)
                 return True
             except Exception:
                 return False
         if self.mode == "hmac":
-            import hmac
-            import hashlib
-
-            key = _hmac_key_from_fernet()
-            expected = hmac.new(key, message, hashlib.sha256).digest()
+            expected = hmac.new(self.hmac_key, message, hashlib.sha256).digest()
             return hmac.compare_digest(expected, signature)
         return False
 
@@ -79,13 +81,28 @@ def ensure_signing_material() -> SigningMaterial:
     Failure mode: if the Fernet key changes and the private key cannot be decrypted,
     a new signing key is generated (older packs may no longer verify against this
     instance's trust anchor).
+
+    The decrypted material is cached per process; the key file is only re-read when
+    its mtime/size/inode or the Fernet key ring changes, so per-export and per-verify
+    calls cost one stat().
     """
+    with _cache_lock:
+        return _ensure_signing_material_locked()
+
+
+def _ensure_signing_material_locked() -> SigningMaterial:
+    global _cached
     path = _state_path()
-    path.parent.mkdir(parents=True, exist_ok=True)
+    fingerprint = _fingerprint()
+    if fingerprint is not None and _cached is not None and _cached[0] == fingerprint:
+        return _cached[1]
 
-    if path.exists():
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fingerprint is not None:
         try:
-            return load_signing_material()
+            material = load_signing_material()
+            _cached = (fingerprint, material)
+            return material
         except Exception:
             # Corrupt or undecryptable -> rotate.
             pass
@@ -121,6 +138,32 @@ def ensure_signing_material() -> SigningMaterial:
             "created_at_utc": isoformat_z(utcnow()),
         }
 
+    _write_state(payload)
+    fingerprint = _fingerprint()
+    material = load_signing_material()
+    _cached = (fingerprint, material) if fingerprint is not None else None
+    return material
+
+
+def reencrypt_signing_key() -> bool:
+    """Re-encrypt the stored Ed25519 private key under the primary Fernet key.
+
+    Part of Fernet key rotation; returns False when there is nothing to re-encrypt
+    (no key file yet, or HMAC mode). Raises ValueError if no key in the ring decrypts it.
+    """
+    path = _state_path()
+    if not path.exists():
+        return False
+    obj = json.loads(path.read_text("utf-8"))
+    if obj.get("mode") != "ed25519" or not obj.get("encrypted_private_key"):
+        return False
+    obj["encrypted_private_key"] = rotate_str(obj["encrypted_private_key"])
+    _write_state(obj)
+    return True
+
+
+def _write_state(payload: dict) -> None:
+    path = _state_path()
     tmp = path.with_suffix(".tmp")
     tmp.write_text(json.dumps(payload, sort_keys=True, indent=2) + "\n", encoding="utf-8")
     try:
@@ -129,8 +172,6 @@ def ensure_signing_material() -> SigningMaterial:
         pass
     tmp.replace(path)
 
-    return load_signing_material()
-
 
 def load_signing_material() -> SigningMaterial:
     obj = json.loads(_state_path().read_text("utf-8"))
@@ -140,11 +181,17 @@ def load_signing_material() -> SigningMaterial:
         enc_priv = obj.get("encrypted_private_key")
         if not pub or not enc_priv:
             raise ValueError("Incomplete signing key material")
-        # Verify decryptability now (so we rotate early if Fernet changed).
-        _ = decrypt_str(enc_priv)
-        return SigningMaterial(mode="ed25519", public_key_b64=pub)
+        from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+
+        # Decrypting here also surfaces a changed Fernet key early (so we rotate).
+        return SigningMaterial(
+            mode="ed25519",
+            public_key_b64=pub,
+            private_key=Ed25519PrivateKey.from_private_bytes(_b64d(decrypt_str(enc_priv))),
+            public_key=Ed25519PublicKey.from_public_bytes(_b64d(pub)),
+        )
     if mode == "hmac":
-        return SigningMaterial(mode="hmac", public_key_b64=None)
+        return SigningMaterial(mode="hmac", public_key_b64=None, hmac_key=_hmac_key_from_fernet())
     raise ValueError("Unknown signing mode")
 
 
@@ -153,27 +200,17 @@ def canonical_manifest_bytes(manifest: dict) -> bytes:
     return (json.dumps(manifest, sort_keys=True, separators=(",", ":")) + "\n").encode("utf-8")
 
 
-def _hmac_key_from_fernet() -> bytes:
-    import hashlib
+def _fingerprint() -> tuple | None:
+    # Changes whenever the key file is rewritten (rotation, re-encryption) or the Fernet keys change.
+    try:
+        st = _state_path().stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino, tuple(parse_fernet_keys(get_settings())))
 
+
+def _hmac_key_from_fernet() -> bytes:
     settings = get_settings()
     # Derive a dedicated MAC key from the Fernet key material.
     return hashlib.sha256(("dkpack-export-mac:" + settings.fernet_key).encode("utf-8")).digest()
 
-
-def _load_ed25519_private_key():
-    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
-    from cryptography.hazmat.primitives import serialization
-
-    obj = json.loads(_state_path().read_text("utf-8"))
-    enc_priv = obj["encrypted_private_key"]
-    priv_raw = _b64d(decrypt_str(enc_priv))
-    return Ed25519PrivateKey.from_private_bytes(priv_raw)
-
-
-def _load_ed25519_public_key():
-    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
-
-    obj = json.loads(_state_path().read_text("utf-8"))
-    pub_raw = _b64d(obj["public_key_b64"])
-    return Ed25519PublicKey.from_public_bytes(pub_raw)
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session
+
+from app.core.settings import get_settings
+from app.core.time import utcnow
+from app.repos.evidence import blob_shas_for_runs, current_run_ids, delete_runs, list_runs, users_with_runs
+from app.repos.evidence_blobs import blob_shas_created_before, delete_unreferenced_blobs
+from app.repos.evidence_partitions import (
+    drop_evidence_partitions,
+    ensure_evidence_partitions,
+    month_start,
+    next_month,
+    partitions_before,
+    partitions_without_live_runs,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    keep_runs: int
+    weekly_after_days: int = 30
+    monthly_after_days: int = 180
+    max_age_days: int = 0
+
+    @classmethod
+    def from_settings(cls) -> RetentionPolicy:
+        settings = get_settings()
+        return cls(
+            keep_runs=settings.evidence_retention_keep_runs,
+            weekly_after_days=settings.evidence_retention_weekly_after_days,
+            monthly_after_days=settings.evidence_retention_monthly_after_days,
+            max_age_days=settings.evidence_retention_max_age_days,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.keep_runs > 0 or self.max_age_days > 0
+
+    def age_cutoff(self, now: datetime) -> datetime | None:
+        return now - timedelta(days=self.max_age_days) if self.max_age_days > 0 else None
+
+
+@dataclass
+class RetentionReport:
+    users: int = 0
+    runs_deleted: int = 0
+    evidence_deleted: int = 0
+    blobs_deleted: int = 0
+    partitions_dropped: int = 0
+
+
+def runs_to_prune(
+    runs: list[tuple[uuid.UUID, datetime, str]],
+    *,
+    policy: RetentionPolicy,
+    protected: set[uuid.UUID],
+    now: datetime,
+) -> list[uuid.UUID]:
+    """Pick prunable run ids from (id, started_at, status) tuples ordered newest first.
+
+    Kept: the newest keep_runs runs, protected runs (backing current evidence), runs
+    still in progress, every run younger than weekly_after_days, and the newest run of
+    each ISO week (then each month after monthly_after_days) for older history.
+    With max_age_days set, every unprotected run older than that is pruned regardless.
+    """
+
+    if not policy.enabled:
+        return []
+    age_cutoff = policy.age_cutoff(now)
+    weekly_cutoff = now - timedelta(days=policy.weekly_after_days)
+    monthly_cutoff = now - timedelta(days=policy.monthly_after_days)
+
+    prune: list[uuid.UUID] = []
+    seen_buckets: set[tuple] = set()
+    for index, (run_id, started_at, status) in enumerate(runs):
+        started_at = _as_aware_utc(started_at)
+        if started_at < monthly_cutoff:
+            bucket: tuple | None = ("month", started_at.year, started_at.month)
+        elif started_at < weekly_cutoff:
+            bucket = ("week", *started_at.isocalendar()[:2])
+        else:
+            bucket = None
+        # The first (newest) run seen in a bucket represents it.
+        first_in_bucket = bucket is not None and bucket not in seen_buckets
+        if bucket is not None:
+            seen_buckets.add(bucket)
+
+        if run_id in protected or status == "running":
+            continue
+        if age_cutoff is not None and started_at < age_cutoff:
+            prune.append(run_id)
+            continue
+        if policy.keep_runs <= 0 or index < policy.keep_runs:
+            continue
+        if bucket is None or first_in_bucket:
+            continue
+        prune.append(run_id)
+    return prune
+
+
+def prune_evidence(
+    db: Session,
+    *,
+    policy: RetentionPolicy,
+    batch_size: int = 500,
+    user_id: uuid.UUID | None = None,
+    dry_run: bool = False,
+    now: datetime | None = None,
+) -> RetentionReport:
+    """Apply the retention policy to one user (or everyone) and report what was removed.
+
+    On a partitioned Postgres table, whole months older than max_age_days are dropped
+    as partitions first (all users at once, so only when user_id is None), skipping any
+    month that still holds rows of a protected or running run. The runs whose evidence
+    lived there are older than max_age_days and unprotected, so the row-by-row pass that
+    follows deletes their evidence_runs rows along with leftovers from the boundary month.
+    """
+
+    now = now or utcnow()
+    report = RetentionReport()
+    age_cutoff = policy.age_cutoff(now)
+    dropped_partitions = False
+    if age_cutoff is not None and user_id is None:
+        expired = partitions_without_live_runs(db.get_bind(), partitions_before(db.get_bind(), age_cutoff))
+        report.partitions_dropped = len(expired)
+        if expired and not dry_run:
+            db.commit()
+            drop_evidence_partitions(db.get_bind(), expired)
+            dropped_partitions = True
+
+    user_ids = [user_id] if user_id is not None else users_with_runs(db)
+    for uid in user_ids:
+        if dropped_partitions:
+            # Evidence in dropped partitions is gone; its blobs are the ones written back then.
+            orphaned = blob_shas_created_before(db, user_id=uid, cutoff=age_cutoff)
+            report.blobs_deleted += delete_unreferenced_blobs(db, user_id=uid, shas=orphaned)
+        runs = [(r.id, r.started_at, r.status) for r in list_runs(db, user_id=uid)]
+        prune = runs_to_prune(runs, policy=policy, protected=current_run_ids(db, user_id=uid), now=now)
+        report.users += 1
+        if not prune:
+            continue
+        report.runs_deleted += len(prune)
+        if dry_run:
+            continue
+        candidates = blob_shas_for_runs(db, run_ids=prune, batch_size=batch_size)
+        report.evidence_deleted += delete_runs(db, run_ids=prune, batch_size=batch_size)
+        report.blobs_deleted += delete_unreferenced_blobs(db, user_id=uid, shas=candidates)
+    return report
+
+
+def start_retention_task(engine: Engine, *, interval_seconds: float) -> threading.Event:
+    """Prune evidence every interval_seconds on a daemon thread; set the returned event to stop."""
+
+    stop = threading.Event()
+
+    def _loop() -> None:
+        while True:
+            try:
+                # Keep this and next month's evidence partitions ahead of the insert path.
+                this_month = month_start(utcnow())
+                ensure_evidence_partitions(engine, [this_month, next_month(this_month)])
+            except Exception:
+                logger.exception("evidence partition maintenance failed")
+            if stop.wait(interval_seconds):
+                return
+            try:
+                with Session(bind=engine, autoflush=False) as db:
+                    report = prune_evidence(
+                        db,
+                        policy=RetentionPolicy.from_settings(),
+                        batch_size=get_settings().evidence_retention_batch_size,
+                    )
+                logger.info("evidence retention: %s", report)
+            except Exception:
+                logger.exception("evidence retention failed")
+
+    threading.Thread(target=_loop, name="evidence-retention", daemon=True).start()
+    return stop
+
+
+def _as_aware_utc(dt: datetime) -> datetime:
+    # SQLite returns naive datetimes; treat them as UTC.
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.core.settings import get_settings
+from app.core.time import utcnow
+from app.repos.sessions import touch_sessions
+
+
+logger = logging.getLogger(__name__)
+
+
+class SessionActivityRecorder:
+    """Coalesces session last_seen_at updates into occasional batched writes.
+
+    record() is called on every authenticated request but only queues a touch when the
+    session's last written last_seen_at is at least granularity old; flush() then writes
+    everything queued (from any number of requests) in one executemany UPDATE. So
+    last_seen_at stays accurate to within granularity at one write per session per
+    window instead of one write per request.
+
+    A scheduled flush can be lost (Starlette drops background tasks when the request ends
+    in an error response), so a session that is still pending a granularity after the last
+    scheduled flush asks for another one rather than waiting forever.
+    """
+
+    def __init__(self, *, granularity: timedelta):
+        self.granularity = granularity
+        self._written: dict[uuid.UUID, datetime] = {}
+        self._pending: dict[uuid.UUID, datetime] = {}
+        self._scheduled_at: datetime | None = None
+        self._lock = threading.Lock()
+
+    def seen(self, session_id: uuid.UUID, last_seen_at: datetime) -> None:
+        """Note a last_seen_at value already stored in the database (e.g. on session load)."""
+
+        with self._lock:
+            written = self._written.get(session_id)
+            if written is None or last_seen_at > written:
+                self._written[session_id] = last_seen_at
+
+    def record(self, session_id: uuid.UUID, *, now: datetime | None = None) -> bool:
+        """Register activity; returns True when the caller should schedule a flush."""
+
+        now = now or utcnow()
+        with self._lock:
+            if session_id in self._pending:
+                # A flush is already scheduled and will pick up the newer timestamp, unless it
+                # has been outstanding long enough that it was evidently dropped.
+                self._pending[session_id] = now
+                if self._scheduled_at is not None and now - self._scheduled_at < self.granularity:
+                    return False
+                self._scheduled_at = now
+                return True
+            written = self._written.get(session_id)
+            if written is not None and now - written < self.granularity:
+                return False
+            self._pending[session_id] = now
+            self._written[session_id] = now
+            self._scheduled_at = now
+            return True
+
+    def flush(self, bind: Engine | Connection) -> int:
+        """Write all pending touches in one batch; returns the number of sessions queued."""
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._scheduled_at = None
+            # Sessions idle longer than the window need no bookkeeping: their next request writes anyway.
+            horizon = utcnow() - self.granularity
+            self._written = {sid: ts for sid, ts in self._written.items() if ts >= horizon}
+        if not pending:
+            return 0
+        try:
+            with Session(bind=bind, autoflush=False) as db:
+                touch_sessions(db, touches=pending)
+        except Exception:
+            logger.exception("session activity flush failed")
+            with self._lock:
+                for sid in pending:
+                    self._written.pop(sid, None)
+        return len(pending)
+
+
+_recorder: SessionActivityRecorder | None = None
+_recorder_lock = threading.Lock()
+
+
+def session_activity() -> SessionActivityRecorder:
+    """Return the process-wide recorder, configured from settings on first use."""
+    global _recorder
+    with _recorder_lock:
+        if _recorder is None:
+            seconds = get_settings().session_touch_granularity_seconds
+            _recorder = SessionActivityRecorder(granularity=timedelta(seconds=max(0.0, seconds)))
+        return _recorder
@@ -0,0 +1,99 @@
+import base64
+
+
+def _fernet_key() -> str:
+    return base64.urlsafe_b64encode(b"A" * 32).decode("utf-8")
+
+
+def _entry(session_id, user_id):
+    from datetime import datetime, timezone
+
+    from app.core.auth_cache import AuthSession, AuthUser, CachedAuth
+
+    now = datetime.now(timezone.utc)
+    return CachedAuth(
+        user=AuthUser(id=user_id, email="u@example.com", created_at=now),
+        session=AuthSession(id=session_id, user_id=user_id, csrf_token="c", expires_at=now),
+    )
+
+
+def test_auth_cache_expires_evicts_lru_and_invalidates():
+    import uuid
+
+    from app.core.auth_cache import AuthCache
+
+    now = [0.0]
+    cache = AuthCache(ttl_seconds=10, max_entries=2, clock=lambda: now[0])
+    u1, u2 = uuid.uuid4(), uuid.uuid4()
+    s1, s2, s3 = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    cache.put("a", _entry(s1, u1))
+    cache.put("b", _entry(s2, u1))
+    assert cache.get("a") is not None  # "b" is now least recently used
+    cache.put("c", _entry(s3, u2))
+    assert cache.get("b") is None
+
+    cache.invalidate_session(s1)
+    assert cache.get("a") is None
+    cache.put("a", _entry(s1, u1))
+    cache.invalidate_user(u2)
+    assert cache.get("c") is None
+
+    now[0] = 10.0
+    assert cache.get("a") is None
+
+
+def test_cached_auth_skips_db_and_logout_invalidates(monkeypatch):
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    monkeypatch.setenv("FERNET_KEY", _fernet_key())
+    monkeypatch.setenv("WEB_BASE_URL", "http://localhost:5173")
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from app.db.base import Base
+    from app.db.session import get_db
+    from app.main import create_app
+
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    app = create_app()
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+
+    r = client.post("/api/auth/register", json={"email": "cache@example.com", "password": "password123"})
+    assert r.status_code == 200
+    csrf = client.cookies.get("dkpack_csrf")
+
+    statements: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cur, stmt, *a: statements.append(stmt))
+
+    assert client.get("/api/me").status_code == 200
+    first = len(statements)
+    assert any("FROM sessions JOIN users" in s for s in statements)
+    assert client.get("/api/me").status_code == 200
+    assert len(statements) == first
+
+    assert client.post("/api/auth/logout", headers={"X-CSRF-Token": csrf}).status_code == 200
+    client.cookies.set("dkpack_session", r.cookies.get("dkpack_session") or "")
+    assert client.get("/api/me").status_code == 401
@@ -0,0 +1,395 @@
+import base64
+import time
+
+
+def _fernet_key() -> str:
+    return base64.urlsafe_b64encode(b"3" * 32).decode("utf-8")
+
+
+def _setup_db(monkeypatch):
+    import uuid
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    monkeypatch.setenv("FERNET_KEY", _fernet_key())
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from app.crypto.fernet import encrypt_str
+    from app.db.base import Base
+    from app.models.user import User
+    from app.repos.connections import upsert_connection
+
+    engine = create_engine("sqlite+pysqlite:///:memory:", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    user_id = uuid.uuid4()
+    db = SessionLocal()
+    db.add(User(id=user_id, email="gh@example.com", password_hash="x"))
+    db.commit()
+    upsert_connection(
+        db,
+        user_id=user_id,
+        provider="github",
+        encrypted_access_token=encrypt_str("fake"),
+        encrypted_refresh_token=None,
+        scopes="repo",
+        token_type="Bearer",
+        expires_at=None,
+        provider_account_id=None,
+    )
+    return db, user_id
+
+
+def test_collect_github_fans_out_and_keeps_repo_order(monkeypatch):
+    from app.providers import github_api
+    from app.providers.github_api import GitHubApiError, RepoSummary
+
+    db, user_id = _setup_db(monkeypatch)
+    monkeypatch.setenv("GITHUB_MAX_CONCURRENCY", "4")
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    repos = [RepoSummary(full_name=f"o/r{i}", default_branch="main", visibility="private", private=True) for i in range(6)]
+
+    def fake_list_repos(self, **kwargs):
+        return repos
+
+    def fake_protection(self, *, full_name: str, branch: str):
+        # Finish out of order: earlier repos sleep longer.
+        idx = int(full_name.rsplit("r", 1)[1])
+        time.sleep(0.01 * (6 - idx))
+        if idx == 2:
+            raise GitHubApiError("Forbidden: no admin")
+        if idx == 3:
+            return None
+        return {"required_pull_request_reviews": {}, "enforce_admins": {"enabled": True}}
+
+    monkeypatch.setattr(github_api.GitHubApi, "list_repos", fake_list_repos)
+    monkeypatch.setattr(github_api.GitHubApi, "get_branch_protection", fake_protection)
+
+    from app.repos.evidence import EvidenceBatch, add_control_evidence_many, create_run, latest_evidence_for_control
+    from app.repos.evidence_blobs import resolve_artifacts
+    from app.services.collect import _collect_github
+
+    try:
+        run = create_run(db, user_id=user_id)
+        batch = EvidenceBatch(user_id=user_id, run_id=run.id)
+        _collect_github(db, batch=batch)
+        add_control_evidence_many(db, batch=batch)
+        row = latest_evidence_for_control(db, user_id=user_id, control_key="gh.branch_protection")
+        other = latest_evidence_for_control(db, user_id=user_id, control_key="gh.enforce_admins")
+        artifacts = resolve_artifacts(db, user_id=user_id, artifacts=row.artifacts)
+    finally:
+        db.close()
+
+    # The per-repo table is stored once and referenced by every GitHub control.
+    assert set(row.artifacts["per_repo"]) == {"$blob"}
+    assert other.artifacts["per_repo"] == row.artifacts["per_repo"]
+    assert list(batch.blobs) == [row.artifacts["per_repo"]["$blob"]]
+    per_repo = artifacts["per_repo"]
+    assert [r["repo"] for r in per_repo] == [r.full_name for r in repos]
+    assert per_repo[2]["error"] == "Forbidden: no admin"
+    assert per_repo[2]["protected"] is False
+    assert per_repo[3]["error"] is None
+    assert per_repo[3]["protected"] is False
+    assert row.artifacts["protected"] == 4
+    assert row.status == "warn"
+
+
+class _FakeResponse:
+    def __init__(self, payload, *, next_url=None, status_code=200, headers=None):
+        self._payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.links = {"next": {"url": next_url}} if next_url else {}
+        self.text = ""
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class _FakeSession:
+    def __init__(self, pages: dict):
+        self.pages = pages
+        self.headers = {}
+        self.calls: list[str] = []
+
+    def get(self, url, **kwargs):
+        self.calls.append(url)
+        return self.pages[url]
+
+
+def _repo_json(name: str) -> dict:
+    return {"full_name": name, "default_branch": "main", "visibility": "private", "private": True}
+
+
+def test_list_repos_follows_link_header_and_stops_at_limit():
+    from app.providers.github_api import GitHubApi
+
+    first = "https://api.github.com/orgs/acme/repos?per_page=2&sort=updated&type=all"
+    pages = {
+        first: _FakeResponse([_repo_json("acme/a"), _repo_json("acme/b")], next_url="https://api.github.com/p2"),
+        "https://api.github.com/p2": _FakeResponse([_repo_json("acme/c"), _repo_json("acme/d")], next_url="https://api.github.com/p3"),
+        "https://api.github.com/p3": _FakeResponse([_repo_json("acme/e")]),
+    }
+
+    api = GitHubApi(access_token="x")
+    api._session = _FakeSession(pages)
+
+    assert [r.full_name for r in api.list_repos(per_page=2, org="acme")] == ["acme/a", "acme/b", "acme/c", "acme/d", "acme/e"]
+
+    api._session = _FakeSession(pages)
+    sample = api.list_repos(per_page=2, limit=3, org="acme")
+    assert [r.full_name for r in sample] == ["acme/a", "acme/b", "acme/c"]
+    # The third page is never requested once the sample is filled.
+    assert api._session.calls == [first, "https://api.github.com/p2"]
+
+
+def test_conditional_requests_reuse_cached_body_and_persist(monkeypatch):
+    from app.providers.github_api import GitHubApi
+    from app.providers.http_cache import ResponseCache
+    from app.repos.connections import get_connection
+    from app.repos.http_cache import load_response_cache, save_response_cache
+
+    db, user_id = _setup_db(monkeypatch)
+    sent_headers: list[dict] = []
+
+    class _Session(_FakeSession):
+        def get(self, url, **kwargs):
+            sent_headers.append(kwargs.get("headers") or {})
+            if kwargs.get("headers", {}).get("If-None-Match") == '"v1"':
+                return _FakeResponse(None, status_code=304)
+            return _FakeResponse({"enforce_admins": {"enabled": True}}, headers={"ETag": '"v1"'})
+
+    try:
+        conn = get_connection(db, user_id=user_id, provider="github")
+
+        api = GitHubApi(access_token="x", cache=ResponseCache())
+        api._session = _Session({})
+        first = api.get_branch_protection(full_name="o/r", branch="main")
+        save_response_cache(db, connection_id=conn.id, cache=api._cache)
+
+        # A fresh client (next collection) revalidates from the persisted cache, which loads
+        # validators only and reads the body by URL when the 304 arrives.
+        loaded = load_response_cache(db, connection_id=conn.id)
+        assert loaded._entries == {}
+        bodies_read: list[str] = []
+        load_body = loaded._load_body
+        loaded._load_body = lambda url: bodies_read.append(url) or load_body(url)
+        api2 = GitHubApi(access_token="x", cache=loaded)
+        api2._session = _Session({})
+        second = api2.get_branch_protection(full_name="o/r", branch="main")
+        assert bodies_read == ["https://api.github.com/repos/o/r/branches/main/protection"]
+        assert loaded._entries == {}
+    finally:
+        db.close()
+
+    assert first == second == {"enforce_admins": {"enabled": True}}
+    assert sent_headers[0] == {}
+    assert sent_headers[1] == {"If-None-Match": '"v1"'}
+    assert not api2._cache.dirty_entries()
+
+
+def test_not_modified_without_cached_body_refetches_without_validators():
+    from app.providers.github_api import GitHubApi
+    from app.providers.http_cache import CachedResponse, ResponseCache
+
+    url = "https://api.github.com/repos/o/r/branches/main/protection"
+    cache = ResponseCache({url: CachedResponse(etag='"v1"', last_modified=None, body={"stale": True})})
+    sent_headers: list[dict] = []
+
+    class _Session(_FakeSession):
+        def get(self, url, **kwargs):
+            headers = kwargs.get("headers") or {}
+            sent_headers.append(headers)
+            if headers:
+                # The cached entry was evicted while the conditional request was in flight.
+                cache._entries.clear()
+                return _FakeResponse(None, status_code=304)
+            return _FakeResponse({"enforce_admins": {"enabled": True}}, headers={"ETag": '"v2"'})
+
+    api = GitHubApi(access_token="x", cache=cache)
+    api._session = _Session({})
+
+    assert api.get_branch_protection(full_name="o/r", branch="main") == {"enforce_admins": {"enabled": True}}
+    assert sent_headers == [{"If-None-Match": '"v1"'}, {}]
+    assert cache.get(url).etag == '"v2"'
+
+
+def test_graphql_backend_produces_rest_shaped_per_repo(monkeypatch):
+    from app.providers import github_api
+
+    db, user_id = _setup_db(monkeypatch)
+    monkeypatch.setenv("GITHUB_COLLECTION_BACKEND", "graphql")
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    def node(name, visibility, rules):
+        return {
+            "nameWithOwner": name,
+            "visibility": visibility,
+            "isPrivate": visibility != "PUBLIC",
+            "defaultBranchRef": {"name": "main"},
+            "branchProtectionRules": {"nodes": rules},
+        }
+
+    strict = {
+        "pattern": "main",
+        "requiresApprovingReviews": True,
+        "requiredApprovingReviewCount": 2,
+        "allowsForcePushes": False,
+        "isAdminEnforced": True,
+    }
+    pages = [
+        {
+            "data": {
+                "viewer": {
+                    "repositories": {
+                        "pageInfo": {"hasNextPage": True, "endCursor": "c1"},
+                        "nodes": [node("o/a", "PRIVATE", [strict]), node("o/b", "PUBLIC", [])],
+                    }
+                }
+            }
+        },
+        {
+            "data": {
+                "viewer": {
+                    "repositories": {
+                        "pageInfo": {"hasNextPage": False, "endCursor": None},
+                        "nodes": [node("o/c", "INTERNAL", None)],
+                    }
+                }
+            },
+            "errors": [
+                {
+                    "type": "FORBIDDEN",
+                    "message": "Resource not accessible by integration",
+                    "path": ["viewer", "repositories", "nodes", 0, "branchProtectionRules"],
+                }
+            ],
+        },
+    ]
+    cursors: list = []
+
+    def fake_graphql(self, query, variables):
+        cursors.append(variables["after"])
+        return pages[len(cursors) - 1]
+
+    def no_rest(self, **kwargs):
+        raise AssertionError("REST protection endpoint must not be used with the graphql backend")
+
+    monkeypatch.setattr(github_api.GitHubApi, "_graphql", fake_graphql)
+    monkeypatch.setattr(github_api.GitHubApi, "get_branch_protection", no_rest)
+
+    from app.repos.evidence import EvidenceBatch, add_control_evidence_many, create_run, latest_evidence_for_control
+    from app.repos.evidence_blobs import resolve_artifacts
+    from app.services.collect import _collect_github
+
+    try:
+        run = create_run(db, user_id=user_id)
+        batch = EvidenceBatch(user_id=user_id, run_id=run.id)
+        _collect_github(db, batch=batch)
+        add_control_evidence_many(db, batch=batch)
+        row = latest_evidence_for_control(db, user_id=user_id, control_key="gh.branch_protection")
+        artifacts = resolve_artifacts(db, user_id=user_id, artifacts=row.artifacts)
+    finally:
+        db.close()
+
+    assert cursors == [None, "c1"]
+    per_repo = artifacts["per_repo"]
+    assert per_repo == [
+        {
+            "repo": "o/a",
+            "protected": True,
+            "pr_reviews_required": True,
+            "force_pushes_allowed": False,
+            "enforce_admins": True,
+            "visibility": "private",
+            "error": None,
+        },
+        {
+            "repo": "o/b",
+            "protected": False,
+            "pr_reviews_required": False,
+            "force_pushes_allowed": True,
+            "enforce_admins": False,
+            "visibility": "public",
+            "error": None,
+        },
+        {
+            "repo": "o/c",
+            "protected": False,
+            "pr_reviews_required": False,
+            "force_pushes_allowed": True,
+            "enforce_admins": False,
+            "visibility": "internal",
+            "error": "Forbidden: Resource not accessible by integration",
+        },
+    ]
+    assert row.artifacts["visibility_counts"] == {"public": 1, "private": 1, "internal": 1, "unknown": 0}
+
+
+def test_graphql_protection_matches_rest_when_prs_need_zero_approvals():
+    from app.providers.github_api import _rest_protection
+
+    base = {"pattern": "main", "allowsForcePushes": False, "isAdminEnforced": False}
+    # PRs required but no approvals: REST still reports required_pull_request_reviews.
+    assert _rest_protection({**base, "requiresApprovingReviews": True, "requiredApprovingReviewCount": 0}) == {
+        "enforce_admins": {"enabled": False},
+        "allow_force_pushes": {"enabled": False},
+        "required_pull_request_reviews": {"required_approving_review_count": 0},
+    }
+    # PRs not required: REST omits the section even if a stale count is still stored.
+    assert "required_pull_request_reviews" not in _rest_protection(
+        {**base, "requiresApprovingReviews": False, "requiredApprovingReviewCount": 1}
+    )
+
+
+def test_provider_collectors_run_concurrently_and_keep_error_order(monkeypatch):
+    import threading
+
+    from app.repos.evidence import EvidenceBatch
+    from app.services import collect
+
+    db, user_id = _setup_db(monkeypatch)
+    barrier = threading.Barrier(2, timeout=5)
+
+    def github(db, *, batch):
+        barrier.wait()
+        raise RuntimeError("boom")
+
+    def microsoft(db, *, batch):
+        barrier.wait()
+
+    monkeypatch.setattr(collect, "supports_concurrent_sessions", lambda bind: True)
+    monkeypatch.setattr(collect, "_write_unknown_controls", lambda *a, **kw: None)
+    monkeypatch.setattr(
+        collect,
+        "_provider_collectors",
+        lambda: (
+            collect._ProviderCollector(provider="github", collect=github, keys=(), failure_notes=""),
+            collect._ProviderCollector(provider="microsoft", collect=microsoft, keys=(), failure_notes=""),
+        ),
+    )
+
+    try:
+        # Both collectors must be in flight at once to get past the barrier.
+        errors = collect._run_provider_collectors(db, batch=EvidenceBatch(user_id=user_id, run_id=None))
+    finally:
+        db.close()
+
+    assert errors == ["github: RuntimeError"]
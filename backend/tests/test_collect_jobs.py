@@ -0,0 +1,325 @@
+import base64
+
+
+def _fernet_key() -> str:
+    return base64.urlsafe_b64encode(b"4" * 32).decode("utf-8")
+
+
+def test_collect_job_is_queued_then_finishes_run(monkeypatch):
+    import uuid
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    monkeypatch.setenv("FERNET_KEY", _fernet_key())
+    monkeypatch.setenv("APP_ENV", "demo")
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from app.db.base import Base
+    from app.models.evidence import EvidenceRun
+    from app.models.user import User
+    from app.repos.collect_jobs import get_job_for_user
+    from app.services import collect_jobs
+
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, email="jobs@example.com", password_hash="x"))
+    db.commit()
+
+    submitted = []
+
+    class _Pool:
+        def submit(self, fn, *args):
+            submitted.append((fn, args))
+
+    monkeypatch.setattr(collect_jobs, "supports_concurrent_sessions", lambda bind: True)
+    monkeypatch.setattr(collect_jobs, "_worker_pool", lambda: _Pool())
+
+    try:
+        job = collect_jobs.start_collect_job(db, user_id=user_id)
+        assert job.status == "queued"
+        assert job.progress == {"github": "pending", "microsoft": "pending"}
+        assert db.get(EvidenceRun, job.run_id).status == "running"
+        # A second request while the first is active returns the same job.
+        assert collect_jobs.start_collect_job(db, user_id=user_id).id == job.id
+        assert len(submitted) == 1
+
+        fn, args = submitted[0]
+        fn(*args)
+
+        db.expire_all()
+        done = get_job_for_user(db, user_id=user_id, job_id=job.id)
+        assert done.status == "success"
+        assert done.progress == {"github": "done", "microsoft": "done"}
+        assert done.finished_at is not None
+        assert db.get(EvidenceRun, job.run_id).status == "success"
+
+        from app.services.collect_events import collect_events
+
+        events = list(collect_events.subscribe(job.run_id))
+        assert [e["seq"] for e in events] == list(range(1, len(events) + 1))
+        assert sum(1 for e in events if e["type"] == "control_written") == 12
+        assert events[-1]["type"] == "run_finished"
+        assert events[-1]["status"] == "success"
+    finally:
+        db.close()
+        get_settings.cache_clear()
+
+
+def test_event_bus_replays_resumes_and_heartbeats():
+    from app.services.collect_events import EventBus
+
+    bus = EventBus(max_events_per_run=3)
+    bus.publish("r1", "ignored")
+    bus.open("r1")
+    for i in range(5):
+        bus.publish("r1", "tick", n=i)
+
+    stream = bus.subscribe("r1", after_seq=3, heartbeat_seconds=0.01)
+    assert [e["n"] for e in (next(stream), next(stream))] == [3, 4]
+    # Nothing new yet: the stream yields a heartbeat instead of blocking forever.
+    assert next(stream) is None
+
+    bus.close("r1")
+    bus.publish("r1", "late")
+    assert list(stream) == []
+    assert bus.has_run("r1")
+    assert not bus.has_run("r2")
+    assert list(bus.subscribe("r2")) == []
+
+
+def test_collect_run_writes_evidence_with_one_insert(monkeypatch):
+    import uuid
+
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    monkeypatch.setenv("FERNET_KEY", _fernet_key())
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from app.db.base import Base
+    from app.models.user import User
+    from app.repos.evidence import latest_evidence_all_controls
+    from app.services.collect import collect_now
+
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, email="batch@example.com", password_hash="x"))
+    db.commit()
+
+    inserts: list[str] = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO control_evidence"):
+            inserts.append(statement)
+
+    try:
+        res = collect_now(db, user_id=user_id)
+        rows = latest_evidence_all_controls(db, user_id=user_id)
+    finally:
+        db.close()
+
+    assert res["status"] == "success"
+    assert len(rows) == 12
+    assert {r.run_id for r in rows} == {uuid.UUID(res["run_id"])}
+    assert len(inserts) == 1
+
+
+def test_stale_active_job_is_failed_and_index_allows_one_active_job(monkeypatch):
+    import uuid
+    from datetime import timedelta
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    monkeypatch.setenv("FERNET_KEY", _fernet_key())
+    monkeypatch.setenv("APP_ENV", "demo")
+    monkeypatch.setenv("COLLECT_JOB_STALE_AFTER_SECONDS", "60")
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from app.core.time import utcnow
+    from app.db.base import Base
+    from app.models.evidence import EvidenceRun
+    from app.models.user import User
+    from app.repos.collect_jobs import create_job_with_run, get_job_for_user
+    from app.services import collect_jobs
+
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, email="stale@example.com", password_hash="x"))
+    db.commit()
+
+    submitted = []
+
+    class _Pool:
+        def submit(self, fn, *args):
+            submitted.append((fn, args))
+
+    monkeypatch.setattr(collect_jobs, "supports_concurrent_sessions", lambda bind: True)
+    monkeypatch.setattr(collect_jobs, "_worker_pool", lambda: _Pool())
+
+    monkeypatch.setattr(collect_jobs, "_held", collect_jobs._HeldJobs())
+
+    try:
+        # A job whose worker died with its process: no heartbeat for two minutes.
+        orphan = create_job_with_run(db, user_id=user_id, progress={})
+        assert orphan is not None
+        # The partial unique index rejects a second active job, as in a racing request.
+        assert create_job_with_run(db, user_id=user_id, progress={}) is None
+
+        # Old but still beating (e.g. waiting out a rate limit): not stale.
+        orphan.created_at = utcnow() - timedelta(hours=2)
+        db.commit()
+        assert collect_jobs.start_collect_job(db, user_id=user_id).id == orphan.id
+
+        # Silent but still held by this process: not stale either.
+        orphan.updated_at = utcnow() - timedelta(minutes=2)
+        db.commit()
+        collect_jobs._held.add(engine, orphan.id)
+        assert collect_jobs.start_collect_job(db, user_id=user_id).id == orphan.id
+        collect_jobs._held.discard(orphan.id)
+
+        job = collect_jobs.start_collect_job(db, user_id=user_id)
+        assert job.id != orphan.id
+        assert job.status == "queued"
+        assert len(submitted) == 1
+
+        db.expire_all()
+        failed = get_job_for_user(db, user_id=user_id, job_id=orphan.id)
+        assert failed.status == "failed"
+        assert failed.error_summary == "collect: job interrupted"
+        assert db.get(EvidenceRun, orphan.run_id).status == "failed"
+        # The fresh job is not stale, so asking again returns it.
+        assert collect_jobs.start_collect_job(db, user_id=user_id).id == job.id
+
+        # A job failed as stale before its worker got to it never starts.
+        collect_jobs.run_collect_job(engine, orphan.id)
+        db.expire_all()
+        assert get_job_for_user(db, user_id=user_id, job_id=orphan.id).status == "failed"
+    finally:
+        db.close()
+        get_settings.cache_clear()
+
+
+def test_async_subscribe_wakes_on_publish_from_another_thread():
+    import asyncio
+    import threading
+
+    from app.services.collect_events import EventBus
+
+    bus = EventBus()
+    bus.open("r1")
+    bus.publish("r1", "first")
+
+    async def consume() -> list:
+        seen = []
+        async for event in bus.subscribe_async("r1", heartbeat_seconds=0.05):
+            seen.append(None if event is None else event["type"])
+            if event is not None and event["type"] == "first":
+                # Published by a collector thread while this subscriber awaits.
+                threading.Timer(0.2, lambda: (bus.publish("r1", "second"), bus.close("r1"))).start()
+        return seen
+
+    seen = asyncio.run(consume())
+    assert seen[0] == "first"
+    assert seen[-1] == "second"
+    assert None in seen[1:-1]
+    assert bus._waiters == {}
+
+
+def test_event_stream_ends_when_job_is_terminal_but_channel_stays_open(monkeypatch):
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    monkeypatch.setenv("FERNET_KEY", _fernet_key())
+    monkeypatch.setenv("WEB_BASE_URL", "http://localhost:5173")
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from app.api.routes import collect as collect_routes
+    from app.db.base import Base
+    from app.db.session import get_db
+    from app.main import create_app
+    from app.repos.collect_jobs import create_job_with_run, finish_job
+    from app.services.collect_events import collect_events
+
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(collect_routes, "_SSE_HEARTBEAT_SECONDS", 0.05)
+
+    app = create_app()
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    r = client.post("/api/auth/register", json={"email": "sse@example.com", "password": "password123"})
+    assert r.status_code == 200
+
+    import uuid
+
+    with TestingSessionLocal() as db:
+        job = create_job_with_run(db, user_id=uuid.UUID(r.json()["id"]), progress={})
+        # The channel is opened but no worker ever runs the job or closes it.
+        collect_events.open(job.run_id)
+        finish_job(db, job_id=job.id, status="failed", error_summary="collect: job interrupted")
+        job_id, run_id = job.id, job.run_id
+
+    try:
+        stream = client.get(f"/api/jobs/{job_id}/events")
+    finally:
+        collect_events.close(run_id)
+
+    frames = stream.text.rstrip().split("\n\n")
+    assert frames[0].startswith("event: job\n")
+    assert frames[-1].startswith("event: job\n")
+    assert '"status": "failed"' in frames[-1]
@@ -1,4 +1,5 @@
 import base64
+import hashlib
 import re
 from io import BytesIO
 from zipfile import ZipFile
@@ -26,6 +27,35 @@ def test_fernet_roundtrip(monkeypatch):
     assert decrypt_str(ct) == "secret-token"
 
 
+def test_fernet_key_ring_decrypts_old_tokens_and_rotates(monkeypatch):
+    import pytest
+
+    old_key = _fernet_key()
+    new_key = base64.urlsafe_b64encode(b"9" * 32).decode("utf-8")
+    monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    monkeypatch.setenv("FERNET_KEY", old_key)
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from app.crypto.fernet import decrypt_str, encrypt_str, rotate_str
+
+    old_ct = encrypt_str("secret-token")
+
+    monkeypatch.setenv("FERNET_KEY", new_key)
+    monkeypatch.setenv("FERNET_PREVIOUS_KEYS", old_key)
+    get_settings.cache_clear()
+    assert decrypt_str(old_ct) == "secret-token"
+    new_ct = rotate_str(old_ct)
+
+    monkeypatch.delenv("FERNET_PREVIOUS_KEYS")
+    get_settings.cache_clear()
+    assert decrypt_str(new_ct) == "secret-token"
+    with pytest.raises(ValueError):
+        decrypt_str(old_ct)
+
+
 _JWT_LIKE_RE = re.compile(r"\b[A-Za-z0-9_-]{20,}\.[A-Za-z0-9_-]{20,}\.[A-Za-z0-9_-]{20,}\b")
 
 
@@ -91,6 +121,32 @@ def test_evidence_zip_manifest_hashes():
             assert hashlib.sha256(data).hexdigest() == f["sha256"]
 
 
+def test_evidence_zip_writes_shared_blobs_once():
+    import hashlib
+    from datetime import datetime
+
+    from app.export.evidence_zip import build_evidence_zip
+    from app.repos.evidence_blobs import blob_ref, encode_blob
+
+    sha, data = encode_blob([{"repo": "o/a", "protected": True}])
+    payload, manifest = build_evidence_zip(
+        generated_at=datetime(2026, 1, 1),
+        app_version="0.1.0",
+        user_id="u1",
+        evidence_by_key={
+            "c1": {"status": "pass", "collected_at": "t", "notes": "", "artifacts": {"per_repo": blob_ref(sha)}},
+            "c2": {"status": "warn", "collected_at": "t", "notes": "", "artifacts": {"per_repo": blob_ref(sha)}},
+        },
+        blobs={sha: data},
+    )
+
+    with ZipFile(BytesIO(payload), "r") as z:
+        blob_names = [n for n in z.namelist() if n.startswith("blobs/")]
+        assert blob_names == [f"blobs/{sha}.json"]
+        assert hashlib.sha256(z.read(blob_names[0])).hexdigest() == sha
+    assert manifest["blobs"] == [{"blob": sha, "filename": f"blobs/{sha}.json", "sha256": sha}]
+
+
 def test_evidence_zip_contains_no_secrets_markers():
     from datetime import datetime
 
@@ -110,7 +166,7 @@ def test_evidence_zip_contains_no_secrets_markers():
     _assert_no_secrets_in_texts(texts)
 
 
-def test_export_pack_contains_expected_files_and_no_secret_markers(monkeypatch):
+def test_export_pack_contains_expected_files_and_no_secret_markers(tmp_path, monkeypatch):
     import uuid
     from datetime import datetime
     from io import BytesIO
@@ -122,6 +178,7 @@ def test_export_pack_contains_expected_files_and_no_secret_markers(monkeypatch):
     monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
     monkeypatch.setenv("FERNET_KEY", _fernet_key())
     monkeypatch.setenv("WEB_BASE_URL", "http://localhost:5173")
+    monkeypatch.setenv("EXPORTS_DIR", str(tmp_path))
 
     from app.core.settings import get_settings
 
@@ -155,10 +212,17 @@ def test_export_pack_contains_expected_files_and_no_secret_markers(monkeypatch):
             collected_at=utcnow(),
         )
 
-        outer_bytes = export_pack(db, user_id=user_id)
+        stored = export_pack(db, user_id=user_id)
     finally:
         db.close()
 
+    # Written in place under EXPORTS_DIR with no temp files left behind.
+    assert stored.path == tmp_path / "users" / str(user_id) / f"{stored.export_id}.zip"
+    assert [p.name for p in stored.path.parent.iterdir() if p.is_file()] == [stored.path.name]
+    outer_bytes = stored.path.read_bytes()
+    assert stored.size_bytes == len(outer_bytes)
+    assert stored.sha256 == hashlib.sha256(outer_bytes).hexdigest()
+
     with ZipFile(BytesIO(outer_bytes), "r") as outer:
         names = set(outer.namelist())
         assert "report.md" in names
@@ -177,3 +241,198 @@ def test_export_pack_contains_expected_files_and_no_secret_markers(monkeypatch):
         inner_texts = [t for _name, t in _read_text_files_from_zip(inner)]
 
     _assert_no_secrets_in_texts(outer_texts + inner_texts)
+
+
+def test_signing_material_is_cached_until_key_file_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    monkeypatch.setenv("FERNET_KEY", _fernet_key())
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    import app.services.pack_signing as pack_signing
+
+    monkeypatch.setattr(pack_signing, "_state_dir", lambda: tmp_path)
+    monkeypatch.setattr(pack_signing, "_cached", None)
+    loads = []
+    real_load = pack_signing.load_signing_material
+    monkeypatch.setattr(pack_signing, "load_signing_material", lambda: loads.append(1) or real_load())
+
+    first = pack_signing.ensure_signing_material()
+    assert pack_signing.ensure_signing_material() is first
+    sig = first.sign(b"manifest")
+    assert first.verify(b"manifest", sig)
+    assert len(loads) == 1
+
+    # A rewritten key file (e.g. after re-encryption) is picked up on the next call.
+    path = tmp_path / "pack_signing_key.json"
+    path.write_text(path.read_text("utf-8") + "\n", encoding="utf-8")
+    reloaded = pack_signing.ensure_signing_material()
+    assert reloaded is not first
+    assert reloaded.verify(b"manifest", sig)
+    assert len(loads) == 2
+
+
+def test_export_reuses_cached_renders_while_evidence_is_unchanged(tmp_path, monkeypatch):
+    import json
+    import uuid
+    from zipfile import ZipFile
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    monkeypatch.setenv("FERNET_KEY", _fernet_key())
+    monkeypatch.setenv("EXPORTS_DIR", str(tmp_path))
+    monkeypatch.setenv("EXPORT_PDF_WORKERS", "0")
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    import app.services.export_pack as export_pack_module
+    from app.db.base import Base
+    from app.models.user import User
+    from app.repos.evidence import add_control_evidence, create_run
+    from app.services import export_cache
+
+    renders = []
+    real_render = export_pack_module._render_payloads
+    monkeypatch.setattr(
+        export_pack_module, "_render_payloads", lambda *a, **kw: renders.append(1) or real_render(*a, **kw)
+    )
+
+    engine = create_engine("sqlite+pysqlite:///:memory:", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    user_id = uuid.uuid4()
+    try:
+        db.add(User(id=user_id, email="cache-export@example.com", password_hash="x"))
+        db.commit()
+        run = create_run(db, user_id=user_id)
+        add_control_evidence(
+            db,
+            user_id=user_id,
+            run_id=run.id,
+            control_key="gh.branch_protection",
+            provider="github",
+            status="pass",
+            artifacts={"repos_sampled": 1},
+            notes="ok",
+        )
+
+        # The first export adds pack.export_integrity evidence, so the second one renders too.
+        packs = [export_pack_module.export_pack(db, user_id=user_id) for _ in range(3)]
+    finally:
+        db.close()
+
+    assert len(renders) == 2
+    manifests = []
+    for stored in packs:
+        with ZipFile(stored.path) as z:
+            manifests.append(json.loads(z.read("pack_manifest.json")))
+    assert manifests[2]["hashes"] == manifests[1]["hashes"]
+    assert manifests[2]["export_id"] != manifests[1]["export_id"]
+
+    cache_dir = tmp_path / "users" / str(user_id) / "cache"
+    assert len(list(cache_dir.iterdir())) == 2
+    assert export_cache.evict(max_bytes=0) == 2
+    assert list(cache_dir.iterdir()) == []
+
+
+def test_evidence_zip_and_pdf_are_byte_for_byte_deterministic():
+    from datetime import datetime, timezone
+    from io import BytesIO
+    from zipfile import ZipFile
+
+    import pytest
+
+    from app.export.evidence_zip import build_evidence_zip
+    from app.export.report_pdf import render_report_pdf
+    from app.export.zip_writer import DeterministicZip
+
+    generated_at = datetime(2026, 10, 16, tzinfo=timezone.utc)
+    evidence = {
+        "gh.enforce_admins": {"status": "warn", "collected_at": None, "notes": "", "artifacts": {"x": 1}},
+        "gh.branch_protection": {"status": "pass", "collected_at": None, "notes": "ok", "artifacts": {}},
+    }
+    kwargs = {"generated_at": generated_at, "app_version": "0.1.0", "user_id": "u", "evidence_by_key": evidence}
+
+    first, _ = build_evidence_zip(**kwargs, blobs={"ab12": b"{}"})
+    second, _ = build_evidence_zip(**kwargs, blobs={"ab12": b"{}"})
+    assert first == second
+    with ZipFile(BytesIO(first)) as z:
+        names = z.namelist()
+        assert names == sorted(names)
+        assert all(i.date_time == (1980, 1, 1, 0, 0, 0) for i in z.infolist())
+
+    pdf_kwargs = {"generated_at": generated_at, "app_version": "0.1.0", "evidence_by_key": evidence}
+    assert render_report_pdf(**pdf_kwargs) == render_report_pdf(**pdf_kwargs)
+
+    with pytest.raises(ValueError):
+        with DeterministicZip(BytesIO()) as z:
+            z.writestr("b.txt", b"")
+            z.writestr("a.txt", b"")
+
+
+def test_fresh_exports_of_unchanged_evidence_hash_identically(tmp_path, monkeypatch):
+    import json
+    import uuid
+    from datetime import datetime, timezone
+    from zipfile import ZipFile
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    monkeypatch.setenv("FERNET_KEY", _fernet_key())
+    monkeypatch.setenv("EXPORTS_DIR", str(tmp_path))
+    monkeypatch.setenv("EXPORT_PDF_WORKERS", "0")
+    # No render cache: every export renders its payloads from scratch.
+    monkeypatch.setenv("EXPORT_CACHE_MAX_BYTES", "0")
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from app.db.base import Base
+    from app.models.user import User
+    from app.repos.evidence import add_control_evidence, create_run
+    from app.services.export_pack import export_pack
+
+    engine = create_engine("sqlite+pysqlite:///:memory:", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    user_id = uuid.uuid4()
+    collected_at = datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc)
+    try:
+        db.add(User(id=user_id, email="fresh-export@example.com", password_hash="x"))
+        db.commit()
+        run = create_run(db, user_id=user_id)
+        add_control_evidence(
+            db,
+            user_id=user_id,
+            run_id=run.id,
+            control_key="gh.branch_protection",
+            provider="github",
+            status="pass",
+            artifacts={"repos_sampled": 1},
+            notes="ok",
+            collected_at=collected_at,
+        )
+
+        # The first export adds pack.export_integrity evidence; the next two see the same evidence.
+        packs = [export_pack(db, user_id=user_id) for _ in range(3)]
+    finally:
+        db.close()
+
+    manifests = []
+    for stored in packs:
+        with ZipFile(stored.path) as z:
+            manifests.append(json.loads(z.read("pack_manifest.json")))
+            with ZipFile(z.open("evidence-pack.zip")) as inner:
+                evidence_manifest = json.loads(inner.read("manifest.json"))
+    assert manifests[2]["hashes"] == manifests[1]["hashes"]
+    assert manifests[2]["export_id"] != manifests[1]["export_id"]
+    assert evidence_manifest["generated_at_utc"].startswith("2026-10-01T12:00:00")
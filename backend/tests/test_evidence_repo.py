@@ -0,0 +1,218 @@
+import base64
+
+
+def _fernet_key() -> str:
+    return base64.urlsafe_b64encode(b"5" * 32).decode("utf-8")
+
+
+def _setup_db(monkeypatch):
+    import uuid
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    monkeypatch.setenv("FERNET_KEY", _fernet_key())
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from app.db.base import Base
+    from app.models.user import User
+
+    engine = create_engine("sqlite+pysqlite:///:memory:", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, email="repo@example.com", password_hash="x"))
+    db.commit()
+    return db, user_id
+
+
+def test_latest_evidence_all_controls_picks_newest_row_per_control(monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    from app.repos.evidence import EvidenceBatch, add_control_evidence_many, create_run, latest_evidence_all_controls
+
+    db, user_id = _setup_db(monkeypatch)
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    try:
+        for day in range(3):
+            run = create_run(db, user_id=user_id)
+            batch = EvidenceBatch(user_id=user_id, run_id=run.id)
+            for key in ("gh.enforce_admins", "ms.security_defaults"):
+                batch.add(
+                    control_key=key,
+                    provider=key.split(".")[0],
+                    status="pass" if day == 2 else "fail",
+                    artifacts={"day": day},
+                    notes="",
+                    collected_at=base + timedelta(days=day, minutes=1 if key.startswith("ms") else 0),
+                )
+            add_control_evidence_many(db, batch=batch)
+
+        rows = latest_evidence_all_controls(db, user_id=user_id)
+    finally:
+        db.close()
+
+    assert [r.control_key for r in rows] == ["ms.security_defaults", "gh.enforce_admins"]
+    assert {r.artifacts["day"] for r in rows} == {2}
+    assert {r.status for r in rows} == {"pass"}
+
+
+def test_current_evidence_tracks_newest_write_per_control(monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    from app.repos.evidence import (
+        EvidenceBatch,
+        add_control_evidence,
+        add_control_evidence_many,
+        create_run,
+        current_evidence_all_controls,
+        current_evidence_for_control,
+        delete_user_evidence_for_provider,
+    )
+
+    db, user_id = _setup_db(monkeypatch)
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def add(batch, key, status, collected_at):
+        provider = "github" if key.startswith("gh.") else "pack"
+        batch.add(
+            control_key=key, provider=provider, status=status, artifacts={}, notes="", collected_at=collected_at
+        )
+
+    try:
+        newer = create_run(db, user_id=user_id)
+        batch = EvidenceBatch(user_id=user_id, run_id=newer.id)
+        add(batch, "gh.enforce_admins", "pass", base + timedelta(days=1))
+        add(batch, "pack.export_integrity", "unknown", base + timedelta(days=1))
+        add_control_evidence_many(db, batch=batch)
+
+        # A slower run that finishes later must not replace newer evidence.
+        older = create_run(db, user_id=user_id)
+        batch = EvidenceBatch(user_id=user_id, run_id=older.id)
+        add(batch, "gh.enforce_admins", "fail", base)
+        add_control_evidence_many(db, batch=batch)
+
+        add_control_evidence(
+            db,
+            user_id=user_id,
+            run_id=newer.id,
+            control_key="pack.export_integrity",
+            provider="pack",
+            status="pass",
+            artifacts={"validated": True},
+            notes="",
+            collected_at=base + timedelta(days=2),
+        )
+
+        current = {r.control_key: r for r in current_evidence_all_controls(db, user_id=user_id)}
+        assert current["gh.enforce_admins"].status == "pass"
+        assert current["gh.enforce_admins"].run_id == newer.id
+        assert current["pack.export_integrity"].artifacts == {"validated": True}
+
+        delete_user_evidence_for_provider(db, user_id=user_id, provider="github")
+        assert current_evidence_for_control(db, user_id=user_id, control_key="gh.enforce_admins") is None
+        assert current_evidence_for_control(db, user_id=user_id, control_key="pack.export_integrity") is not None
+    finally:
+        db.close()
+
+
+def test_rebuild_current_evidence_recomputes_rows_from_history(monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    from sqlalchemy import delete
+
+    from app.models.evidence import ControlEvidence
+    from app.repos.evidence import (
+        EvidenceBatch,
+        add_control_evidence_many,
+        create_run,
+        current_evidence_all_controls,
+        rebuild_current_evidence,
+    )
+
+    db, user_id = _setup_db(monkeypatch)
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    try:
+        runs = []
+        for day in range(2):
+            run = create_run(db, user_id=user_id)
+            runs.append(run.id)
+            batch = EvidenceBatch(user_id=user_id, run_id=run.id)
+            for key in ("gh.enforce_admins", "ms.security_defaults"):
+                batch.add(
+                    control_key=key,
+                    provider=key.split(".")[0],
+                    status="pass" if day else "fail",
+                    artifacts={"day": day},
+                    notes="",
+                    collected_at=base + timedelta(days=day),
+                )
+            add_control_evidence_many(db, batch=batch)
+
+        # History edited behind the read model's back: the newest GitHub row is gone.
+        db.execute(
+            delete(ControlEvidence).where(
+                ControlEvidence.run_id == runs[1], ControlEvidence.control_key == "gh.enforce_admins"
+            )
+        )
+        db.commit()
+
+        assert rebuild_current_evidence(db, user_id=user_id) == 2
+        current = {r.control_key: r for r in current_evidence_all_controls(db, user_id=user_id)}
+    finally:
+        db.close()
+
+    assert current["gh.enforce_admins"].run_id == runs[0]
+    assert current["gh.enforce_admins"].status == "fail"
+    assert current["ms.security_defaults"].run_id == runs[1]
+    assert current["ms.security_defaults"].artifacts == {"day": 1}
+
+
+def test_forget_provider_deletes_its_unreferenced_blobs(monkeypatch):
+    from sqlalchemy import select
+
+    from app.models.evidence_blob import EvidenceBlob
+    from app.repos.evidence import (
+        EvidenceBatch,
+        add_control_evidence_many,
+        create_run,
+        delete_user_evidence_for_provider,
+    )
+    from app.repos.evidence_blobs import encode_blob
+
+    db, user_id = _setup_db(monkeypatch)
+    try:
+        for day in range(2):
+            run = create_run(db, user_id=user_id)
+            batch = EvidenceBatch(user_id=user_id, run_id=run.id)
+            per_repo = batch.add_blob([{"repo": f"o/r{day}", "visibility": "private", "error": None}])
+            shared = batch.add_blob(["shared"])
+            for key in ("gh.branch_protection", "gh.enforce_admins"):
+                batch.add(control_key=key, provider="github", status="pass", artifacts={"per_repo": per_repo}, notes="")
+            batch.add(
+                control_key="ms.security_defaults",
+                provider="microsoft",
+                status="pass",
+                artifacts={"shared": shared},
+                notes="",
+            )
+            batch.add(
+                control_key="gh.repo_visibility",
+                provider="github",
+                status="pass",
+                artifacts={"shared": shared},
+                notes="",
+            )
+            add_control_evidence_many(db, batch=batch)
+
+        delete_user_evidence_for_provider(db, user_id=user_id, provider="github")
+        remaining = set(db.execute(select(EvidenceBlob.sha256).where(EvidenceBlob.user_id == user_id)).scalars())
+    finally:
+        db.close()
+
+    # Every GitHub per_repo blob is gone; the blob Microsoft evidence still references stays.
+    assert remaining == {encode_blob(["shared"])[0]}
@@ -0,0 +1,254 @@
+class _FakeResponse:
+    def __init__(self, payload, *, status_code=200, headers=None):
+        self._payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = ""
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class _BatchSession:
+    def __init__(self, handler):
+        self.handler = handler
+        self.headers = {}
+        self.posts: list[dict] = []
+
+    def post(self, url, json=None, **kwargs):
+        assert url == "https://graph.microsoft.com/v1.0/$batch"
+        self.posts.append(json)
+        return _FakeResponse({"responses": [self.handler(r) for r in json["requests"]]})
+
+
+def test_control_set_is_one_batch_with_per_request_errors():
+    from app.providers.graph_api import GraphApi, GraphApiError
+
+    def handler(r):
+        if r["id"] == "org":
+            return {"id": "org", "status": 200, "body": {"value": [{"id": "t1", "displayName": "Acme"}]}}
+        if r["id"] == "security_defaults":
+            return {"id": "security_defaults", "status": 403, "body": {"error": {"code": "Authorization_RequestDenied"}}}
+        if r["id"] == "conditional_access":
+            return {"id": "conditional_access", "status": 200, "body": "2"}
+        return {"id": r["id"], "status": 500, "body": {"error": {"code": "generalException", "message": "try later"}}}
+
+    api = GraphApi(access_token="x")
+    api._session = _BatchSession(handler)
+    res = api.get_control_set()
+
+    assert len(api._session.posts) == 1
+    assert res.org.tenant_id == "t1"
+    assert isinstance(res.security_defaults, GraphApiError)
+    assert res.security_defaults.status_code == 403
+    assert res.conditional_access_policy_count == 2
+    assert isinstance(res.directory_roles_count, GraphApiError)
+    assert res.directory_roles_count.status_code == 500
+    assert "try later" in str(res.directory_roles_count)
+
+
+def test_batch_splits_into_chunks_of_twenty():
+    from app.providers.graph_api import GraphApi, GraphBatchRequest
+
+    api = GraphApi(access_token="x")
+    api._session = _BatchSession(lambda r: {"id": r["id"], "status": 200, "body": {"n": r["id"]}})
+    res = api.batch([GraphBatchRequest(id=str(i), path=f"/x/{i}") for i in range(45)])
+
+    assert [len(p["requests"]) for p in api._session.posts] == [20, 20, 5]
+    assert res["44"] == {"n": "44"}
+
+
+class _GetSession:
+    def __init__(self, routes):
+        self.routes = routes
+        self.headers = {}
+        self.calls: list[str] = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.calls.append(url)
+        return self.routes[url]
+
+
+def test_count_uses_dollar_count_and_falls_back_to_all_pages():
+    from app.providers.graph_api import GraphApi
+
+    base = "https://graph.microsoft.com/v1.0"
+    roles_count = _FakeResponse(None, headers={})
+    roles_count.text = "\ufeff42"
+    routes = {
+        f"{base}/directoryRoles/$count": roles_count,
+        f"{base}/identity/conditionalAccess/policies/$count": _FakeResponse(None, status_code=400),
+        f"{base}/identity/conditionalAccess/policies?$top=100&$select=id": _FakeResponse(
+            {"value": [{"id": str(i)} for i in range(100)], "@odata.nextLink": f"{base}/next"}
+        ),
+        f"{base}/next": _FakeResponse({"value": [{"id": "x"}, {"id": "y"}]}),
+    }
+
+    api = GraphApi(access_token="x")
+    api._session = _GetSession(routes)
+
+    assert api.count_directory_roles() == 42
+    # More than one page: the count no longer caps at the first 100 items.
+    assert api.count_conditional_access_policies() == 102
+    assert api._session.calls[-1] == f"{base}/next"
+
+
+def test_not_modified_without_cached_body_raises_after_one_retry():
+    import pytest
+
+    from app.providers.graph_api import GraphApi, GraphApiError
+    from app.providers.http_cache import ResponseCache
+
+    base = "https://graph.microsoft.com/v1.0"
+    api = GraphApi(access_token="x", cache=ResponseCache())
+    api._session = _GetSession({f"{base}/policies/identitySecurityDefaultsEnforcementPolicy": _FakeResponse(None, status_code=304)})
+
+    # No validators were sent, so a 304 is nonsensical: fail clearly instead of parsing an empty body.
+    with pytest.raises(GraphApiError) as exc:
+        api.get_security_defaults()
+    assert exc.value.status_code == 304
+    assert len(api._session.calls) == 1
+
+
+def test_control_set_counts_come_from_batched_dollar_count():
+    import base64
+
+    from app.providers.graph_api import GraphApi
+
+    def handler(r):
+        if r["id"] == "conditional_access":
+            assert r["url"].endswith("/$count")
+            assert r["headers"]["ConsistencyLevel"] == "eventual"
+            return {"id": r["id"], "status": 200, "body": "7"}
+        if r["id"] == "directory_roles":
+            return {"id": r["id"], "status": 200, "body": base64.b64encode(b"13").decode("ascii")}
+        return {"id": r["id"], "status": 200, "body": {"value": []}}
+
+    api = GraphApi(access_token="x")
+    api._session = _BatchSession(handler)
+    res = api.get_control_set()
+
+    assert res.conditional_access_policy_count == 7
+    assert res.directory_roles_count == 13
+
+
+def test_batch_resends_only_throttled_sub_requests():
+    from app.providers.graph_api import GraphApi, GraphBatchRequest
+    from app.providers.rate_limit import RateGovernor
+
+    sleeps: list[float] = []
+    gov = RateGovernor(sleep=sleeps.append, clock=lambda: 0.0 + sum(sleeps))
+    seen: list[list[str]] = []
+
+    def handler(r):
+        if r["id"] == "b" and len(seen) == 1:
+            return {"id": "b", "status": 429, "headers": {"Retry-After": "3"}, "body": {}}
+        return {"id": r["id"], "status": 200, "body": {"ok": r["id"]}}
+
+    class _Session(_BatchSession):
+        def post(self, url, json=None, **kwargs):
+            seen.append([r["id"] for r in json["requests"]])
+            return super().post(url, json=json, **kwargs)
+
+    api = GraphApi(access_token="x", governor=gov)
+    api._session = _Session(handler)
+    res = api.batch([GraphBatchRequest(id="a", path="/a"), GraphBatchRequest(id="b", path="/b")])
+
+    assert seen == [["a", "b"], ["b"]]
+    assert res == {"a": {"ok": "a"}, "b": {"ok": "b"}}
+    assert sleeps == [3.0]
+
+
+def test_batch_level_failure_is_recorded_per_control(monkeypatch):
+    import base64
+    import uuid
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    monkeypatch.setenv("FERNET_KEY", base64.urlsafe_b64encode(b"3" * 32).decode("utf-8"))
+    monkeypatch.setenv("PROVIDER_HTTP_CACHE", "false")
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from app.crypto.fernet import encrypt_str
+    from app.db.base import Base
+    from app.models.user import User
+    from app.providers import graph_api
+    from app.repos.connections import upsert_connection
+    from app.repos.evidence import EvidenceBatch, add_control_evidence_many, create_run, latest_evidence_for_control
+    from app.services import collect
+
+    engine = create_engine("sqlite+pysqlite:///:memory:", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+    class _FailingSession:
+        headers = {}
+
+        def post(self, url, json=None, **kwargs):
+            return _FakeResponse({"error": {"code": "Forbidden"}}, status_code=403)
+
+    real_init = graph_api.GraphApi.__init__
+
+    def init(self, *args, **kwargs):
+        real_init(self, *args, **kwargs)
+        self._session = _FailingSession()
+
+    monkeypatch.setattr(graph_api.GraphApi, "__init__", init)
+    monkeypatch.setattr(collect, "get_microsoft_access_token", lambda db, conn: "x")
+
+    try:
+        user_id = uuid.uuid4()
+        db.add(User(id=user_id, email="ms@example.com", password_hash="x"))
+        db.commit()
+        upsert_connection(
+            db,
+            user_id=user_id,
+            provider="microsoft",
+            encrypted_access_token=encrypt_str("fake"),
+            encrypted_refresh_token=None,
+            scopes="Policy.Read.All",
+            token_type="Bearer",
+            expires_at=None,
+            provider_account_id=None,
+        )
+        run = create_run(db, user_id=user_id)
+        batch = EvidenceBatch(user_id=user_id, run_id=run.id)
+        collect._collect_microsoft(db, batch=batch)
+        add_control_evidence_many(db, batch=batch)
+        rows = {key: latest_evidence_for_control(db, user_id=user_id, control_key=key) for key in collect.MICROSOFT_CONTROL_KEYS}
+    finally:
+        db.close()
+
+    for key, row in rows.items():
+        assert row.status == "unknown", key
+        assert row.artifacts["error"] == {"status_code": 403, "message": "Forbidden"}
+        assert row.artifacts["organization_error"]["status_code"] == 403
+    assert "Security Defaults" in rows["ms.security_defaults"].notes
+    assert "Conditional Access" in rows["ms.conditional_access_presence"].notes
+
+
+def test_batch_server_error_raises_graph_api_error():
+    import pytest
+
+    from app.providers.graph_api import GraphApi, GraphApiError
+
+    class _UnavailableSession:
+        headers = {}
+
+        def post(self, url, json=None, **kwargs):
+            return _FakeResponse({}, status_code=503)
+
+    api = GraphApi(access_token="x")
+    api._session = _UnavailableSession()
+    with pytest.raises(GraphApiError) as excinfo:
+        api.get_control_set()
+    assert excinfo.value.status_code == 503
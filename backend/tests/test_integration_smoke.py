@@ -58,7 +58,17 @@ def test_smoke_register_collect_dashboard(monkeypatch):
     assert csrf
 
     c = client.post("/api/collect", headers={"X-CSRF-Token": csrf})
-    assert c.status_code == 200
+    assert c.status_code == 202
+    job = client.get(f"/api/jobs/{c.json()['job_id']}")
+    assert job.status_code == 200
+    assert job.json()["run_id"] == c.json()["run_id"]
+    assert job.json()["status"] in ("success", "partial")
+    assert set(job.json()["progress"]) == {"github", "microsoft"}
+    stream = client.get(f"/api/jobs/{c.json()['job_id']}/events")
+    assert stream.headers["content-type"].startswith("text/event-stream")
+    assert stream.text.startswith("event: job\n")
+    assert "event: control_written\n" in stream.text
+    assert stream.text.rstrip().split("\n\n")[-1].split("\n")[1] == "event: run_finished"
 
     import uuid
     user_id = uuid.UUID(r.json()["id"])
@@ -69,7 +79,7 @@ def test_smoke_register_collect_dashboard(monkeypatch):
         db.close()
 
     r2 = client.post("/api/collect", headers={"X-CSRF-Token": csrf})
-    assert r2.status_code == 200
+    assert r2.status_code == 202
 
     import uuid
 
@@ -99,6 +109,21 @@ def test_settings_rejects_wildcard_allowed_origins(monkeypatch):
         parse_allowed_origins(settings)
 
 
+def test_settings_rejects_unknown_github_collection_backend(monkeypatch):
+    from pydantic import ValidationError
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    monkeypatch.setenv("FERNET_KEY", _fernet_key())
+    monkeypatch.setenv("GITHUB_COLLECTION_BACKEND", "grapql")
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+    with pytest.raises(ValidationError):
+        get_settings()
+    get_settings.cache_clear()
+
+
 def test_oauth_denial_redirect_is_user_readable(monkeypatch):
     monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
     monkeypatch.setenv("FERNET_KEY", _fernet_key())
@@ -142,7 +167,7 @@ def test_oauth_denial_redirect_is_user_readable(monkeypatch):
     assert csrf
 
     c = client.post("/api/collect", headers={"X-CSRF-Token": csrf})
-    assert c.status_code == 200
+    assert c.status_code == 202
 
     import uuid
     user_id = uuid.UUID(r.json()["id"])
@@ -204,7 +229,7 @@ def test_collect_writes_complete_snapshot_even_on_provider_error(monkeypatch):
     # Force a GitHub failure at repo listing time.
     from app.providers import github_api
 
-    def boom(self, *, per_page: int = 100):
+    def boom(self, **kwargs):
         raise RuntimeError("boom")
 
     monkeypatch.setattr(github_api.GitHubApi, "list_repos", boom)
@@ -216,7 +241,7 @@ def test_collect_writes_complete_snapshot_even_on_provider_error(monkeypatch):
     assert csrf
 
     c = client.post("/api/collect", headers={"X-CSRF-Token": csrf})
-    assert c.status_code == 200
+    assert c.status_code == 202
 
     import uuid
     user_id = uuid.UUID(r.json()["id"])
@@ -249,7 +274,8 @@ def test_collect_writes_complete_snapshot_even_on_provider_error(monkeypatch):
         db.close()
 
     res = client.post("/api/collect", headers={"X-CSRF-Token": csrf})
-    assert res.status_code == 200
+    assert res.status_code == 202
+    assert res.json()["progress"] == {"github": "done", "microsoft": "done"}
 
     dash = client.get("/api/dashboard").json()
     assert len(dash) == 12
@@ -384,7 +410,7 @@ def test_wipe_deletes_all_user_data_and_logs_out(monkeypatch):
     assert csrf
 
     c = client.post("/api/collect", headers={"X-CSRF-Token": csrf})
-    assert c.status_code == 200
+    assert c.status_code == 202
 
     import uuid
     user_id = uuid.UUID(r.json()["id"])
@@ -455,7 +481,7 @@ def test_export_pack_verify_endpoint_detects_tampering(tmp_path, monkeypatch):
 
     # Ensure an evidence run exists so export is allowed.
     c = client.post("/api/collect", headers={"X-CSRF-Token": csrf})
-    assert c.status_code == 200
+    assert c.status_code == 202
 
     exp = client.post("/api/export", headers={"X-CSRF-Token": csrf})
     assert exp.status_code == 200
@@ -0,0 +1,81 @@
+import time
+
+
+class _Resp:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _governor(clock, **kwargs):
+    from app.providers.rate_limit import RateGovernor
+
+    return RateGovernor(sleep=clock.sleep, clock=clock, **kwargs)
+
+
+def test_retries_throttled_requests_honouring_retry_after():
+    clock = _FakeClock()
+    gov = _governor(clock, max_retries=3)
+    responses = [_Resp(429, {"Retry-After": "2"}), _Resp(503), _Resp(200)]
+
+    resp = gov.request(lambda: responses.pop(0))
+
+    assert resp.status_code == 200
+    assert not responses
+    assert clock.sleeps[0] == 2.0
+    # Second backoff is jittered exponential: within [0, base * 2].
+    assert 0 <= clock.sleeps[1] <= 1.0
+
+
+def test_gives_up_after_max_retries_and_returns_last_response():
+    clock = _FakeClock()
+    gov = _governor(clock, max_retries=2)
+    calls = []
+
+    def send():
+        calls.append(1)
+        return _Resp(502)
+
+    assert gov.request(send).status_code == 502
+    assert len(calls) == 3
+
+
+def test_token_bucket_paces_requests_beyond_burst():
+    clock = _FakeClock()
+    gov = _governor(clock, rate_per_second=2.0, burst=2)
+
+    for _ in range(4):
+        gov.acquire()
+
+    assert sum(clock.sleeps) == 1.0
+
+
+def test_exhausted_github_budget_blocks_until_reset_capped():
+    clock = _FakeClock()
+    gov = _governor(clock, max_wait_seconds=30.0)
+    reset = str(int(time.time()) + 3600)
+
+    gov.observe(_Resp(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset}))
+    gov.acquire()
+
+    assert clock.sleeps == [30.0]
+
+
+def test_governor_registry_shares_budget_per_key():
+    from app.providers.rate_limit import governor_for
+
+    assert governor_for("github:test-a") is governor_for("github:test-a")
+    assert governor_for("github:test-a") is not governor_for("github:test-b")
@@ -0,0 +1,276 @@
+import base64
+
+
+def _fernet_key() -> str:
+    return base64.urlsafe_b64encode(b"6" * 32).decode("utf-8")
+
+
+def test_runs_to_prune_keeps_recent_protected_and_one_per_bucket():
+    import uuid
+    from datetime import datetime, timedelta, timezone
+
+    from app.services.retention import RetentionPolicy, runs_to_prune
+
+    now = datetime(2026, 10, 16, tzinfo=timezone.utc)
+    days = [0, 1, 2, 40, 41, 200, 205, 206]
+    runs = [(uuid.uuid4(), now - timedelta(days=d), "success") for d in days]
+    ids = {d: r[0] for d, r in zip(days, runs)}
+    policy = RetentionPolicy(keep_runs=2, weekly_after_days=30, monthly_after_days=180)
+
+    prune = set(runs_to_prune(runs, policy=policy, protected={ids[206]}, now=now))
+
+    # Day 2 is recent (kept), day 41 shares an ISO week with day 40, and days 205/206
+    # share a month with day 200 but day 206 backs current evidence.
+    assert prune == {ids[41], ids[205]}
+    assert runs_to_prune(runs, policy=RetentionPolicy(keep_runs=0), protected=set(), now=now) == []
+
+
+def test_prune_evidence_deletes_runs_in_batches_and_orphaned_blobs(monkeypatch):
+    import uuid
+    from datetime import datetime, timedelta, timezone
+
+    from sqlalchemy import create_engine, func, select
+    from sqlalchemy.orm import sessionmaker
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    monkeypatch.setenv("FERNET_KEY", _fernet_key())
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from app.db.base import Base
+    from app.models.evidence import ControlEvidence, EvidenceRun
+    from app.models.evidence_blob import EvidenceBlob
+    from app.models.user import User
+    from app.repos.evidence import EvidenceBatch, add_control_evidence_many, create_run
+    from app.services.retention import RetentionPolicy, prune_evidence
+
+    engine = create_engine("sqlite+pysqlite:///:memory:", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, email="retention@example.com", password_hash="x"))
+    db.commit()
+
+    now = datetime(2026, 10, 16, tzinfo=timezone.utc)
+    try:
+        # Two runs in the same old month: the older one (and its unique blob) goes.
+        for day, repos in ((100, ["o/old"]), (99, ["o/new"]), (1, ["o/new"])):
+            run = create_run(db, user_id=user_id)
+            run.started_at = now - timedelta(days=day)
+            db.commit()
+            batch = EvidenceBatch(user_id=user_id, run_id=run.id)
+            ref = batch.add_blob(repos)
+            for key in ("gh.branch_protection", "gh.enforce_admins", "pack.connection_status"):
+                batch.add(
+                    control_key=key,
+                    provider=key.split(".")[0],
+                    status="pass",
+                    artifacts={"per_repo": ref},
+                    notes="",
+                    collected_at=now - timedelta(days=day),
+                )
+            add_control_evidence_many(db, batch=batch)
+
+        policy = RetentionPolicy(keep_runs=1, weekly_after_days=7, monthly_after_days=30)
+        dry = prune_evidence(db, policy=policy, batch_size=2, dry_run=True, now=now)
+        assert dry.runs_deleted == 1
+        assert db.execute(select(func.count()).select_from(EvidenceRun)).scalar() == 3
+
+        report = prune_evidence(db, policy=policy, batch_size=2, now=now)
+
+        assert report.runs_deleted == 1
+        assert report.evidence_deleted == 3
+        assert report.blobs_deleted == 1
+        assert db.execute(select(func.count()).select_from(EvidenceRun)).scalar() == 2
+        assert db.execute(select(func.count()).select_from(ControlEvidence)).scalar() == 6
+        assert db.execute(select(func.count()).select_from(EvidenceBlob)).scalar() == 1
+    finally:
+        db.close()
+
+
+def test_max_age_prunes_old_unprotected_runs_regardless_of_keep_runs():
+    import uuid
+    from datetime import datetime, timedelta, timezone
+
+    from app.services.retention import RetentionPolicy, runs_to_prune
+
+    now = datetime(2026, 10, 16, tzinfo=timezone.utc)
+    days = [0, 10, 100, 400]
+    runs = [(uuid.uuid4(), now - timedelta(days=d), "success") for d in days]
+    ids = {d: r[0] for d, r in zip(days, runs)}
+
+    policy = RetentionPolicy(keep_runs=0, max_age_days=90)
+    assert policy.enabled
+    assert set(runs_to_prune(runs, policy=policy, protected={ids[400]}, now=now)) == {ids[100]}
+
+
+def test_partitioned_evidence_ddl_is_postgres_only():
+    import importlib.util
+    from datetime import date, datetime, timedelta, timezone
+    from pathlib import Path
+    from types import SimpleNamespace
+
+    from sqlalchemy.dialects import postgresql, sqlite
+    from sqlalchemy.schema import CreateTable
+
+    from app.models.evidence import ControlEvidence
+    from app.repos.evidence_partitions import create_partition_sql, month_start, partition_name, partitions_before
+
+    # Partitioning and the (id, collected_at) key live in alembic 0008 only; the ORM
+    # identity stays id, so db.get(ControlEvidence, id) keeps working.
+    table = ControlEvidence.__table__
+    assert "PARTITION BY" not in str(CreateTable(table).compile(dialect=postgresql.dialect()))
+    assert "PARTITION BY" not in str(CreateTable(table).compile(dialect=sqlite.dialect()))
+    assert {c.name for c in table.primary_key.columns} == {"id"}
+
+    assert partition_name(date(2026, 12, 1)) == "control_evidence_y2026m12"
+    assert create_partition_sql(date(2026, 12, 15)) == (
+        "CREATE TABLE IF NOT EXISTS control_evidence_y2026m12 PARTITION OF control_evidence "
+        "FOR VALUES FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')"
+    )
+    # 00:30 on Nov 1 in UTC+1 is still October in UTC, and so is the partition ensured for it.
+    cet = timezone(timedelta(hours=1))
+    assert month_start(datetime(2026, 11, 1, 0, 30, tzinfo=cet)) == date(2026, 10, 1)
+
+    # The migration creates partitions with the same UTC bounds.
+    spec = importlib.util.spec_from_file_location(
+        "migration_0008", Path(__file__).parents[1] / "alembic/versions/0008_partition_control_evidence.py"
+    )
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    executed: list[str] = []
+    migration.op = SimpleNamespace(execute=executed.append)
+    migration._create_partition(date(2026, 12, 1))
+    assert executed == [create_partition_sql(date(2026, 12, 1))]
+
+    class _SqliteBind:
+        class dialect:
+            name = "sqlite"
+
+    assert partitions_before(_SqliteBind(), datetime(2026, 10, 16, tzinfo=timezone.utc)) == []
+
+
+def test_partition_drop_skips_months_with_protected_or_running_runs(monkeypatch):
+    import uuid
+    from datetime import datetime, timezone
+
+    from sqlalchemy import create_engine, delete, text
+    from sqlalchemy.orm import sessionmaker
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    monkeypatch.setenv("FERNET_KEY", _fernet_key())
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from app.db.base import Base
+    from app.models.evidence import CurrentControlEvidence
+    from app.models.user import User
+    from app.repos.evidence import EvidenceBatch, add_control_evidence_many, create_run
+    from app.repos.evidence_partitions import partitions_without_live_runs
+
+    engine = create_engine("sqlite+pysqlite:///:memory:", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, email="partitions@example.com", password_hash="x"))
+    db.commit()
+
+    def add_run(status: str, collected_at: datetime):
+        run = create_run(db, user_id=user_id, status=status)
+        batch = EvidenceBatch(user_id=user_id, run_id=run.id)
+        batch.add(
+            control_key=f"gh.{run.id}",
+            provider="github",
+            status="pass",
+            artifacts={},
+            notes="",
+            collected_at=collected_at,
+        )
+        add_control_evidence_many(db, batch=batch)
+        return run.id
+
+    try:
+        # SQLite stand-ins for three expired monthly partitions of control_evidence.
+        months = {
+            "control_evidence_y2020m01": add_run("success", datetime(2020, 1, 5, tzinfo=timezone.utc)),
+            "control_evidence_y2020m02": add_run("running", datetime(2020, 2, 5, tzinfo=timezone.utc)),
+            "control_evidence_y2020m03": add_run("success", datetime(2020, 3, 5, tzinfo=timezone.utc)),
+        }
+        # Only the March run is the newest for its control, so it backs current evidence...
+        db.execute(
+            delete(CurrentControlEvidence).where(CurrentControlEvidence.run_id != months["control_evidence_y2020m03"])
+        )
+        db.commit()
+        with engine.begin() as conn:
+            for name, run_id in months.items():
+                conn.execute(
+                    text(f"CREATE TABLE {name} AS SELECT * FROM control_evidence WHERE run_id = :r"),
+                    {"r": run_id.hex},
+                )
+
+        # ...and February's run is still running: only January may be dropped.
+        assert partitions_without_live_runs(engine, sorted(months)) == ["control_evidence_y2020m01"]
+    finally:
+        db.close()
+
+
+def test_delete_unreferenced_blobs_reads_references_once(monkeypatch):
+    import uuid
+
+    from sqlalchemy import create_engine, event, func, select
+    from sqlalchemy.orm import sessionmaker
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    monkeypatch.setenv("FERNET_KEY", _fernet_key())
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from app.db.base import Base
+    from app.models.evidence_blob import EvidenceBlob
+    from app.models.user import User
+    from app.repos.evidence import EvidenceBatch, add_control_evidence_many, create_run
+    from app.repos.evidence_blobs import delete_unreferenced_blobs, encode_blob, insert_blobs
+
+    engine = create_engine("sqlite+pysqlite:///:memory:", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, email="blobs@example.com", password_hash="x"))
+    db.commit()
+
+    try:
+        run = create_run(db, user_id=user_id)
+        batch = EvidenceBatch(user_id=user_id, run_id=run.id)
+        ref = batch.add_blob(["o/kept"])
+        batch.add(
+            control_key="gh.branch_protection",
+            provider="github",
+            status="pass",
+            artifacts={"per_repo": ref},
+            notes="",
+        )
+        add_control_evidence_many(db, batch=batch)
+        orphans = {f"o/orphan{i}": [f"o/orphan{i}"] for i in range(3)}
+        insert_blobs(db, user_id=user_id, blobs={encode_blob(v)[0]: v for v in orphans.values()})
+        db.commit()
+        candidates = {encode_blob(v)[0] for v in orphans.values()} | {encode_blob(["o/kept"])[0]}
+
+        selects: list[str] = []
+        event.listen(
+            engine,
+            "before_cursor_execute",
+            lambda conn, cur, stmt, *a: selects.append(stmt) if stmt.startswith("SELECT") else None,
+        )
+
+        assert delete_unreferenced_blobs(db, user_id=user_id, shas=candidates) == 3
+        # One scan per evidence table, however many candidates there are.
+        assert len(selects) == 2
+        assert db.execute(select(func.count()).select_from(EvidenceBlob)).scalar() == 1
+    finally:
+        db.close()
@@ -0,0 +1,147 @@
+import base64
+
+
+def _fernet_key() -> str:
+    return base64.urlsafe_b64encode(b"S" * 32).decode("utf-8")
+
+
+def test_recorder_coalesces_touches_into_one_batched_update(monkeypatch):
+    import uuid
+    from datetime import datetime, timedelta, timezone
+
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    monkeypatch.setenv("FERNET_KEY", _fernet_key())
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from app.db.base import Base
+    from app.models.session import Session as DbSession
+    from app.models.user import User
+    from app.services.session_activity import SessionActivityRecorder
+
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+    t0 = datetime(2026, 10, 16, 12, 0, tzinfo=timezone.utc)
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, email="touch@example.com", password_hash="x"))
+    sessions = [
+        DbSession(
+            user_id=user_id,
+            token_hash=f"{i:064d}",
+            csrf_token="c",
+            expires_at=t0 + timedelta(days=1),
+            last_seen_at=t0,
+        )
+        for i in range(2)
+    ]
+    db.add_all(sessions)
+    db.commit()
+    s1, s2 = (s.id for s in sessions)
+
+    updates: list[str] = []
+
+    def on_execute(conn, cursor, statement, *args):
+        if statement.startswith("UPDATE"):
+            updates.append(statement)
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+
+    recorder = SessionActivityRecorder(granularity=timedelta(seconds=60))
+    recorder.seen(s1, t0)
+    recorder.seen(s2, t0)
+    assert not recorder.record(s1, now=t0 + timedelta(seconds=30))
+    assert recorder.record(s1, now=t0 + timedelta(seconds=61))
+    assert not recorder.record(s1, now=t0 + timedelta(seconds=62))
+    assert recorder.record(s2, now=t0 + timedelta(seconds=90))
+
+    assert recorder.flush(engine) == 2
+    assert recorder.flush(engine) == 0
+    assert len(updates) == 1
+
+    db.expire_all()
+    seen = {s.id: s.last_seen_at.replace(tzinfo=timezone.utc) for s in db.query(DbSession).all()}
+    assert seen == {s1: t0 + timedelta(seconds=62), s2: t0 + timedelta(seconds=90)}
+    db.close()
+
+
+def test_dropped_flush_is_rescheduled_after_error_response(monkeypatch):
+    import uuid
+    from datetime import datetime, timedelta, timezone
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    monkeypatch.setenv("FERNET_KEY", _fernet_key())
+    monkeypatch.setenv("WEB_BASE_URL", "http://localhost:5173")
+    monkeypatch.setenv("SESSION_TOUCH_GRANULARITY_SECONDS", "0")
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    import app.services.session_activity as session_activity_mod
+    from app.db.base import Base
+    from app.db.session import get_db
+    from app.main import create_app
+    from app.models.session import Session as DbSession
+
+    monkeypatch.setattr(session_activity_mod, "_recorder", None)
+
+    # Unit level: a pending session whose flush never ran asks again once the window passes.
+    recorder = session_activity_mod.SessionActivityRecorder(granularity=timedelta(seconds=60))
+    t0 = datetime(2026, 10, 16, 12, 0, tzinfo=timezone.utc)
+    sid = uuid.uuid4()
+    assert recorder.record(sid, now=t0)
+    assert not recorder.record(sid, now=t0 + timedelta(seconds=30))
+    assert recorder.record(sid, now=t0 + timedelta(seconds=61))
+
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    app = create_app()
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+
+    r = client.post("/api/auth/register", json={"email": "touch-err@example.com", "password": "password123"})
+    assert r.status_code == 200
+
+    def last_seen() -> datetime:
+        with TestingSessionLocal() as db:
+            return db.query(DbSession).one().last_seen_at
+
+    registered = last_seen()
+
+    # Authenticated but fails CSRF: the flush scheduled by get_auth_ctx is dropped with the 403.
+    assert client.post("/api/collect").status_code == 403
+    assert last_seen() == registered
+
+    assert client.get("/api/me").status_code == 200
+    assert last_seen() > registered
@@ -0,0 +1,40 @@
+def test_bounded_pool_rejects_when_saturated():
+    import threading
+
+    import pytest
+
+    from app.core.workers import BoundedProcessPool, WorkerPoolSaturated
+
+    pool = BoundedProcessPool(name="test", max_workers=0, max_queued=1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow() -> str:
+        started.set()
+        release.wait(5)
+        return "done"
+
+    results: list[str] = []
+    t = threading.Thread(target=lambda: results.append(pool.call(slow)))
+    t.start()
+    assert started.wait(5)
+
+    with pytest.raises(WorkerPoolSaturated):
+        pool.call(len, "x")
+
+    release.set()
+    t.join(5)
+    assert results == ["done"]
+    assert pool.call(len, "xy") == 2
+
+
+def test_process_pool_runs_password_hashing_out_of_process():
+    from app.core.security import hash_password, verify_password
+    from app.core.workers import BoundedProcessPool
+
+    pool = BoundedProcessPool(name="test-bcrypt", max_workers=1, max_queued=0)
+    try:
+        hashed = pool.call(hash_password, "password123")
+        assert pool.call(verify_password, "password123", hashed)
+        assert not pool.call(verify_password, "wrong-password", hashed)
+    finally:
+        pool.shutdown()
@@ -59,6 +59,7 @@ export const api = {
   get: <T>(path: string) => request<T>("GET", path),
   post: <T>(path: string, body?: unknown) => request<T>("POST", path, body),
   del: <T>(path: string) => request<T>("DELETE", path),
+  events: (path: string) => new EventSource(`${API_BASE_URL}${path}`, { withCredentials: true }),
   download: async (path: string, filename: string) => {
     const headers: Record<string, string> = {};
     const csrf = csrfToken();
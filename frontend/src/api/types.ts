@@ -27,9 +27,22 @@ export type ControlDetail = ControlSummary & {
   notes: string;
 };
 
-export type CollectResponse = {
+export type ControlWrittenEvent = {
+  seq: number;
+  at: string;
+  control_key: string;
+  provider: string | null;
+  status: ControlSummary["status"];
+};
+
+export type CollectJob = {
+  job_id: string;
   run_id: string;
-  status: "success" | "partial" | "failed";
+  status: "queued" | "running" | "success" | "partial" | "failed";
+  progress: Record<string, "pending" | "running" | "done" | "failed">;
   errors: string[];
+  created_at: string;
+  started_at?: string | null;
+  finished_at?: string | null;
 };
 
@@ -1,7 +1,35 @@
 import { useEffect, useMemo, useState } from "react";
 import { Link } from "react-router-dom";
 import { api, ApiError } from "../api/client";
-import type { CollectResponse, ControlSummary } from "../api/types";
+import type { CollectJob, ControlSummary, ControlWrittenEvent } from "../api/types";
+
+const JOB_POLL_MS = 1000;
+
+function jobActive(job: CollectJob) {
+  return job.status === "queued" || job.status === "running";
+}
+
+// Resolves when the run finishes or the stream drops; callers poll afterwards to confirm.
+function followJobEvents(
+  jobId: string,
+  onControl: (e: ControlWrittenEvent) => void,
+  onProvider: (provider: string, state: CollectJob["progress"][string]) => void,
+): Promise<void> {
+  return new Promise((resolve) => {
+    const source = api.events(`/api/jobs/${jobId}/events`);
+    const done = () => {
+      source.close();
+      resolve();
+    };
+    source.addEventListener("control_written", (e) => onControl(JSON.parse((e as MessageEvent).data)));
+    source.addEventListener("provider_finished", (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      onProvider(data.provider, data.state);
+    });
+    source.addEventListener("run_finished", done);
+    source.onerror = done;
+  });
+}
 
 function statusClass(s: string) {
   if (s === "pass") return "pill pass";
@@ -15,6 +43,7 @@ export function DashboardPage() {
   const [loading, setLoading] = useState(true);
   const [busy, setBusy] = useState(false);
   const [err, setErr] = useState<string | null>(null);
+  const [job, setJob] = useState<CollectJob | null>(null);
 
   async function load() {
     setErr(null);
@@ -43,7 +72,24 @@ export function DashboardPage() {
     setBusy(true);
     setErr(null);
     try {
-      await api.post<CollectResponse>("/api/collect");
+      // Collection runs as a background job: follow its event stream, then poll until it finishes.
+      let current = await api.post<CollectJob>("/api/collect");
+      setJob(current);
+      if (jobActive(current)) {
+        await followJobEvents(
+          current.job_id,
+          (e) =>
+            setControls((rows) =>
+              rows.map((c) => (c.key === e.control_key ? { ...c, status: e.status, collected_at: e.at } : c)),
+            ),
+          (provider, state) => setJob((j) => (j ? { ...j, progress: { ...j.progress, [provider]: state } } : j)),
+        );
+      }
+      while (jobActive(current)) {
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_MS));
+        current = await api.get<CollectJob>(`/api/jobs/${current.job_id}`);
+        setJob(current);
+      }
       await load();
     } catch (e) {
       setErr(e instanceof ApiError ? JSON.stringify(e.detail) : "Collect failed");
@@ -90,6 +136,14 @@ export function DashboardPage() {
       </section>
 
       {err ? <div className="error">{err}</div> : null}
+      {job && jobActive(job) ? (
+        <div className="muted">
+          Collecting:{" "}
+          {Object.entries(job.progress)
+            .map(([provider, state]) => `${provider} ${state}`)
+            .join(", ")}
+        </div>
+      ) : null}
 
       <section className="card">
         <div className="tableHead">